@@ -3,10 +3,13 @@
 Skript zum Hinzufügen der Woche 1 Daten und Ergebnisse
 """
 
-from app import app, db, User, Team, Match, Pick, EliminatedTeam, TeamLoserUsage
+from app import create_app
+from models import db, User, Team, Match, Pick, EliminatedTeam, TeamLoserUsage
 from datetime import datetime
 import pytz
 
+app = create_app()
+
 def add_week1_data():
     with app.app_context():
         print("=== WOCHE 1 DATEN ERSETZEN ===")
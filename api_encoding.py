@@ -0,0 +1,147 @@
+"""
+NFL PickEm API Encoding
+Compact columnar encoding and response compression for the large list
+endpoints (/api/matches, /api/picks).
+
+Clients that send "Accept: application/vnd.nflpickem.compact+json" get the
+same payload with every list of records stored as a table of columns and
+rows. Nested records (teams, users, matches) are stored once in their own
+table and referenced by row index, so a full season no longer repeats the
+team objects three times per match:
+
+    {"$compact": 1,
+     "$tables": {"teams": {"columns": ["id", "name", ...], "rows": [[1, "Bills", ...], ...]},
+                 "matches": {"columns": [...], "rows": [...], "refs": {"home_team": "teams", ...}}},
+     "matches": {"$table": "matches", "rows": [0, 1, 2, ...]}}
+
+decodeCompact() in static/app.js turns this back into the plain JSON shape.
+Plain JSON stays the default. JSON responses above COMPRESS_MIN_BYTES are
+gzip-compressed when the client accepts it, or brotli-compressed if the
+optional brotli package is installed and the client prefers it.
+"""
+
+import gzip
+
+from flask import current_app, jsonify, request
+
+COMPACT_MIMETYPE = 'application/vnd.nflpickem.compact+json'
+COMPRESS_MIN_BYTES = 1024  # Below this the headers cost more than compression saves
+COMPRESS_MIMETYPES = ('application/json', COMPACT_MIMETYPE)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Nested record fields stored as references: table -> {field: referenced table}
+TABLE_REFS = {
+    'teams': {},
+    'users': {},
+    'matches': {'home_team': 'teams', 'away_team': 'teams', 'winner_team': 'teams'},
+    'picks': {'user': 'users', 'match': 'matches', 'chosen_team': 'teams'},
+}
+
+# Payload keys whose record lists are encoded as tables
+PAYLOAD_TABLES = {'teams': 'teams', 'matches': 'matches', 'picks': 'picks'}
+
+def wants_compact():
+    """True if the request prefers the compact encoding over plain JSON"""
+    return request.accept_mimetypes.best_match(['application/json', COMPACT_MIMETYPE]) == COMPACT_MIMETYPE
+
+class ColumnarTables:
+    """Records interned by id into per-table column/row lists"""
+
+    def __init__(self):
+        self.tables = {}
+
+    def add(self, table_name, record):
+        """Store record (and the records it references) once; returns its row index"""
+        table = self.tables.get(table_name)
+        if table is None:
+            table = self.tables[table_name] = {'columns': list(record), 'rows': [], 'index': {}}
+        key = record.get('id')  # Records selected without their id (?fields=) are not interned
+        index = table['index'].get(key) if key is not None else None
+        if index is not None:
+            return index
+
+        refs = TABLE_REFS.get(table_name, {})
+        row = []
+        for column in table['columns']:
+            value = record.get(column)
+            if column in refs and value is not None:
+                value = self.add(refs[column], value)
+            row.append(value)
+
+        index = len(table['rows'])
+        if key is not None:
+            table['index'][key] = index
+        table['rows'].append(row)
+        return index
+
+    def to_dict(self):
+        encoded = {}
+        for table_name, table in self.tables.items():
+            encoded[table_name] = {'columns': table['columns'], 'rows': table['rows']}
+            refs = {column: target for column, target in TABLE_REFS.get(table_name, {}).items()
+                    if column in table['columns']}
+            if refs:
+                encoded[table_name]['refs'] = refs
+        return encoded
+
+def encode_compact(payload):
+    """Compact document for a response payload (see module docstring)"""
+    tables = ColumnarTables()
+    document = {'$compact': 1}
+    for key, value in payload.items():
+        if key in PAYLOAD_TABLES and isinstance(value, list):
+            document[key] = {'$table': PAYLOAD_TABLES[key],
+                             'rows': [tables.add(PAYLOAD_TABLES[key], record) for record in value]}
+        else:
+            document[key] = value
+    document['$tables'] = tables.to_dict()
+    return document
+
+def api_response(payload, status=200):
+    """jsonify(payload), or its compact encoding if the client asked for it"""
+    if not wants_compact():
+        response = jsonify(payload)
+    else:
+        response = current_app.response_class(current_app.json.dumps(encode_compact(payload)) + '\n',
+                                              mimetype=COMPACT_MIMETYPE)
+    response.status_code = status
+    response.vary.add('Accept')
+    return response
+
+def _choose_encoding():
+    """'br' or 'gzip' (whichever the client accepts, brotli only if installed), else None"""
+    accepted = request.accept_encodings
+    if accepted['br'] and accepted['br'] >= accepted['gzip']:
+        try:
+            import brotli  # Optional dependency
+            return 'br'
+        except ImportError:
+            pass
+    return 'gzip' if accepted['gzip'] else None
+
+def _compress_response(response):
+    """Compress finished JSON responses above COMPRESS_MIN_BYTES"""
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESS_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+
+    encoding = _choose_encoding()
+    if encoding == 'br':
+        import brotli
+        response.set_data(brotli.compress(data, quality=BROTLI_QUALITY))
+    elif encoding == 'gzip':
+        response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0))
+    else:
+        return response
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def register_api_encoding(app):
+    """Compress the app's JSON responses (compact encoding is chosen per route via api_response)"""
+    app.after_request(_compress_response)
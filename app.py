@@ -1,257 +1,100 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, send_from_directory
-from flask_sqlalchemy import SQLAlchemy
-from flask_cors import CORS
+"""
+NFL PickEm Flask Application
+
+Application factory and API routes. create_app(config) builds a configured
+app: it binds the models (models.py) to the database, creates missing
+tables and registers the API blueprints and the mutation journal. Importing
+this module does none of that, so scripts only pay for what they use.
+
+The database URL and connection pool come from the environment (see
+database.py); the game validator and the sync API in the same process use
+the app's engine.
+
+Every route works in one league and season (see leagues.py): ?league_id=
+and ?season= select them, otherwise the logged-in user's league and the
+current season apply.
+
+Match and pick lists can be requested in a compact columnar encoding and
+large JSON responses are compressed (see api_encoding.py). They also take
+?fields= (comma-separated keys to return) and ?limit= / ?cursor= (pages
+ordered by id; the response carries next_cursor, null on the last page).
+
+Static files built with "python static_assets.py build" are served from
+/static/dist/ under fingerprinted names, precompressed and cached as
+immutable (see static_assets.py).
+
+Usage:
+    python app.py                                   development server + validator thread
+    gunicorn -c gunicorn.conf.py "app:create_app()" production (see app_launcher.py)
+"""
+
 import os
-from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
-import json
 import logging
+from datetime import datetime
+
+from flask import Flask, Blueprint, current_app, has_app_context, request, jsonify, session, send_from_directory
+from flask_cors import CORS
+from sqlalchemy import case, event, func
+from sqlalchemy.orm import Session
+
+from models import db, User, Team, Match, Pick, EliminatedTeam, TeamWinnerUsage, TeamLoserUsage
+from api_encoding import api_response, register_api_encoding
+from database import get_database_url, get_engine_options, get_sqlite_path, prepare_database, use_engine
+from database_sync_api import register_database_sync_api
+from leagues import get_request_scope
+from mutation_journal import MutationJournal
+from request_metrics import register_request_metrics
+from season_analytics import get_season_analytics
+from static_assets import asset_url, register_static_assets, send_index
+from stats_api import register_stats_api
+from validator_runs import ValidatorRunStore
+from validator_worker import get_validator_leader
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Flask app
-app = Flask(__name__, static_folder='static')
-app.config['SECRET_KEY'] = 'nfl-pickem-secret-key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///nfl_pickem.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Enable CORS
-CORS(app, supports_credentials=True)
-
-# Initialize SQLAlchemy
-db = SQLAlchemy(app)
-
-# Models
-class User(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=True)
-    is_admin = db.Column(db.Boolean, default=False)
-    
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
-        
-    def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'is_admin': self.is_admin,
-            'score': self.get_score()
-        }
-    
-    def get_score(self):
-        """Calculate user's total score based on correct picks"""
-        score = 0
-        picks = Pick.query.filter_by(user_id=self.id).all()
-        for pick in picks:
-            match = db.session.get(Match, pick.match_id)
-            if match and match.is_completed and match.winner_team_id == pick.chosen_team_id:
-                score += 1
-        return score
-
-class Team(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    abbreviation = db.Column(db.String(10), nullable=False)
-    logo_url = db.Column(db.String(255), nullable=False)
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'abbreviation': self.abbreviation,
-            'logo_url': self.logo_url
-        }
-
-class Match(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    week = db.Column(db.Integer, nullable=False)
-    home_team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
-    away_team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
-    start_time = db.Column(db.DateTime, nullable=False)
-    is_completed = db.Column(db.Boolean, default=False)
-    winner_team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=True)
-    
-    # New fields for ESPN integration
-    home_score = db.Column(db.Integer, nullable=True)
-    away_score = db.Column(db.Integer, nullable=True)
-    status = db.Column(db.String(20), default='scheduled')  # scheduled, in_progress, completed
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
-    home_team = db.relationship('Team', foreign_keys=[home_team_id])
-    away_team = db.relationship('Team', foreign_keys=[away_team_id])
-    winner_team = db.relationship('Team', foreign_keys=[winner_team_id])
-    
-    # Helper properties for ESPN integration
-    @property
-    def home_team_name(self):
-        return self.home_team.name if self.home_team else None
-    
-    @property
-    def away_team_name(self):
-        return self.away_team.name if self.away_team else None
-    
-    @property
-    def winner(self):
-        return self.winner_team.name if self.winner_team else None
-    
-    @property
-    def is_game_started(self):
-        """Check if the game has started (corrected timezone handling)"""
-        import pytz
-        from datetime import datetime
-        
-        # Get current time in Vienna
-        vienna_tz = pytz.timezone('Europe/Vienna')
-        now_vienna = datetime.now(vienna_tz)
-        
-        # Interpret stored time as US Eastern Time (not UTC!)
-        eastern_tz = pytz.timezone('US/Eastern')
-        
-        if self.start_time.tzinfo is None:
-            # Stored time is US Eastern Time without timezone info
-            start_time_eastern = eastern_tz.localize(self.start_time)
-        else:
-            # If timezone info exists, convert to Eastern first
-            start_time_eastern = self.start_time.astimezone(eastern_tz)
-            
-        # Convert to Vienna time for comparison
-        start_time_vienna = start_time_eastern.astimezone(vienna_tz)
-        
-        return now_vienna >= start_time_vienna
-    
-    @property
-    def start_time_vienna(self):
-        """Get start time in Vienna timezone (corrected)"""
-        import pytz
-        
-        vienna_tz = pytz.timezone('Europe/Vienna')
-        eastern_tz = pytz.timezone('US/Eastern')
-        
-        if self.start_time.tzinfo is None:
-            # Stored time is US Eastern Time
-            start_time_eastern = eastern_tz.localize(self.start_time)
-        else:
-            start_time_eastern = self.start_time.astimezone(eastern_tz)
-            
-        return start_time_eastern.astimezone(vienna_tz)
-    
-    @winner.setter
-    def winner(self, team_name):
-        if team_name:
-            team = Team.query.filter_by(name=team_name).first()
-            if team:
-                self.winner_team_id = team.id
-                self.is_completed = True
-                self.status = 'completed'
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'week': self.week,
-            'home_team': self.home_team.to_dict(),
-            'away_team': self.away_team.to_dict(),
-            'start_time': self.start_time.isoformat(),
-            'start_time_vienna': self.start_time_vienna.isoformat(),
-            'is_completed': self.is_completed,
-            'is_game_started': self.is_game_started,
-            'home_score': self.home_score,
-            'away_score': self.away_score,
-            'status': self.status,
-            'winner': self.winner,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'winner_team': self.winner_team.to_dict() if self.winner_team_id else None
-        }
-
-class Pick(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    match_id = db.Column(db.Integer, db.ForeignKey('match.id'), nullable=False)
-    chosen_team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
-    
-    user = db.relationship('User')
-    match = db.relationship('Match')
-    chosen_team = db.relationship('Team')
-    
-    @property
-    def is_correct(self):
-        if not self.match.is_completed:
-            return False
-        return self.chosen_team_id == self.match.winner_team_id
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user': self.user.to_dict(),
-            'match': self.match.to_dict(),
-            'chosen_team': self.chosen_team.to_dict(),
-            'is_correct': self.is_correct
-        }
-
-class EliminatedTeam(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
-    elimination_type = db.Column(db.String(20), nullable=False)  # 'winner' or 'loser'
-    
-    user = db.relationship('User')
-    team = db.relationship('Team')
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user': self.user.to_dict(),
-            'team': self.team.to_dict(),
-            'elimination_type': self.elimination_type
-        }
-
-class TeamWinnerUsage(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
-    usage_count = db.Column(db.Integer, default=0)
-    
-    user = db.relationship('User')
-    team = db.relationship('Team')
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user': self.user.to_dict(),
-            'team': self.team.to_dict(),
-            'usage_count': self.usage_count
-        }
-
-class TeamLoserUsage(db.Model):
-    """Tracks teams that have been picked as losers (automatically when picking a winner)"""
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
-    week = db.Column(db.Integer, nullable=False)  # Track which week this happened
-    match_id = db.Column(db.Integer, db.ForeignKey('match.id'), nullable=False)  # Track the specific match
-    
-    user = db.relationship('User')
-    team = db.relationship('Team')
-    match = db.relationship('Match')
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user': self.user.to_dict(),
-            'team': self.team.to_dict(),
-            'week': self.week,
-            'match': self.match.to_dict()
-        }
+DEFAULT_CONFIG = {
+    'SECRET_KEY': 'nfl-pickem-secret-key',
+    'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+}
+
+api = Blueprint('api', __name__)
+
+def database_path():
+    """SQLite file of the app database (None on a server database)"""
+    return current_app.config['DATABASE_PATH']
+
+def latest_season():
+    return db.session.query(func.max(Match.season)).scalar()
+
+def get_scope():
+    """(league_id, season) of the current request"""
+    return get_request_scope(latest_season)
+
+MAX_PAGE_SIZE = 500
+
+def requested_fields(model):
+    """(fields, unknown) from ?fields=: the requested subset of model.API_FIELDS (None: all) and unknown names"""
+    value = request.args.get('fields')
+    if not value:
+        return None, []
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    return fields, [field for field in fields if field not in model.API_FIELDS]
+
+def paginate(query, id_column):
+    """(items, page) of a list query: every row, or with ?limit= the page after ?cursor= ordered by id_column"""
+    limit = request.args.get('limit', type=int)
+    if not limit:
+        return query.all(), {}
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    cursor = request.args.get('cursor', type=int)
+    if cursor:
+        query = query.filter(id_column > cursor)
+    items = query.order_by(id_column).limit(limit + 1).all()
+    next_cursor = items[limit - 1].id if len(items) > limit else None
+    return items[:limit], {'next_cursor': next_cursor, 'limit': limit}
 
 # API Routes
-@app.route('/api/auth/login', methods=['POST'])
+@api.route('/api/auth/login', methods=['POST'])
 def login():
     try:
         data = request.get_json()
@@ -268,6 +111,7 @@ def login():
         
         if user and user.check_password(password):
             session['user_id'] = user.id
+            session['league_id'] = user.league_id
             return jsonify({
                 'message': 'Login successful',
                 'user': user.to_dict()
@@ -275,19 +119,20 @@ def login():
         else:
             return jsonify({'error': 'Invalid credentials'}), 401
     except Exception as e:
-        print(f"Error in login: {e}")
+        logger.error(f"Error in login: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
-@app.route('/api/auth/logout', methods=['POST', 'GET'])
+@api.route('/api/auth/logout', methods=['POST', 'GET'])
 def logout():
     try:
         session.pop('user_id', None)
+        session.pop('league_id', None)
         return jsonify({'message': 'Logout successful'}), 200
     except Exception as e:
-        print(f"Error in logout: {e}")
+        logger.error(f"Error in logout: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
-@app.route('/api/auth/me', methods=['GET'])
+@api.route('/api/auth/me', methods=['GET'])
 def get_current_user():
     try:
         user_id = session.get('user_id')
@@ -300,10 +145,10 @@ def get_current_user():
         
         return jsonify({'user': user.to_dict()}), 200
     except Exception as e:
-        print(f"Error in get_current_user: {e}")
+        logger.error(f"Error in get_current_user: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
-@app.route('/api/teams', methods=['GET'])
+@api.route('/api/teams', methods=['GET'])
 def get_teams():
     try:
         teams = Team.query.all()
@@ -311,27 +156,56 @@ def get_teams():
             'teams': [team.to_dict() for team in teams]
         }), 200
     except Exception as e:
-        print(f"Error in get_teams: {e}")
+        logger.error(f"Error in get_teams: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
-@app.route('/api/matches', methods=['GET'])
+@api.route('/api/matches', methods=['GET'])
 def get_matches():
     try:
         week = request.args.get('week', type=int)
+        fields, unknown = requested_fields(Match)
+        if unknown:
+            return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+        _, season = get_scope()
         
         if week:
-            matches = Match.query.filter_by(week=week).all()
+            query = Match.query.filter_by(season=season, week=week)
         else:
-            matches = Match.query.all()
+            query = Match.query.filter_by(season=season)
+        matches, page = paginate(query, Match.id)
             
+        return api_response({
+            'matches': [match.to_dict(fields) for match in matches],
+            **page
+        })
+    except Exception as e:
+        logger.error(f"Error in get_matches: {e}")
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
+
+@api.route('/api/weeks', methods=['GET'])
+def get_weeks():
+    """Week summaries of the season: game count, first kickoff and completion, in one GROUP BY"""
+    try:
+        _, season = get_scope()
+        completed = func.sum(case((Match.is_completed == True, 1), else_=0))
+        rows = db.session.query(Match.week, func.count(Match.id), func.min(Match.start_time), completed) \
+            .filter(Match.season == season).group_by(Match.week).order_by(Match.week).all()
+        
         return jsonify({
-            'matches': [match.to_dict() for match in matches]
+            'season': season,
+            'weeks': [{
+                'week': week,
+                'games': games,
+                'first_kickoff': first_kickoff.isoformat() if first_kickoff else None,
+                'completed_games': completed_games or 0,
+                'is_completed': (completed_games or 0) == games
+            } for week, games, first_kickoff, completed_games in rows]
         }), 200
     except Exception as e:
-        print(f"Error in get_matches: {e}")
+        logger.error(f"Error in get_weeks: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
-@app.route('/api/current-week', methods=['GET'])
+@api.route('/api/current-week', methods=['GET'])
 def get_current_week():
     try:
         # For simplicity, we'll return week 2 as the current week
@@ -339,30 +213,38 @@ def get_current_week():
             'current_week': 2
         }), 200
     except Exception as e:
-        print(f"Error in get_current_week: {e}")
+        logger.error(f"Error in get_current_week: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
-@app.route('/api/picks', methods=['GET', 'POST'])
+@api.route('/api/picks', methods=['GET', 'POST'])
 def handle_picks():
     try:
         if request.method == 'GET':
             # GET-Logik bleibt unverändert
             user_id = request.args.get('user_id', type=int)
             week = request.args.get('week', type=int)
+            fields, unknown = requested_fields(Pick)
             
             if not user_id:
                 return jsonify({'error': 'User ID required'}), 400
+            if unknown:
+                return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+            
+            user = db.session.get(User, user_id)
+            if not user:
+                return jsonify({'error': 'User not found'}), 404
+            _, season = get_scope()
                 
-            query = Pick.query.filter_by(user_id=user_id)
+            query = Pick.query.filter_by(league_id=user.league_id, season=season, user_id=user_id)
             
             if week:
-                picks = query.join(Match).filter(Match.week == week).all()
-            else:
-                picks = query.all()
+                query = query.join(Match).filter(Match.week == week)
+            picks, page = paginate(query, Pick.id)
                 
-            return jsonify({
-                'picks': [pick.to_dict() for pick in picks]
-            }), 200
+            return api_response({
+                'picks': [pick.to_dict(fields) for pick in picks],
+                **page
+            })
         
         elif request.method == 'POST':
             user_id = session.get('user_id')
@@ -377,6 +259,10 @@ def handle_picks():
                 return jsonify({'error': 'Match ID and chosen team ID required'}), 400
             
             # === BASIC VALIDATIONS ===
+            user = db.session.get(User, user_id)
+            if not user:
+                return jsonify({'error': 'User not found'}), 404
+            
             match = db.session.get(Match, match_id)
             if not match:
                 return jsonify({'error': 'Match not found'}), 404
@@ -400,10 +286,13 @@ def handle_picks():
             # === DETERMINE OPPOSING TEAM ===
             opposing_team_id = match.away_team_id if team.id == match.home_team_id else match.home_team_id
             
+            # Usage limits apply per league and season
+            scope = {'league_id': user.league_id, 'season': match.season, 'user_id': user_id}
+            
             # === ELIMINATION CHECKS ===
             # Check if chosen team is winner-eliminated
             winner_eliminated = EliminatedTeam.query.filter_by(
-                user_id=user_id, 
+                **scope, 
                 team_id=team.id, 
                 elimination_type='winner'
             ).first()
@@ -412,7 +301,7 @@ def handle_picks():
             
             # Check if opposing team is loser-eliminated
             loser_eliminated = EliminatedTeam.query.filter_by(
-                user_id=user_id, 
+                **scope, 
                 team_id=opposing_team_id, 
                 elimination_type='loser'
             ).first()
@@ -422,25 +311,27 @@ def handle_picks():
             
             # === USAGE LIMIT CHECKS ===
             # Check winner usage limit (max 2x)
-            winner_usage = TeamWinnerUsage.query.filter_by(user_id=user_id, team_id=team.id).first()
+            winner_usage = TeamWinnerUsage.query.filter_by(**scope, team_id=team.id).first()
             if winner_usage and winner_usage.usage_count >= 2:
                 return jsonify({'error': f'{team.name} has already been picked as winner 2 times this season'}), 400
             
             # Check loser usage limit (max 1x)
-            loser_usage = TeamLoserUsage.query.filter_by(user_id=user_id, team_id=opposing_team_id).first()
+            loser_usage = TeamLoserUsage.query.filter_by(**scope, team_id=opposing_team_id).first()
             if loser_usage:
                 opposing_team = db.session.get(Team, opposing_team_id)
                 return jsonify({'error': f'{opposing_team.name} has already been picked as loser this season'}), 400
             
             # === HANDLE PICK (CREATE OR UPDATE) ===
             existing_week_pick = Pick.query.join(Match).filter(
+                Pick.league_id == user.league_id,
+                Pick.season == match.season,
                 Pick.user_id == user_id,
                 Match.week == match.week
             ).first()
             
             if existing_week_pick:
                 # UPDATE EXISTING PICK (Pick-Wechsel)
-                result = update_existing_pick(user_id, existing_week_pick, match, team.id, opposing_team_id)
+                result = update_existing_pick(user, existing_week_pick, match, team.id, opposing_team_id)
                 if result.get('error'):
                     return jsonify(result), 400
                     
@@ -450,7 +341,7 @@ def handle_picks():
                 }), 200
             else:
                 # CREATE NEW PICK
-                result = create_new_pick(user_id, match, team.id, opposing_team_id)
+                result = create_new_pick(user, match, team.id, opposing_team_id)
                 if result.get('error'):
                     return jsonify(result), 400
                     
@@ -460,11 +351,11 @@ def handle_picks():
                 }), 201
                 
     except Exception as e:
-        print(f"Error in handle_picks: {e}")
+        logger.error(f"Error in handle_picks: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
 
-def update_existing_pick(user_id, existing_pick, new_match, new_team_id, new_opposing_team_id):
+def update_existing_pick(user, existing_pick, new_match, new_team_id, new_opposing_team_id):
     """
     Update existing pick - nur bei laufenden Spielen, nicht bei abgeschlossenen
     """
@@ -480,7 +371,7 @@ def update_existing_pick(user_id, existing_pick, new_match, new_team_id, new_opp
         # WICHTIG: Nur bei nicht-abgeschlossenen Spielen Usage zurücksetzen
         if not old_match.is_completed:
             # Entferne alte Usage-Einträge (nur bei laufenden Spielen)
-            remove_temporary_usage(user_id, old_team_id, old_opposing_team_id, old_match.id)
+            remove_temporary_usage(user, old_team_id, old_opposing_team_id, old_match)
         
         # Update Pick
         existing_pick.match_id = new_match.id
@@ -488,7 +379,7 @@ def update_existing_pick(user_id, existing_pick, new_match, new_team_id, new_opp
         
         # Füge neue Usage-Einträge hinzu (nur bei laufenden Spielen)
         if not new_match.is_completed:
-            add_temporary_usage(user_id, new_team_id, new_opposing_team_id, new_match)
+            add_temporary_usage(user, new_team_id, new_opposing_team_id, new_match)
         
         db.session.commit()
         return {'success': True}
@@ -498,14 +389,16 @@ def update_existing_pick(user_id, existing_pick, new_match, new_team_id, new_opp
         return {'error': f'Failed to update pick: {str(e)}'}
 
 
-def create_new_pick(user_id, match, team_id, opposing_team_id):
+def create_new_pick(user, match, team_id, opposing_team_id):
     """
     Create new pick
     """
     try:
         # Create pick
         new_pick = Pick(
-            user_id=user_id,
+            league_id=user.league_id,
+            season=match.season,
+            user_id=user.id,
             match_id=match.id,
             chosen_team_id=team_id
         )
@@ -513,7 +406,7 @@ def create_new_pick(user_id, match, team_id, opposing_team_id):
         
         # Add temporary usage (nur bei laufenden Spielen)
         if not match.is_completed:
-            add_temporary_usage(user_id, team_id, opposing_team_id, match)
+            add_temporary_usage(user, team_id, opposing_team_id, match)
         
         db.session.commit()
         return {'success': True, 'pick': new_pick}
@@ -523,21 +416,23 @@ def create_new_pick(user_id, match, team_id, opposing_team_id):
         return {'error': f'Failed to create pick: {str(e)}'}
 
 
-def add_temporary_usage(user_id, team_id, opposing_team_id, match):
+def add_temporary_usage(user, team_id, opposing_team_id, match):
     """
     Füge temporäre Usage-Einträge hinzu (werden bei Spielende finalisiert)
     """
+    scope = {'league_id': user.league_id, 'season': match.season, 'user_id': user.id}
+    
     # Winner usage
-    winner_usage = TeamWinnerUsage.query.filter_by(user_id=user_id, team_id=team_id).first()
+    winner_usage = TeamWinnerUsage.query.filter_by(**scope, team_id=team_id).first()
     if winner_usage:
         winner_usage.usage_count += 1
     else:
-        winner_usage = TeamWinnerUsage(user_id=user_id, team_id=team_id, usage_count=1)
+        winner_usage = TeamWinnerUsage(**scope, team_id=team_id, usage_count=1)
         db.session.add(winner_usage)
     
     # Loser usage
     loser_usage = TeamLoserUsage(
-        user_id=user_id,
+        **scope,
         team_id=opposing_team_id,
         week=match.week,
         match_id=match.id
@@ -545,12 +440,14 @@ def add_temporary_usage(user_id, team_id, opposing_team_id, match):
     db.session.add(loser_usage)
 
 
-def remove_temporary_usage(user_id, team_id, opposing_team_id, match_id):
+def remove_temporary_usage(user, team_id, opposing_team_id, match):
     """
     Entferne temporäre Usage-Einträge (bei Pick-Wechsel)
     """
+    scope = {'league_id': user.league_id, 'season': match.season, 'user_id': user.id}
+    
     # Remove winner usage
-    winner_usage = TeamWinnerUsage.query.filter_by(user_id=user_id, team_id=team_id).first()
+    winner_usage = TeamWinnerUsage.query.filter_by(**scope, team_id=team_id).first()
     if winner_usage:
         winner_usage.usage_count -= 1
         if winner_usage.usage_count <= 0:
@@ -558,15 +455,15 @@ def remove_temporary_usage(user_id, team_id, opposing_team_id, match_id):
     
     # Remove loser usage
     loser_usage = TeamLoserUsage.query.filter_by(
-        user_id=user_id, 
+        **scope, 
         team_id=opposing_team_id, 
-        match_id=match_id
+        match_id=match.id
     ).first()
     if loser_usage:
         db.session.delete(loser_usage)
 
 
-@app.route('/api/picks/score', methods=['GET'])
+@api.route('/api/picks/score', methods=['GET'])
 def get_user_scores():
     try:
         user_id = request.args.get('user_id', type=int)
@@ -579,29 +476,32 @@ def get_user_scores():
         if not user:
             return jsonify({'error': 'User not found'}), 404
             
-        # Get all other users
-        other_users = User.query.filter(User.id != user_id).all()
+        # Scores of all users of the league come from the precomputed season analytics
+        _, season = get_scope()
+        analytics = get_season_analytics(database_path(), league_id=user.league_id, season=season)
+        leaderboard = {entry['id']: entry for entry in analytics.leaderboard()}
         
         return jsonify({
             'user': {
                 'id': user.id,
                 'username': user.username,
-                'score': user.get_score()
+                'score': leaderboard[user.id]['score'] if user.id in leaderboard else user.get_score(season)
             },
             'opponents': [
                 {
-                    'id': other_user.id,
-                    'username': other_user.username,
-                    'score': other_user.get_score()
+                    'id': entry['id'],
+                    'username': entry['username'],
+                    'score': entry['score']
                 }
-                for other_user in other_users
+                for entry in sorted(leaderboard.values(), key=lambda x: x['id'])
+                if entry['id'] != user_id
             ]
         }), 200
     except Exception as e:
-        print(f"Error in get_user_scores: {e}")
+        logger.error(f"Error in get_user_scores: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
-@app.route('/api/picks/recent', methods=['GET'])
+@api.route('/api/picks/recent', methods=['GET'])
 def get_recent_picks():
     try:
         user_id = request.args.get('user_id', type=int)
@@ -619,10 +519,13 @@ def get_recent_picks():
         
         # Get current week
         current_week = 2  # Hardcoded for simplicity
+        _, season = get_scope()
         
         # Get picks for current week and previous week
         for week in range(current_week, 0, -1):
             picks = Pick.query.join(Match).filter(
+                Pick.league_id == user.league_id,
+                Pick.season == season,
                 Pick.user_id == user_id,
                 Match.week == week
             ).all()
@@ -640,7 +543,7 @@ def get_recent_picks():
                 recent_picks.append({
                     'week': match.week,
                     'team': team.name,
-                    'team_logo': team.logo_url,
+                    'team_logo': asset_url(team.logo_url),
                     'is_completed': match.is_completed,
                     'is_correct': is_correct
                 })
@@ -649,10 +552,10 @@ def get_recent_picks():
             'picks': recent_picks
         }), 200
     except Exception as e:
-        print(f"Error in get_recent_picks: {e}")
+        logger.error(f"Error in get_recent_picks: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
-@app.route('/api/picks/eliminated', methods=['GET'])
+@api.route('/api/picks/eliminated', methods=['GET'])
 def get_eliminated_teams():
     try:
         user_id = request.args.get('user_id', type=int)
@@ -666,7 +569,9 @@ def get_eliminated_teams():
             return jsonify({'error': 'User not found'}), 404
             
         # Get eliminated teams
-        eliminated_teams = EliminatedTeam.query.filter_by(user_id=user_id).all()
+        _, season = get_scope()
+        eliminated_teams = EliminatedTeam.query.filter_by(league_id=user.league_id, season=season,
+                                                          user_id=user_id).all()
         
         eliminated_list = []
         for elim_team in eliminated_teams:
@@ -676,7 +581,7 @@ def get_eliminated_teams():
                     'id': team.id,
                     'name': team.name,
                     'abbreviation': team.abbreviation,
-                    'logo_url': team.logo_url,
+                    'logo_url': asset_url(team.logo_url),
                     'elimination_type': elim_team.elimination_type
                 })
         
@@ -684,10 +589,10 @@ def get_eliminated_teams():
             'eliminated_teams': eliminated_list
         }), 200
     except Exception as e:
-        print(f"Error in get_eliminated_teams: {e}")
+        logger.error(f"Error in get_eliminated_teams: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
-@app.route('/api/picks/team-usage', methods=['GET'])
+@api.route('/api/picks/team-usage', methods=['GET'])
 def get_team_winner_usage():
     try:
         user_id = request.args.get('user_id', type=int)
@@ -701,7 +606,9 @@ def get_team_winner_usage():
             return jsonify({'error': 'User not found'}), 404
             
         # Get team winner usage
-        team_usage = TeamWinnerUsage.query.filter_by(user_id=user_id).all()
+        _, season = get_scope()
+        team_usage = TeamWinnerUsage.query.filter_by(league_id=user.league_id, season=season,
+                                                     user_id=user_id).all()
         
         # Create a dictionary for easy lookup
         usage_dict = {}
@@ -731,10 +638,10 @@ def get_team_winner_usage():
             'team_usage': team_status
         }), 200
     except Exception as e:
-        print(f"Error in get_team_winner_usage: {e}")
+        logger.error(f"Error in get_team_winner_usage: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
-@app.route('/api/picks/loser-usage', methods=['GET'])
+@api.route('/api/picks/loser-usage', methods=['GET'])
 def get_team_loser_usage():
     """Get teams that have been used as losers by a user"""
     try:
@@ -749,7 +656,9 @@ def get_team_loser_usage():
             return jsonify({'error': 'User not found'}), 404
             
         # Get teams used as losers
-        loser_usage = TeamLoserUsage.query.filter_by(user_id=user_id).all()
+        _, season = get_scope()
+        loser_usage = TeamLoserUsage.query.filter_by(league_id=user.league_id, season=season,
+                                                     user_id=user_id).all()
         
         loser_teams = []
         for usage in loser_usage:
@@ -759,25 +668,19 @@ def get_team_loser_usage():
             'loser_teams': loser_teams
         }), 200
     except Exception as e:
-        print(f"Error in get_team_loser_usage: {e}")
+        logger.error(f"Error in get_team_loser_usage: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
-@app.route('/api/leaderboard', methods=['GET'])
+@api.route('/api/leaderboard', methods=['GET'])
 def get_leaderboard():
     try:
-        users = User.query.all()
-        
-        # Calculate scores and sort by score (descending)
-        leaderboard = []
-        for user in users:
-            score = user.get_score()
-            leaderboard.append({
-                'id': user.id,
-                'username': user.username,
-                'score': score
-            })
-            
-        leaderboard.sort(key=lambda x: x['score'], reverse=True)
+        # Scores of the league sorted descending, computed once per data version
+        league_id, season = get_scope()
+        leaderboard = [
+            {'id': entry['id'], 'username': entry['username'], 'score': entry['score']}
+            for entry in get_season_analytics(database_path(), league_id=league_id,
+                                              season=season).leaderboard()
+        ]
         
         # Add emojis for first and last place (if not tied)
         if len(leaderboard) > 1:
@@ -793,43 +696,29 @@ def get_leaderboard():
             'leaderboard': leaderboard
         }), 200
     except Exception as e:
-        print(f"Error in get_leaderboard: {e}")
+        logger.error(f"Error in get_leaderboard: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
 # Get user rank
-@app.route('/api/user/rank', methods=['GET'])
+@api.route('/api/user/rank', methods=['GET'])
 def get_user_rank():
     try:
         user_id = request.args.get('user_id')
         
         if not user_id:
             return jsonify({'error': 'User ID is required'}), 400
-            
-        # Get all users and calculate scores
-        users = User.query.all()
         
-        # Calculate scores and sort by score (descending)
-        leaderboard = []
-        for user in users:
-            score = user.get_score()
-            leaderboard.append({
-                'id': user.id,
-                'username': user.username,
-                'score': score
-            })
+        user = db.session.get(User, int(user_id))
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
             
-        leaderboard.sort(key=lambda x: x['score'], reverse=True)
-        
-        # Find the user's rank (handle ties correctly)
+        # Ranks within the user's league are precomputed with ties sharing a rank (1, 1, 3)
+        _, season = get_scope()
         user_rank = None
-        current_rank = 1
-        for i, user in enumerate(leaderboard):
-            # If this user has a lower score than the previous user, update rank
-            if i > 0 and leaderboard[i]['score'] < leaderboard[i-1]['score']:
-                current_rank = i + 1
-            
-            if user['id'] == int(user_id):
-                user_rank = current_rank
+        analytics = get_season_analytics(database_path(), league_id=user.league_id, season=season)
+        for entry in analytics.leaderboard():
+            if entry['id'] == int(user_id):
+                user_rank = entry['rank']
                 break
                 
         if user_rank is None:
@@ -839,11 +728,11 @@ def get_user_rank():
             'rank': user_rank
         }), 200
     except Exception as e:
-        print(f"Error in get_user_rank: {e}")
+        logger.error(f"Error in get_user_rank: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
 # Scheduler API endpoints
-@app.route('/api/scheduler/status', methods=['GET'])
+@api.route('/api/scheduler/status', methods=['GET'])
 def get_scheduler_status():
     """Get current scheduler status"""
     try:
@@ -851,21 +740,45 @@ def get_scheduler_status():
         current_week = 2  # This could be dynamic
         
         # Get completed matches count
-        completed_matches = Match.query.filter_by(status='completed').count()
-        total_matches = Match.query.count()
+        _, season = get_scope()
+        completed_matches = Match.query.filter_by(season=season, status='completed').count()
+        total_matches = Match.query.filter_by(season=season).count()
+        
+        # The validator runs in its own process; the leader lock tells whether one is polling
+        leader = get_validator_leader(database_path())
+        runs = ValidatorRunStore(database_path()).summary()
         
         return jsonify({
-            'status': 'running',
+            'status': 'running' if leader is not None else 'stopped',
+            'validator': leader,
+            'last_run': runs['last_run'],
+            'last_success': runs['last_success'],
+            'avg_run_duration_ms': runs['avg_duration_ms'],
             'current_week': current_week,
+            'season': season,
             'completed_matches': completed_matches,
             'total_matches': total_matches,
             'last_update': datetime.utcnow().isoformat()
         }), 200
     except Exception as e:
-        print(f"Error in get_scheduler_status: {e}")
+        logger.error(f"Error in get_scheduler_status: {e}")
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
+
+@api.route('/api/scheduler/runs', methods=['GET'])
+def get_scheduler_runs():
+    """Recent validator runs with phase timings, counts and errors (newest first)"""
+    try:
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        kind = request.args.get('kind')  # 'week' or 'catch_up'
+        
+        return jsonify({
+            'runs': ValidatorRunStore(database_path()).recent(limit, kind)
+        }), 200
+    except Exception as e:
+        logger.error(f"Error in get_scheduler_runs: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
-@app.route('/api/scheduler/manual-update', methods=['POST'])
+@api.route('/api/scheduler/manual-update', methods=['POST'])
 def manual_update():
     """Manually trigger an update for a specific week"""
     try:
@@ -892,54 +805,100 @@ def manual_update():
             }), 400
             
     except Exception as e:
-        print(f"Error in manual_update: {e}")
+        logger.error(f"Error in manual_update: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
-@app.route('/api/matches/results', methods=['GET'])
+@api.route('/api/matches/results', methods=['GET'])
 def get_match_results():
     """Get match results with scores"""
     try:
         week = request.args.get('week', type=int)
+        _, season = get_scope()
         
-        query = Match.query
+        query = Match.query.filter_by(season=season)
         if week:
             query = query.filter_by(week=week)
         
         matches = query.filter_by(status='completed').all()
         
-        return jsonify({
+        return api_response({
             'matches': [match.to_dict() for match in matches]
-        }), 200
+        })
     except Exception as e:
-        print(f"Error in get_match_results: {e}")
+        logger.error(f"Error in get_match_results: {e}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
 # Serve static files
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
+@api.route('/', defaults={'path': ''})
+@api.route('/<path:path>')
 def serve_static(path):
     if path == '' or path == 'index.html':
-        return send_from_directory('static', 'index.html')
+        return send_index()
     return send_from_directory('static', path)
 
-# Initialize database
-with app.app_context():
-    db.create_all()
+# Journal committed changes for point-in-time recovery
+def _mark_journal_pending(session, flush_context):
+    session.info['journal_pending'] = True
 
-# Register Database Sync API
-from database_sync_api import register_database_sync_api
-register_database_sync_api(app)
-logger.info("Database Sync API registered successfully")
-
-# Start validation service
-try:
-    from game_validator import start_validation_service_thread
-    validation_thread = start_validation_service_thread()
-    logger.info("NFL Game Validation Service started successfully")
-except ImportError as e:
-    logger.warning(f"Could not start validation service: {e}")
-except Exception as e:
-    logger.error(f"Error starting validation service: {e}")
+def _journal_committed_changes(session):
+    if not session.info.pop('journal_pending', False):
+        return
+    journal = current_app.extensions.get('mutation_journal') if has_app_context() else None
+    if journal is None:
+        return
+    try:
+        journal.capture()
+    except Exception as e:
+        logger.error(f"Journal capture failed: {e}")
+
+def install_mutation_journal(app, db_path):
+    """Capture every committed ORM change of this app in the mutation journal"""
+    app.extensions['mutation_journal'] = MutationJournal(db_path)
+    # The listeners are global; they look up the journal of the app that is committing
+    if not event.contains(Session, 'after_commit', _journal_committed_changes):
+        event.listen(Session, 'after_flush', _mark_journal_pending)
+        event.listen(Session, 'after_commit', _journal_committed_changes)
+
+def create_app(config=None):
+    """Create and configure the Flask app; config (dict) overrides DEFAULT_CONFIG"""
+    logging.basicConfig(level=logging.INFO)
+
+    app = Flask(__name__, static_folder='static')
+    app.config.update(DEFAULT_CONFIG)
+    app.config['SQLALCHEMY_DATABASE_URI'] = get_database_url()
+    if config:
+        app.config.update(config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', get_engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+
+    # Enable CORS
+    CORS(app, supports_credentials=True)
+
+    db.init_app(app)
+    app.register_blueprint(api)
+
+    # Initialize database
+    with app.app_context():
+        # Shared first, so every connection (also those of the migration) gets the SQLite PRAGMAs
+        use_engine(db.engine)
+        # Databases from before leagues and seasons get the scope columns (no-op afterwards)
+        prepare_database(db.engine)
+        db_path = app.config['DATABASE_PATH'] = get_sqlite_path(db.engine)
+        register_request_metrics(app, db.engine, db.Model)
+
+    register_database_sync_api(app)
+    register_stats_api(app, db_path)
+    register_api_encoding(app)
+    register_static_assets(app)
+    if db_path:
+        install_mutation_journal(app, db_path)
+    logger.info("NFL PickEm app created")
+    return app
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app = create_app()
+    # Standalone run: validator in a background thread. WSGI workers and scripts
+    # never start one, and the leader lock keeps it to a single polling instance.
+    from game_validator import start_validation_service_thread
+    with app.app_context():
+        start_validation_service_thread(app.config['DATABASE_PATH'])
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)), debug=True)
@@ -3,15 +3,27 @@ NFL PickEm App Launcher
 
 This script launches the NFL PickEm app with database backup and restoration.
 It ensures data persistence even when the server restarts.
+
+Serving modes (argument or SERVER_MODE environment variable):
+    dev         single-process Flask development server (app.py)
+    production  gunicorn with several workers, configured in gunicorn.conf.py
+                (WEB_WORKERS, WEB_THREADS, WEB_BIND), plus one validator_worker.py
+                process for the game validator
+
+Usage:
+    python app_launcher.py [dev|production]
 """
 
 import os
 import sys
 import time
+import shutil
 import threading
 import subprocess
 import logging
 
+from static_assets import build_static, STATIC_DIR, DIST_DIRNAME
+
 # Configure logging with deployment compatibility - console only
 logging.basicConfig(
     level=logging.INFO,
@@ -21,7 +33,7 @@ logging.basicConfig(
 
 # Import db_backup functions
 try:
-    from db_backup import restore_from_backup, create_backup, check_db_exists, run_backup_service
+    from db_backup import restore_from_backup, create_backup, backup_if_changed, check_db_exists, run_backup_service
     logging.info("Successfully imported db_backup functions")
 except ImportError as e:
     logging.error(f"Error importing from db_backup: {str(e)}")
@@ -41,11 +53,11 @@ except ImportError as e:
             
             db_path = 'instance/nfl_pickem.db'
             if os.path.exists(db_path):
-                import shutil
                 from datetime import datetime
+                from db_snapshot import create_snapshot
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 backup_path = os.path.join('db_backups', f'nfl_pickem_{timestamp}.db')
-                shutil.copy2(db_path, backup_path)
+                create_snapshot(db_path, backup_path)
                 logging.info(f"Created backup at {backup_path}")
                 return True
             return False
@@ -53,6 +65,10 @@ except ImportError as e:
             logging.error(f"Backup failed: {str(e)}")
             return False
     
+    def backup_if_changed(reason='startup'):
+        """Create a backup of the database (no change tracking in fallback mode)."""
+        return create_backup()
+    
     def restore_from_backup():
         """Restore the database from backup."""
         logging.info("Using fallback restore_from_backup function")
@@ -69,18 +85,15 @@ except ImportError as e:
             # Sort by creation time (newest first)
             backups.sort(key=lambda x: os.path.getctime(os.path.join('db_backups', x)), reverse=True)
             
-            # Get the newest backup
-            latest_backup = os.path.join('db_backups', backups[0])
-            
-            # Ensure instance directory exists
-            if not os.path.exists('instance'):
-                os.makedirs('instance')
-            
-            # Copy the backup to the database location
-            import shutil
-            shutil.copy2(latest_backup, 'instance/nfl_pickem.db')
-            logging.info(f"Restored from backup: {latest_backup}")
-            return True
+            # Restore the newest backup that passes the integrity check
+            from db_snapshot import restore_snapshot
+            for backup in backups:
+                backup_path = os.path.join('db_backups', backup)
+                if restore_snapshot(backup_path, 'instance/nfl_pickem.db'):
+                    logging.info(f"Restored from backup: {backup_path}")
+                    return True
+                logging.warning(f"Skipping damaged backup: {backup_path}")
+            return False
         except Exception as e:
             logging.error(f"Restore failed: {str(e)}")
             return False
@@ -112,6 +125,24 @@ def start_flask_app():
     except Exception as e:
         logging.error(f"Error starting Flask app: {str(e)}")
 
+def start_validator_worker():
+    """Start the game validator as its own process (never inside the web workers)."""
+    try:
+        return subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                              'validator_worker.py'), 'run'])
+    except Exception as e:
+        logging.error(f"Error starting validator worker: {str(e)}")
+        return None
+
+def start_production_server():
+    """Start the app under gunicorn with the settings from gunicorn.conf.py."""
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    config_path = os.path.join(app_dir, 'gunicorn.conf.py')
+    try:
+        subprocess.run([sys.executable, '-m', 'gunicorn', '--chdir', app_dir, '-c', config_path, 'app:create_app()'])
+    except Exception as e:
+        logging.error(f"Error starting production server: {str(e)}")
+
 def main():
     """Main function to launch the app with database handling."""
     logging.info("Starting NFL PickEm App Launcher")
@@ -124,15 +155,37 @@ def main():
         if not restore_success:
             logging.info("No backup found or restore failed, will create new database")
     else:
-        # Create a backup of the existing database before starting
-        create_backup()
+        # Back up the existing database before starting (skipped if the last backup is current)
+        backup_if_changed(reason='startup')
     
     # Start the backup service
     start_backup_service()
     
-    # Start the Flask app
-    logging.info("Starting Flask application")
-    start_flask_app()
+    mode = (sys.argv[1] if len(sys.argv) > 1 else os.environ.get('SERVER_MODE', 'dev')).lower()
+    
+    if mode == 'production':
+        # Fingerprinted, precompressed static files; workers read the manifest once at startup
+        try:
+            build_static()
+        except Exception as e:
+            logging.error(f"Error building static assets, serving static/ unbuilt: {str(e)}")
+            shutil.rmtree(os.path.join(STATIC_DIR, DIST_DIRNAME), ignore_errors=True)
+        # Workers only serve requests; one validator process polls next to them
+        validator_process = start_validator_worker()
+        logging.info(f"Starting production server ({os.environ.get('WEB_WORKERS', 'auto')} workers, "
+                     f"{os.environ.get('WEB_THREADS', 4)} threads each)")
+        try:
+            start_production_server()
+        finally:
+            if validator_process is not None:
+                validator_process.terminate()
+    elif mode == 'dev':
+        # Start the Flask app
+        logging.info("Starting Flask application")
+        start_flask_app()
+    else:
+        logging.error(f"Unknown server mode: {mode} (use dev or production)")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
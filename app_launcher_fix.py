@@ -21,7 +21,7 @@ logging.basicConfig(
 
 # Import db_backup functions
 try:
-    from db_backup import restore_from_backup, create_backup, check_db_exists, run_backup_service
+    from db_backup import restore_from_backup, create_backup, backup_if_changed, check_db_exists, run_backup_service
     logging.info("Successfully imported db_backup functions")
 except ImportError as e:
     logging.error(f"Error importing from db_backup: {str(e)}")
@@ -41,11 +41,11 @@ except ImportError as e:
             
             db_path = 'instance/nfl_pickem.db'
             if os.path.exists(db_path):
-                import shutil
                 from datetime import datetime
+                from db_snapshot import create_snapshot
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 backup_path = os.path.join('db_backups', f'nfl_pickem_{timestamp}.db')
-                shutil.copy2(db_path, backup_path)
+                create_snapshot(db_path, backup_path)
                 logging.info(f"Created backup at {backup_path}")
                 return True
             return False
@@ -53,6 +53,10 @@ except ImportError as e:
             logging.error(f"Backup failed: {str(e)}")
             return False
     
+    def backup_if_changed(reason='startup'):
+        """Create a backup of the database (no change tracking in fallback mode)."""
+        return create_backup()
+    
     def restore_from_backup():
         """Restore the database from backup."""
         logging.info("Using fallback restore_from_backup function")
@@ -69,18 +73,15 @@ except ImportError as e:
             # Sort by creation time (newest first)
             backups.sort(key=lambda x: os.path.getctime(os.path.join('db_backups', x)), reverse=True)
             
-            # Get the newest backup
-            latest_backup = os.path.join('db_backups', backups[0])
-            
-            # Ensure instance directory exists
-            if not os.path.exists('instance'):
-                os.makedirs('instance')
-            
-            # Copy the backup to the database location
-            import shutil
-            shutil.copy2(latest_backup, 'instance/nfl_pickem.db')
-            logging.info(f"Restored from backup: {latest_backup}")
-            return True
+            # Restore the newest backup that passes the integrity check
+            from db_snapshot import restore_snapshot
+            for backup in backups:
+                backup_path = os.path.join('db_backups', backup)
+                if restore_snapshot(backup_path, 'instance/nfl_pickem.db'):
+                    logging.info(f"Restored from backup: {backup_path}")
+                    return True
+                logging.warning(f"Skipping damaged backup: {backup_path}")
+            return False
         except Exception as e:
             logging.error(f"Restore failed: {str(e)}")
             return False
@@ -124,8 +125,8 @@ def main():
         if not restore_success:
             logging.info("No backup found or restore failed, will create new database")
     else:
-        # Create a backup of the existing database before starting
-        create_backup()
+        # Back up the existing database before starting (skipped if the last backup is current)
+        backup_if_changed(reason='startup')
     
     # Start the backup service
     start_backup_service()
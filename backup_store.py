@@ -0,0 +1,377 @@
+"""
+Backup Store for NFL PickEm App
+
+Content-addressed, compressed and deduplicated storage for database
+snapshots. Each snapshot is split into page-aligned chunks; every chunk is
+stored once under its SHA-256 hash (compressed with zlib or lzma) and a small
+JSON manifest lists the chunks of each snapshot. Consecutive snapshots share
+almost all of their chunks, so a full season of restore points costs little
+more than one copy of the database.
+
+Retention is tiered: every snapshot of the last hours, the newest snapshot per
+day for the last weeks, and the newest snapshot per season week for good.
+
+Usage:
+    python backup_store.py list
+    python backup_store.py snapshot [db_path]
+    python backup_store.py restore <snapshot_id|latest> [target_path]
+    python backup_store.py restore-at <YYYY-MM-DDTHH:MM[:SS]> [target_path]
+    python backup_store.py prune
+"""
+
+import os
+import sys
+import json
+import lzma
+import zlib
+import sqlite3
+import hashlib
+import logging
+import tempfile
+from datetime import datetime, timedelta
+
+from change_log import get_latest_seq
+from database import get_connection, get_database_path
+from db_snapshot import create_snapshot, verify_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Constants
+STORE_DIR = os.path.join('db_backups', 'store')
+CHUNK_PAGES = 16  # Pages per chunk (64 KB with the default 4 KB page size)
+DEFAULT_PAGE_SIZE = 4096
+COMPRESSION = 'zlib'  # 'zlib' or 'lzma'
+
+# Retention tiers
+KEEP_ALL_HOURS = 6  # Keep every snapshot this recent
+HOURLY_RETENTION_HOURS = 48  # Then the newest snapshot per hour
+DAILY_RETENTION_DAYS = 30  # Then the newest snapshot per day
+SEASON_START = datetime(2025, 9, 4)  # Then the newest snapshot per season week, forever
+GC_GRACE_SECONDS = 3600  # Never delete chunks touched this recently (a snapshot may be in progress)
+
+CODECS = {
+    'zlib': ('z', lambda data: zlib.compress(data, 9), zlib.decompress),
+    'lzma': ('xz', lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+
+def read_page_size(db_path):
+    """Read the page size from a SQLite database header"""
+    with open(db_path, 'rb') as f:
+        header = f.read(100)
+    if len(header) < 18 or not header.startswith(b'SQLite format 3\x00'):
+        return DEFAULT_PAGE_SIZE
+    page_size = int.from_bytes(header[16:18], 'big')
+    return 65536 if page_size == 1 else page_size
+
+def read_data_version(db_path):
+    """Read the change-log sequence the live database reflects (0 without a change log)"""
+    return get_latest_seq(get_connection(db_path))
+
+def read_file_data_version(file_path):
+    """read_data_version() of a snapshot file, without keeping a connection to it"""
+    conn = sqlite3.connect(f"file:{file_path}?mode=ro", uri=True)
+    try:
+        return get_latest_seq(conn)
+    finally:
+        conn.close()
+
+def season_week(moment):
+    """Bucket a timestamp into its season week (ISO week outside the season)"""
+    if moment >= SEASON_START:
+        week = (moment - SEASON_START).days // 7 + 1
+        if week <= 22:  # Regular season plus playoffs
+            return f"season-{SEASON_START.year}-w{week:02d}"
+    iso_year, iso_week, _ = moment.isocalendar()
+    return f"iso-{iso_year}-w{iso_week:02d}"
+
+class BackupStore:
+    """Deduplicated snapshot store rooted at a directory"""
+
+    def __init__(self, root=STORE_DIR, chunk_pages=CHUNK_PAGES, compression=COMPRESSION):
+        if compression not in CODECS:
+            raise ValueError(f"Unknown compression: {compression}")
+
+        self.root = root
+        self.chunk_pages = chunk_pages
+        self.compression = compression
+        self.chunks_dir = os.path.join(root, 'chunks')
+        self.manifests_dir = os.path.join(root, 'snapshots')
+        os.makedirs(self.chunks_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+
+    # Chunks
+
+    def _chunk_path(self, digest, extension):
+        return os.path.join(self.chunks_dir, digest[:2], f"{digest}.{extension}")
+
+    def _find_chunk(self, digest):
+        for extension, _, decompress in CODECS.values():
+            path = self._chunk_path(digest, extension)
+            if os.path.exists(path):
+                return path, decompress
+        return None, None
+
+    def _put_chunk(self, data):
+        """Store a chunk if it is new; returns (digest, bytes written)"""
+        digest = hashlib.sha256(data).hexdigest()
+        existing_path = self._find_chunk(digest)[0]
+        if existing_path:
+            os.utime(existing_path)  # Mark as in use so a concurrent prune keeps it
+            return digest, 0
+
+        extension, compress, _ = CODECS[self.compression]
+        path = self._chunk_path(digest, extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        payload = compress(data)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(temp_path, path)
+        return digest, len(payload)
+
+    def _get_chunk(self, digest):
+        path, decompress = self._find_chunk(digest)
+        if not path:
+            raise FileNotFoundError(f"Missing chunk {digest}")
+        with open(path, 'rb') as f:
+            data = decompress(f.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Chunk {digest} is corrupt")
+        return data
+
+    # Snapshots
+
+    def add_snapshot(self, db_path, reason='scheduled', data_version=None):
+        """Take an online snapshot of db_path and add it to the store; returns its manifest"""
+        created_at = datetime.now()
+        snapshot_id = created_at.strftime('%Y%m%d_%H%M%S_%f')
+
+        fd, temp_path = tempfile.mkstemp(suffix='.db', dir=self.root)
+        os.close(fd)
+        try:
+            create_snapshot(db_path, temp_path)
+            if data_version is None:
+                data_version = read_file_data_version(temp_path)
+            return self.add_file(temp_path, snapshot_id, created_at, reason, data_version,
+                                 source=os.path.abspath(db_path))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def add_file(self, file_path, snapshot_id, created_at, reason='scheduled', data_version=None, source=None):
+        """Chunk an already consistent database file into the store"""
+        page_size = read_page_size(file_path)
+        chunk_size = page_size * self.chunk_pages
+
+        chunks = []
+        new_bytes = 0
+        whole_file = hashlib.sha256()
+        size = 0
+        with open(file_path, 'rb') as f:
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                whole_file.update(data)
+                size += len(data)
+                digest, written = self._put_chunk(data)
+                chunks.append(digest)
+                new_bytes += written
+
+        manifest = {
+            'id': snapshot_id,
+            'created_at': created_at.isoformat(),
+            'reason': reason,
+            'source': source,
+            'data_version': data_version,
+            'season_week': season_week(created_at),
+            'page_size': page_size,
+            'chunk_size': chunk_size,
+            'size': size,
+            'sha256': whole_file.hexdigest(),
+            'chunks': chunks,
+            'stored_bytes': new_bytes,
+        }
+
+        manifest_path = os.path.join(self.manifests_dir, f"{snapshot_id}.json")
+        with open(f"{manifest_path}.tmp", 'w') as f:
+            json.dump(manifest, f)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+
+        logger.info(f"Stored snapshot {snapshot_id} ({size} bytes, {new_bytes} new compressed bytes)")
+        return manifest
+
+    def list_snapshots(self):
+        """Return all manifests, oldest first"""
+        manifests = []
+        for name in os.listdir(self.manifests_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.manifests_dir, name)) as f:
+                    manifests.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable manifest {name}: {e}")
+        manifests.sort(key=lambda m: m['created_at'])
+        return manifests
+
+    def find_snapshot(self, snapshot_id=None, at=None, source=None):
+        """Find a snapshot by id ('latest' for the newest) or the newest one taken at or before `at`"""
+        manifests = self.list_snapshots()
+        if source is not None:
+            source = os.path.abspath(source)
+            manifests = [m for m in manifests if m.get('source') in (source, None)]
+        if at is not None:
+            candidates = [m for m in manifests if datetime.fromisoformat(m['created_at']) <= at]
+            return candidates[-1] if candidates else None
+        if snapshot_id in (None, 'latest'):
+            return manifests[-1] if manifests else None
+        for manifest in manifests:
+            if manifest['id'] == snapshot_id:
+                return manifest
+        return None
+
+    def materialize(self, manifest, target_path):
+        """Rebuild a snapshot's database file at target_path and verify it"""
+        target_dir = os.path.dirname(target_path)
+        if target_dir:
+            os.makedirs(target_dir, exist_ok=True)
+
+        whole_file = hashlib.sha256()
+        temp_path = f"{target_path}.partial"
+        with open(temp_path, 'wb') as f:
+            for digest in manifest['chunks']:
+                data = self._get_chunk(digest)
+                whole_file.update(data)
+                f.write(data)
+
+        if whole_file.hexdigest() != manifest['sha256']:
+            os.remove(temp_path)
+            raise ValueError(f"Snapshot {manifest['id']} does not match its checksum")
+
+        os.replace(temp_path, target_path)
+        if not verify_snapshot(target_path):
+            raise ValueError(f"Snapshot {manifest['id']} failed the integrity check")
+        return target_path
+
+    # Retention
+
+    def select_retained(self, manifests, now=None):
+        """Apply the retention tiers; returns the set of snapshot ids to keep"""
+        now = now or datetime.now()
+        keep = set()
+        newest_per_bucket = {}
+
+        for manifest in manifests:
+            created_at = datetime.fromisoformat(manifest['created_at'])
+            age = now - created_at
+
+            if age <= timedelta(hours=KEEP_ALL_HOURS):
+                keep.add(manifest['id'])
+                continue
+            if age <= timedelta(hours=HOURLY_RETENTION_HOURS):
+                bucket = ('hour', created_at.strftime('%Y%m%d%H'))
+            elif age <= timedelta(days=DAILY_RETENTION_DAYS):
+                bucket = ('day', created_at.strftime('%Y%m%d'))
+            else:
+                bucket = ('week', manifest.get('season_week') or season_week(created_at))
+
+            # Manifests are sorted oldest first, so the last one per bucket wins
+            newest_per_bucket[bucket] = manifest['id']
+
+        keep.update(newest_per_bucket.values())
+        if manifests:
+            keep.add(manifests[-1]['id'])
+        return keep
+
+    def prune(self, now=None):
+        """Drop snapshots outside the retention tiers and delete unreferenced chunks"""
+        manifests = self.list_snapshots()
+        keep = self.select_retained(manifests, now)
+
+        removed = []
+        for manifest in manifests:
+            if manifest['id'] not in keep:
+                os.remove(os.path.join(self.manifests_dir, f"{manifest['id']}.json"))
+                removed.append(manifest['id'])
+
+        if removed:
+            self.collect_garbage()
+            logger.info(f"Pruned {len(removed)} snapshots")
+        return removed
+
+    def collect_garbage(self):
+        """Delete chunks that no manifest references; returns the number removed"""
+        referenced = set()
+        for manifest in self.list_snapshots():
+            referenced.update(manifest['chunks'])
+
+        removed = 0
+        cutoff = datetime.now().timestamp() - GC_GRACE_SECONDS
+        for prefix in os.listdir(self.chunks_dir):
+            prefix_dir = os.path.join(self.chunks_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                chunk_path = os.path.join(prefix_dir, name)
+                if name.split('.')[0] not in referenced and os.path.getmtime(chunk_path) < cutoff:
+                    os.remove(chunk_path)
+                    removed += 1
+        return removed
+
+    def disk_usage(self):
+        """Total bytes used by chunks and manifests"""
+        total = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                total += os.path.getsize(os.path.join(directory, name))
+        return total
+
+def main():
+    """Main function for command-line usage"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if len(sys.argv) < 2:
+        print(__doc__.split('Usage:')[1])
+        return 1
+
+    store = BackupStore()
+    command = sys.argv[1].lower()
+
+    if command == 'list':
+        manifests = store.list_snapshots()
+        for manifest in manifests:
+            print(f"{manifest['id']}  {manifest['created_at']}  {manifest['season_week']:<20} "
+                  f"v{manifest.get('data_version')}  {manifest['size'] / 1024:.0f} KB  {manifest['reason']}")
+        logical = sum(m['size'] for m in manifests)
+        print(f"\n{len(manifests)} snapshots, {logical / 1024:.0f} KB logical, "
+              f"{store.disk_usage() / 1024:.0f} KB on disk")
+    elif command == 'snapshot':
+        db_path = sys.argv[2] if len(sys.argv) > 2 else get_database_path()
+        manifest = store.add_snapshot(db_path, reason='manual')
+        print(f"Stored snapshot {manifest['id']}")
+    elif command in ('restore', 'restore-at'):
+        if len(sys.argv) < 3:
+            print(f"Usage: python backup_store.py {command} <{'snapshot_id|latest' if command == 'restore' else 'timestamp'}> [target_path]")
+            return 1
+        if command == 'restore':
+            manifest = store.find_snapshot(snapshot_id=sys.argv[2])
+        else:
+            manifest = store.find_snapshot(at=datetime.fromisoformat(sys.argv[2]))
+        if not manifest:
+            print("No matching snapshot found")
+            return 1
+        target_path = sys.argv[3] if len(sys.argv) > 3 else f"nfl_pickem_restored_{manifest['id']}.db"
+        store.materialize(manifest, target_path)
+        print(f"Snapshot {manifest['id']} ({manifest['created_at']}) restored to {target_path}")
+    elif command == 'prune':
+        removed = store.prune()
+        print(f"Removed {len(removed)} snapshots")
+    else:
+        print("Unknown command. Use: list, snapshot, restore, restore-at, or prune")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
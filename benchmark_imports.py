@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+NFL PickEm Import Time Benchmark
+
+Measures how long a fresh interpreter takes to import the models, the app
+module (without create_app) and the validator/schedule modules, and checks
+them against an import budget. Times are medians over several runs; the
+budget applies to the time on top of importing flask_sqlalchemy itself, so
+it measures this codebase rather than the speed of the host. Modules that
+must stay lazy (pytz, requests, schedule) may not be imported at all.
+
+Exits with status 1 if any module is over budget, so it can gate a deploy
+or CI run; tests/test_import_budget.py enforces the same budget under pytest.
+
+Usage:
+    python benchmark_imports.py [runs]
+"""
+
+import os
+import sys
+import json
+import statistics
+import subprocess
+import logging
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_MODULE = 'flask_sqlalchemy'
+LAZY_MODULES = ['pytz', 'requests', 'schedule']
+
+# Module -> import budget in ms on top of the baseline import
+IMPORT_BUDGETS_MS = {
+    'models': 150,
+    'app': 600,
+    'validator_worker': 150,
+    'schedule_ingestion': 100,
+}
+
+PROBE = '''
+import sys, time, json
+started = time.perf_counter()
+import {baseline}
+baseline = time.perf_counter()
+import {module}
+finished = time.perf_counter()
+print(json.dumps({{
+    'baseline_ms': (baseline - started) * 1000,
+    'total_ms': (finished - started) * 1000,
+    'lazy_imported': [name for name in {lazy!r} if name in sys.modules],
+}}))
+'''
+
+def measure_import(module, runs=5):
+    """Median import times of module in fresh interpreters: (total ms, ms over baseline, lazy modules imported)"""
+    code = PROBE.format(baseline=BASELINE_MODULE, module=module, lazy=LAZY_MODULES)
+    samples = []
+    lazy_imported = set()
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', code], cwd=APP_DIR, capture_output=True,
+                                text=True, check=True).stdout
+        sample = json.loads(output.strip().splitlines()[-1])
+        samples.append(sample)
+        lazy_imported.update(sample['lazy_imported'])
+
+    total = statistics.median(sample['total_ms'] for sample in samples)
+    own = statistics.median(sample['total_ms'] - sample['baseline_ms'] for sample in samples)
+    return total, own, sorted(lazy_imported)
+
+def check_import_budgets(runs=5):
+    """Measure every budgeted module; returns {module: (total ms, own ms, budget ms, lazy imported, ok)}"""
+    results = {}
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        total, own, lazy_imported = measure_import(module, runs)
+        results[module] = (total, own, budget, lazy_imported, own <= budget and not lazy_imported)
+    return results
+
+def main():
+    """Main function for command-line usage"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print(f"Import benchmark: median of {runs} fresh interpreters, budget on top of 'import {BASELINE_MODULE}'")
+    results = check_import_budgets(runs)
+
+    print(f"{'module':<22}{'total ms':>10}{'own ms':>10}{'budget':>10}  result")
+    for module, (total, own, budget, lazy_imported, ok) in results.items():
+        note = 'ok' if ok else 'OVER BUDGET' if own > budget else ''
+        if lazy_imported:
+            note = f"{note} imports {', '.join(lazy_imported)}".strip()
+        print(f"{module:<22}{total:>10.1f}{own:>10.1f}{budget:>10}  {note}")
+
+    return 0 if all(ok for *_, ok in results.values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+NFL PickEm Server Benchmark
+
+Compares requests per second of the Flask development server and the
+production gunicorn setup (gunicorn.conf.py) for /api/matches and
+/api/leaderboard. Both servers run against the same database without a game
+validator, and are loaded by the same number of keep-alive clients.
+
+Usage:
+    python benchmark_server.py [seconds_per_endpoint] [clients] [workers]
+"""
+
+import os
+import sys
+import time
+import socket
+import signal
+import threading
+import subprocess
+import http.client
+import logging
+
+logger = logging.getLogger(__name__)
+
+ENDPOINTS = ['/api/matches', '/api/leaderboard']
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def free_port():
+    """Ask the OS for an unused TCP port"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(mode, port, workers):
+    """Start the dev or production server in its own process group"""
+    env = dict(os.environ, WEB_BIND=f'127.0.0.1:{port}', WEB_WORKERS=str(workers),
+               WEB_LOG_LEVEL='warning', WEB_ACCESS_LOG='')
+    if mode == 'dev':
+        command = [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--port', str(port)]
+    else:
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:create_app()']
+    return subprocess.Popen(command, cwd=APP_DIR, env=env, start_new_session=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def stop_server(process):
+    """Stop a server including its reloader or worker children"""
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=10)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, signal.SIGKILL)
+
+def wait_until_ready(port, timeout=60):
+    """Poll until the server answers /api/teams"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/api/teams')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+def run_load(port, path, seconds, clients):
+    """Hit one endpoint from several client threads; returns (requests/s, p50 ms, p95 ms, errors)"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)  # Reconnects if the server closes
+        own = []
+        own_errors = 0
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    own_errors += 1
+            except (OSError, http.client.HTTPException):
+                own_errors += 1
+                conn.close()
+                continue
+            own.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(own)
+            errors[0] += own_errors
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+    return len(latencies) / elapsed, percentile(0.5), percentile(0.95), errors[0]
+
+def benchmark(seconds=10, clients=16, workers=4):
+    """Benchmark both serving modes; returns {mode: {path: (rps, p50, p95, errors)}}"""
+    results = {}
+    for mode in ('dev', 'production'):
+        port = free_port()
+        process = start_server(mode, port, workers)
+        try:
+            if not wait_until_ready(port):
+                raise RuntimeError(f"{mode} server did not start")
+            results[mode] = {}
+            for path in ENDPOINTS:
+                run_load(port, path, 1, clients)  # Warm-up: imports, analytics cache, connections
+                results[mode][path] = run_load(port, path, seconds, clients)
+        finally:
+            stop_server(process)
+    return results
+
+def main():
+    """Main function for command-line usage"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    print(f"Benchmark: {seconds:g}s per endpoint, {clients} clients, {workers} gunicorn workers")
+    results = benchmark(seconds, clients, workers)
+
+    print(f"{'mode':<12}{'endpoint':<20}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for mode, by_path in results.items():
+        for path, (rps, p50, p95, errors) in by_path.items():
+            print(f"{mode:<12}{path:<20}{rps:>10.1f}{p50:>10.1f}{p95:>10.1f}{errors:>8}")
+
+    for path in ENDPOINTS:
+        speedup = results['production'][path][0] / max(results['dev'][path][0], 1e-9)
+        print(f"{path}: production serves {speedup:.1f}x the requests of the dev server")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
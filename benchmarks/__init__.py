@@ -0,0 +1,8 @@
+"""
+NFL PickEm Benchmark Suite
+
+Synthetic leagues of configurable size (synthetic_league.py) and the
+benchmark runner that measures API, validator and export paths against them
+(run_benchmarks.py). Results are JSON files meant to be compared between
+commits.
+"""
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+NFL PickEm Benchmark Runner
+
+Generates a synthetic league per size (see synthetic_league.py) and measures
+throughput and p50/p99 latency of:
+    api_leaderboard, api_user_rank, api_matches_week, api_matches_all,
+    api_picks_get, api_picks_post       Flask test client, no network
+    validate_week_idle                   recorded payload of a completed week (nothing to write)
+    validate_week_apply                  recorded finals of the first open week, on a fresh copy per run
+    export_ndjson, export_ndjson_gzip,
+    export_season_snapshot, export_excel the export code paths
+
+Each benchmark runs for a fixed time after one cold (first) call, which is
+reported separately. The validator reads week_<n>.json scoreboard payloads;
+by default the ones generated with the league, or recorded ESPN payloads
+from BENCHMARK_PAYLOAD_DIR. Results are written as JSON, tagged with the
+git commit, so runs of two commits can be compared.
+
+Usage:
+    python benchmarks/run_benchmarks.py run [sizes] [seconds_per_benchmark] [output.json]
+    python benchmarks/run_benchmarks.py compare <baseline.json> <candidate.json>
+
+    sizes: comma-separated user counts, e.g. 10,1000,10000 (default 10,100,1000)
+"""
+
+import os
+import sys
+import json
+import math
+import random
+import shutil
+import platform
+import tempfile
+import subprocess
+import logging
+import time
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, APP_DIR)
+
+from benchmarks.synthetic_league import USER_PASSWORD, WEEKS, generate_league
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [10, 100, 1000]
+DEFAULT_SECONDS = 3.0
+MIN_ITERATIONS = 5
+MAX_ITERATIONS = 100000
+LOGGED_IN_CLIENTS = 50
+PAYLOAD_DIR_ENV = 'BENCHMARK_PAYLOAD_DIR'
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, 'results')
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an ascending list"""
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p * len(ordered)) - 1))]
+
+def measure(call, seconds, setup=None):
+    """
+    Time call() repeatedly for about `seconds` after one cold call.
+
+    setup() runs untimed before every call and its result is passed to it.
+    A call counts as an error if it returns False.
+    """
+    def timed():
+        args = setup() if setup else ()
+        started = time.perf_counter()
+        ok = call(*args)
+        return time.perf_counter() - started, ok is not False
+
+    cold, _ = timed()
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    while len(latencies) < MAX_ITERATIONS and (len(latencies) < MIN_ITERATIONS or time.perf_counter() < deadline):
+        latency, ok = timed()
+        latencies.append(latency)
+        errors += 0 if ok else 1
+
+    ordered = sorted(latencies)
+    total = sum(latencies)
+    return {
+        'iterations': len(latencies),
+        'throughput_per_s': round(len(latencies) / total, 2) if total else None,
+        'cold_ms': round(cold * 1000, 3),
+        'mean_ms': round(total / len(latencies) * 1000, 3),
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'errors': errors,
+    }
+
+def get_ok(client, path):
+    """GET path and read the whole body; False unless the status is 200"""
+    response = client.get(path)
+    response.get_data()
+    return response.status_code == 200
+
+def make_validator_class():
+    """NFLGameValidator that reads scoreboards from week_<n>.json payloads instead of ESPN"""
+    from game_validator import NFLGameValidator
+    from schedule_ingestion import FixtureScheduleProvider
+
+    class RecordedPayloadValidator(NFLGameValidator):
+        def __init__(self, db_path, payload_dir):
+            super().__init__(db_path)
+            self.payloads = FixtureScheduleProvider(payload_dir)
+
+        def get_espn_scoreboard(self, week, year=None):
+            return self.payloads.scoreboard(week, year)
+
+    return RecordedPayloadValidator
+
+def benchmark_league(users, seconds, workdir):
+    """Generate one league in workdir and run every benchmark against it"""
+    from app import create_app
+    from database import release_database
+    from database_sync_api import gzip_stream, iter_export_lines
+    from season_snapshot import write_season_snapshot
+    from export_database_to_excel import export_database_to_excel
+
+    rng = random.Random(users)
+    db_path = os.path.join(workdir, 'league.db')
+    pristine_path = os.path.join(workdir, 'pristine.db')
+
+    started = time.perf_counter()
+    generation = generate_league(db_path, users)
+    generation['seconds'] = round(time.perf_counter() - started, 3)
+    shutil.copyfile(db_path, pristine_path)
+    payload_dir = os.environ.get(PAYLOAD_DIR_ENV) or generation['payload_dir']
+    completed_weeks = list(range(1, generation['completed_weeks'] + 1))
+    open_week = generation['first_open_week']
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{db_path}"})
+    client = app.test_client()
+    results = {}
+
+    def run(name, call, setup=None):
+        logger.warning(f"[{users} users] {name}")
+        results[name] = measure(call, seconds, setup)
+
+    run('api_leaderboard', lambda: get_ok(client, '/api/leaderboard'))
+    run('api_user_rank', lambda: get_ok(client, f"/api/user/rank?user_id={rng.randint(1, users)}"))
+    run('api_matches_week', lambda: get_ok(client, f"/api/matches?week={rng.randint(1, WEEKS)}"))
+    run('api_matches_all', lambda: get_ok(client, '/api/matches'))
+    run('api_picks_get', lambda: get_ok(
+        client, f"/api/picks?user_id={rng.randint(1, users)}&week={rng.choice(completed_weeks)}"))
+
+    run('export_ndjson', lambda: sum(len(line) for line in iter_export_lines(db_path)) > 0)
+    run('export_ndjson_gzip', lambda: sum(len(chunk) for chunk in gzip_stream(iter_export_lines(db_path))) > 0)
+    run('export_season_snapshot', lambda: write_season_snapshot(db_path, os.path.join(workdir, 'season_snapshot.npz')))
+    run('export_excel', lambda: export_database_to_excel(db_path, os.path.join(workdir, 'export.xlsx')))
+
+    validator_class = make_validator_class()
+    idle_validator = validator_class(db_path, payload_dir)
+    run('validate_week_idle', lambda: idle_validator.validate_week(rng.choice(completed_weeks)))
+
+    def fresh_validator():
+        apply_path = os.path.join(workdir, 'apply.db')
+        release_database(apply_path)  # No pooled or cached connection may outlive the replaced file
+        for path in (apply_path, f"{apply_path}-wal", f"{apply_path}-shm"):
+            if os.path.exists(path):
+                os.remove(path)  # A leftover WAL would be replayed into the fresh copy
+        shutil.copyfile(pristine_path, apply_path)
+        return (validator_class(apply_path, payload_dir),)
+    run('validate_week_apply', lambda validator: validator.validate_week(open_week), setup=fresh_validator)
+
+    # Last, as it changes the database
+    with app.app_context():
+        from models import Match
+        open_matches = [(match.id, match.home_team_id, match.away_team_id)
+                        for match in Match.query.filter(Match.week >= open_week).all()]
+    clients = []
+    for user_id in rng.sample(range(1, users + 1), min(users, LOGGED_IN_CLIENTS)):
+        user_client = app.test_client()
+        user_client.post('/api/auth/login', json={'username': f"user{user_id:05d}", 'password': USER_PASSWORD})
+        clients.append(user_client)
+
+    def post_pick():
+        match_id, home_id, away_id = rng.choice(open_matches)
+        response = rng.choice(clients).post('/api/picks', json={'match_id': match_id,
+                                                                'chosen_team_id': rng.choice([home_id, away_id])})
+        return response.status_code < 500  # 400 = rejected by the usage rules, which is a valid answer
+    run('api_picks_post', post_pick)
+
+    return {'generation': generation, 'benchmarks': results}
+
+def git_commit():
+    """Short commit hash of the working tree ('-dirty' with uncommitted changes), None outside git"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=APP_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(sizes=DEFAULT_SIZES, seconds=DEFAULT_SECONDS):
+    """Benchmark every league size; returns the JSON-ready result document"""
+    document = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seconds_per_benchmark': seconds,
+            'payload_dir': os.environ.get(PAYLOAD_DIR_ENV),
+        },
+        'leagues': {},
+    }
+
+    cwd = os.getcwd()
+    scratch = tempfile.mkdtemp(prefix='nfl_pickem_bench_')
+    try:
+        os.chdir(scratch)  # Validator backups (db_backups/) stay in the scratch directory
+        for users in sizes:
+            workdir = os.path.join(scratch, f"league_{users}")
+            os.makedirs(workdir)
+            document['leagues'][str(users)] = benchmark_league(users, seconds, workdir)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(scratch, ignore_errors=True)
+    return document
+
+def print_results(document):
+    """Print one table per league size"""
+    for users, league in document['leagues'].items():
+        print(f"\n{users} users ({league['generation']['picks']} picks, generated in "
+              f"{league['generation']['seconds']:.1f}s)")
+        print(f"{'benchmark':<26}{'runs':>7}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'cold ms':>10}{'errors':>8}")
+        for name, result in league['benchmarks'].items():
+            print(f"{name:<26}{result['iterations']:>7}{result['throughput_per_s']:>10.1f}{result['p50_ms']:>10.2f}"
+                  f"{result['p99_ms']:>10.2f}{result['cold_ms']:>10.2f}{result['errors']:>8}")
+
+def compare_results(baseline, candidate):
+    """Print p50/p99/throughput changes between two result documents"""
+    print(f"baseline {baseline['meta']['commit']} -> candidate {candidate['meta']['commit']}")
+    for users, league in candidate['leagues'].items():
+        if users not in baseline['leagues']:
+            continue
+        print(f"\n{users} users")
+        print(f"{'benchmark':<26}{'p50 ms':>20}{'p99 ms':>20}{'ops/s':>10}")
+        for name, result in league['benchmarks'].items():
+            before = baseline['leagues'][users]['benchmarks'].get(name)
+            if before is None:
+                continue
+            def change(key):
+                return f"{before[key]:.2f}->{result[key]:.2f}"
+            ratio = result['throughput_per_s'] / before['throughput_per_s'] if before['throughput_per_s'] else 0
+            print(f"{name:<26}{change('p50_ms'):>20}{change('p99_ms'):>20}{ratio:>9.2f}x")
+
+def main():
+    """Main function for command-line usage"""
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    command = sys.argv[1].lower() if len(sys.argv) > 1 else 'run'
+
+    if command == 'compare' and len(sys.argv) > 3:
+        with open(sys.argv[2]) as f:
+            baseline = json.load(f)
+        with open(sys.argv[3]) as f:
+            candidate = json.load(f)
+        compare_results(baseline, candidate)
+        return 0
+
+    if command != 'run':
+        print(__doc__.split('Usage:')[1])
+        return 1
+
+    sizes = [int(size) for size in sys.argv[2].split(',')] if len(sys.argv) > 2 else DEFAULT_SIZES
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_SECONDS
+
+    document = run_benchmarks(sizes, seconds)
+    output = sys.argv[4] if len(sys.argv) > 4 else \
+        os.path.join(RESULTS_DIR, f"{document['meta']['commit'] or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(document, f, indent=2)
+
+    print_results(document)
+    print(f"\nResults written to {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Synthetic League Generator for the NFL PickEm Benchmarks
+
+Builds a database with the app's schema (models.py) holding N users, the 32
+NFL teams and an 18-week schedule in which every team plays once per week.
+The first weeks are completed with random results and every user has one
+pick per completed week that respects the usage rules (a team at most 2x as
+winner, at most 1x as loser), including the usage and elimination rows the
+app keeps. The remaining weeks kick off in the future, so picks can still be
+posted for them. With several leagues the users are spread over them round
+robin; all leagues share the schedule of the season.
+
+Next to the database it writes ESPN scoreboard payloads (week_<n>.json, the
+format FixtureScheduleProvider reads): completed weeks as recorded, the
+first open week with final results the validator has not stored yet, later
+weeks as scheduled.
+
+Usage:
+    python benchmarks/synthetic_league.py <db_path> [users] [seed] [leagues]
+"""
+
+import os
+import sys
+import json
+import random
+import sqlite3
+import logging
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from werkzeug.security import generate_password_hash
+
+from models import db
+from change_log import install_change_log
+from leagues import DEFAULT_LEAGUE_NAME, DEFAULT_SEASON
+
+logger = logging.getLogger(__name__)
+
+WEEKS = 18
+COMPLETED_WEEKS = 12
+USER_PASSWORD = 'benchmark'
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+NFL_TEAMS = [
+    ('ARI', 'Arizona Cardinals'), ('ATL', 'Atlanta Falcons'), ('BAL', 'Baltimore Ravens'),
+    ('BUF', 'Buffalo Bills'), ('CAR', 'Carolina Panthers'), ('CHI', 'Chicago Bears'),
+    ('CIN', 'Cincinnati Bengals'), ('CLE', 'Cleveland Browns'), ('DAL', 'Dallas Cowboys'),
+    ('DEN', 'Denver Broncos'), ('DET', 'Detroit Lions'), ('GB', 'Green Bay Packers'),
+    ('HOU', 'Houston Texans'), ('IND', 'Indianapolis Colts'), ('JAX', 'Jacksonville Jaguars'),
+    ('KC', 'Kansas City Chiefs'), ('LV', 'Las Vegas Raiders'), ('LAC', 'Los Angeles Chargers'),
+    ('LAR', 'Los Angeles Rams'), ('MIA', 'Miami Dolphins'), ('MIN', 'Minnesota Vikings'),
+    ('NE', 'New England Patriots'), ('NO', 'New Orleans Saints'), ('NYG', 'New York Giants'),
+    ('NYJ', 'New York Jets'), ('PHI', 'Philadelphia Eagles'), ('PIT', 'Pittsburgh Steelers'),
+    ('SF', 'San Francisco 49ers'), ('SEA', 'Seattle Seahawks'), ('TB', 'Tampa Bay Buccaneers'),
+    ('TEN', 'Tennessee Titans'), ('WAS', 'Washington Commanders'),
+]
+
+def round_robin_weeks(team_ids, weeks):
+    """(home, away) pairs per week with every team playing once a week (circle method)"""
+    teams = list(team_ids)
+    schedule = []
+    for week in range(weeks):
+        pairs = []
+        for i in range(len(teams) // 2):
+            first, second = teams[i], teams[-1 - i]
+            pairs.append((first, second) if (week + i) % 2 == 0 else (second, first))
+        schedule.append(pairs)
+        teams = [teams[0]] + [teams[-1]] + teams[1:-1]  # Rotate all but the first team
+    return schedule
+
+def first_open_kickoff():
+    """Next Sunday 13:00 US Eastern at least two days ahead (naive, like stored kickoffs)"""
+    import pytz
+
+    now = datetime.now(pytz.timezone('US/Eastern')).replace(tzinfo=None)
+    day = now + timedelta(days=2)
+    day += timedelta(days=(6 - day.weekday()) % 7)
+    return day.replace(hour=13, minute=0, second=0, microsecond=0)
+
+def random_score(rng):
+    return rng.choice([3, 6, 7, 10, 13, 14, 17, 20, 21, 23, 24, 27, 28, 31, 34, 35, 38])
+
+def generate_matches(rng, completed_weeks=COMPLETED_WEEKS):
+    """Match rows (id, week, home, away, kickoff, completed, winner, home score, away score) and open-week results"""
+    first_open_week = completed_weeks + 1
+    first_open = first_open_kickoff()
+    matches, open_results = [], {}
+    match_id = 0
+    for week, pairs in enumerate(round_robin_weeks(range(1, len(NFL_TEAMS) + 1), WEEKS), start=1):
+        kickoff = first_open + timedelta(weeks=week - first_open_week)
+        for home, away in pairs:
+            match_id += 1
+            home_score = random_score(rng)
+            away_score = random_score(rng)
+            while away_score == home_score:
+                away_score = random_score(rng)
+            winner = home if home_score > away_score else away
+            if week <= completed_weeks:
+                matches.append((match_id, week, home, away, kickoff, 1, winner, home_score, away_score))
+            else:
+                matches.append((match_id, week, home, away, kickoff, 0, None, None, None))
+                if week == first_open_week:
+                    open_results[match_id] = (home_score, away_score)
+    return matches, open_results
+
+def league_of(user_id, leagues):
+    """League of a synthetic user (round robin over the leagues)"""
+    return (user_id - 1) % leagues + 1
+
+def generate_picks(rng, user_ids, matches, leagues=1, season=DEFAULT_SEASON):
+    """Picks plus winner usage, loser usage and elimination rows (each led by league and season) for all completed weeks"""
+    completed = {}
+    for match_id, week, home, away, _, is_completed, winner, _, _ in matches:
+        if is_completed:
+            completed.setdefault(week, []).append((match_id, home, away, winner))
+
+    picks, winner_rows, loser_rows, eliminated_rows = [], [], [], []
+    for user_id in user_ids:
+        scope = (league_of(user_id, leagues), season, user_id)
+        winner_used, loser_used = {}, set()
+        for week in sorted(completed):
+            options = [(match_id, team, opponent, winner)
+                       for match_id, home, away, winner in completed[week]
+                       for team, opponent in ((home, away), (away, home))
+                       if winner_used.get(team, 0) < 2 and opponent not in loser_used]
+            if not options:
+                continue
+            match_id, team, opponent, winner = rng.choice(options)
+            picks.append(scope + (match_id, team))
+            winner_used[team] = winner_used.get(team, 0) + 1
+            loser_used.add(opponent)
+            loser_rows.append(scope + (opponent, week, match_id))
+            eliminated_rows.append(scope + (opponent, 'loser'))
+
+        for team, count in winner_used.items():
+            winner_rows.append(scope + (team, count))
+            if count >= 2:
+                eliminated_rows.append(scope + (team, 'winner'))
+    return picks, winner_rows, loser_rows, eliminated_rows
+
+def scoreboard_payload(week, rows, team_names, open_results):
+    """ESPN scoreboard payload of one week"""
+    import pytz
+
+    eastern = pytz.timezone('US/Eastern')
+    events = []
+    for match_id, _, home, away, kickoff, is_completed, _, home_score, away_score in rows:
+        if not is_completed and match_id in open_results:
+            home_score, away_score = open_results[match_id]
+        final = home_score is not None
+        events.append({
+            'id': str(match_id),
+            'date': eastern.localize(kickoff).astimezone(pytz.utc).strftime('%Y-%m-%dT%H:%MZ'),
+            'week': {'number': week},
+            'status': {'type': {'name': 'STATUS_FINAL' if final else 'STATUS_SCHEDULED'}},
+            'competitions': [{'competitors': [
+                {'homeAway': 'home', 'score': str(home_score or 0), 'team': {'displayName': team_names[home]}},
+                {'homeAway': 'away', 'score': str(away_score or 0), 'team': {'displayName': team_names[away]}},
+            ]}],
+        })
+    return {'week': {'number': week}, 'events': events}
+
+def write_payloads(payload_dir, matches, open_results):
+    """Write week_<n>.json scoreboard payloads for all weeks"""
+    os.makedirs(payload_dir, exist_ok=True)
+    team_names = {team_id: name for team_id, (_, name) in enumerate(NFL_TEAMS, start=1)}
+    by_week = {}
+    for row in matches:
+        by_week.setdefault(row[1], []).append(row)
+    for week, rows in by_week.items():
+        with open(os.path.join(payload_dir, f"week_{week}.json"), 'w', encoding='utf-8') as f:
+            json.dump(scoreboard_payload(week, rows, team_names, open_results), f)
+
+def generate_league(db_path, users=100, seed=2025, completed_weeks=COMPLETED_WEEKS, payload_dir=None, leagues=1,
+                    season=DEFAULT_SEASON):
+    """Create a synthetic league database (replacing db_path); returns generation statistics"""
+    rng = random.Random(seed)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    # Schema straight from the models, without creating a Flask app
+    engine = create_engine(f"sqlite:///{os.path.abspath(db_path)}")
+    db.metadata.create_all(engine)
+    engine.dispose()
+
+    matches, open_results = generate_matches(rng, completed_weeks)
+    user_ids = list(range(1, users + 1))
+    picks, winner_rows, loser_rows, eliminated_rows = generate_picks(rng, user_ids, matches, leagues, season)
+    password_hash = generate_password_hash(USER_PASSWORD)  # Hashing is slow; every user shares it
+    now = datetime.utcnow().strftime(DATETIME_FORMAT)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.executemany("INSERT INTO league (id, name, created_at) VALUES (?, ?, ?)",
+                             [(league_id, DEFAULT_LEAGUE_NAME if league_id == 1 else f"League {league_id}", now)
+                              for league_id in range(1, leagues + 1)])
+            conn.executemany("INSERT INTO team (id, name, abbreviation, logo_url) VALUES (?, ?, ?, ?)",
+                             [(team_id, name, abbreviation, f"/static/logos/{abbreviation.lower()}.png")
+                              for team_id, (abbreviation, name) in enumerate(NFL_TEAMS, start=1)])
+            conn.executemany(
+                "INSERT INTO user (id, league_id, username, password_hash, email, is_admin) VALUES (?, ?, ?, ?, ?, ?)",
+                [(user_id, league_of(user_id, leagues), f"user{user_id:05d}", password_hash, None,
+                  1 if user_id == 1 else 0)
+                 for user_id in user_ids])
+            conn.executemany(
+                "INSERT INTO match (id, season, week, home_team_id, away_team_id, start_time, is_completed, "
+                "winner_team_id, home_score, away_score, status, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(match_id, season, week, home, away, kickoff.strftime(DATETIME_FORMAT), completed, winner, home_score,
+                  away_score, 'completed' if completed else 'scheduled', now)
+                 for match_id, week, home, away, kickoff, completed, winner, home_score, away_score in matches])
+            conn.executemany("INSERT INTO pick (league_id, season, user_id, match_id, chosen_team_id) "
+                             "VALUES (?, ?, ?, ?, ?)", picks)
+            conn.executemany("INSERT INTO team_winner_usage (league_id, season, user_id, team_id, usage_count) "
+                             "VALUES (?, ?, ?, ?, ?)", winner_rows)
+            conn.executemany("INSERT INTO team_loser_usage (league_id, season, user_id, team_id, week, match_id) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", loser_rows)
+            conn.executemany("INSERT INTO eliminated_team (league_id, season, user_id, team_id, elimination_type) "
+                             "VALUES (?, ?, ?, ?, ?)", eliminated_rows)
+        # Like the live database: later writes land in the change log
+        install_change_log(conn)
+    finally:
+        conn.close()
+
+    payload_dir = payload_dir or os.path.join(os.path.dirname(os.path.abspath(db_path)), 'payloads')
+    write_payloads(payload_dir, matches, open_results)
+
+    return {
+        'users': users,
+        'leagues': leagues,
+        'season': season,
+        'teams': len(NFL_TEAMS),
+        'matches': len(matches),
+        'picks': len(picks),
+        'completed_weeks': completed_weeks,
+        'first_open_week': completed_weeks + 1,
+        'payload_dir': payload_dir,
+        'seed': seed,
+    }
+
+def main():
+    """Main function for command-line usage"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if len(sys.argv) < 2:
+        print(__doc__.split('Usage:')[1])
+        return 1
+
+    db_path = sys.argv[1]
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 2025
+    leagues = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+
+    stats = generate_league(db_path, users, seed, leagues=leagues)
+    print(f"Generated {db_path}: {stats['users']} users in {stats['leagues']} leagues, {stats['matches']} matches, {stats['picks']} picks "
+          f"(weeks 1-{stats['completed_weeks']} completed); payloads in {stats['payload_dir']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
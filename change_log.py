@@ -0,0 +1,182 @@
+"""
+Change Log Module for NFL PickEm App
+
+Records every insert, update and delete on the application tables in a
+monotonically sequenced change_log table (maintained by SQLite triggers),
+so replicas can fetch only the rows that changed since their last sync.
+
+Rows the mutation journal and the latest backup already cover are pruned
+once they are older than CHANGE_LOG_RETENTION_DAYS; a replica that last
+synced before the oldest kept row has to download the database again.
+"""
+
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tables mirrored to replicas (all use an integer "id" primary key)
+TRACKED_TABLES = [
+    'league',
+    'user',
+    'team',
+    'match',
+    'pick',
+    'eliminated_team',
+    'team_winner_usage',
+    'team_loser_usage',
+]
+
+CHANGE_LOG_RETENTION_DAYS = 30  # How long replicas can stay offline and still sync incrementally
+
+CHANGE_LOG_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS change_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        op TEXT NOT NULL,
+        changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+    )
+"""
+
+def install_change_log(conn: sqlite3.Connection) -> None:
+    """Create the change_log table and its triggers (idempotent)"""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+
+    with conn:
+        conn.execute(CHANGE_LOG_SCHEMA)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_change_log_table_row ON change_log (table_name, row_id)")
+
+        for table_name in TRACKED_TABLES:
+            if table_name not in existing:
+                continue
+            for op, event, ref in (('I', 'INSERT', 'NEW'), ('U', 'UPDATE', 'NEW'), ('D', 'DELETE', 'OLD')):
+                conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS change_log_{table_name}_{event.lower()}
+                    AFTER {event} ON "{table_name}"
+                    BEGIN
+                        INSERT INTO change_log (table_name, row_id, op) VALUES ('{table_name}', {ref}.id, '{op}');
+                    END
+                """)
+
+    logger.info("Change log triggers installed")
+
+def get_latest_seq(conn: sqlite3.Connection) -> int:
+    """Return the highest change sequence number (0 if nothing was logged yet)"""
+    try:
+        return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+
+class ChangesPruned(Exception):
+    """The change log no longer holds every change after the requested sequence number"""
+
+    def __init__(self, since, oldest_seq):
+        super().__init__(f"Changes after {since} were pruned; the oldest sequence still served is {oldest_seq}")
+        self.since = since
+        self.oldest_seq = oldest_seq
+
+def get_oldest_seq(conn: sqlite3.Connection) -> int:
+    """Return the lowest `since` get_changes_since() can still serve completely"""
+    oldest = conn.execute("SELECT MIN(seq) FROM change_log").fetchone()[0]
+    return oldest - 1 if oldest else 0
+
+def prune_change_log(conn: sqlite3.Connection, up_to_seq: int,
+                     retention_days: int = CHANGE_LOG_RETENTION_DAYS) -> int:
+    """
+    Delete change log rows at or below `up_to_seq` that are older than the retention window.
+
+    The newest row is always kept, since MAX(seq) is the data version backups
+    and snapshots are keyed by. Returns the number of rows deleted.
+    """
+    with conn:
+        cursor = conn.execute("""
+            DELETE FROM change_log
+            WHERE seq <= ?
+              AND seq < (SELECT MAX(seq) FROM change_log)
+              AND changed_at < strftime('%Y-%m-%dT%H:%M:%f', 'now', ?)
+        """, (up_to_seq, f'-{retention_days} days'))
+    return cursor.rowcount
+
+def get_changes_since(conn: sqlite3.Connection, since: int, limit: int = 5000) -> dict:
+    """
+    Collect the net changes after sequence number `since`.
+
+    Multiple changes to the same row collapse into one entry: rows that still
+    exist are returned as upserts with their current values, rows that are gone
+    are returned as deletes. At most `limit` log entries are consumed per call;
+    `has_more` tells the caller to ask again from `to_seq`. Raises
+    ChangesPruned if rows after `since` were already pruned.
+    """
+    oldest_seq = get_oldest_seq(conn)
+    if since < oldest_seq:
+        raise ChangesPruned(since, oldest_seq)
+
+    log_rows = conn.execute("""
+        SELECT seq, table_name, row_id FROM change_log
+        WHERE seq > ? ORDER BY seq LIMIT ?
+    """, (since, limit + 1)).fetchall()
+
+    has_more = len(log_rows) > limit
+    log_rows = log_rows[:limit]
+    to_seq = log_rows[-1][0] if log_rows else since
+
+    changed_ids = {}
+    for _, table_name, row_id in log_rows:
+        changed_ids.setdefault(table_name, set()).add(row_id)
+
+    changes = collect_row_images(conn, changed_ids)
+
+    return {
+        'since': since,
+        'to_seq': to_seq,
+        'latest_seq': get_latest_seq(conn),
+        'has_more': has_more,
+        'changes': changes,
+    }
+
+def collect_row_images(conn: sqlite3.Connection, changed_ids: dict) -> dict:
+    """Build a change set from {table_name: row ids}: current rows become upserts, missing rows deletes"""
+    changes = {}
+    for table_name, row_ids in changed_ids.items():
+        if table_name not in TRACKED_TABLES or not row_ids:
+            continue
+
+        id_list = sorted(row_ids)
+        placeholders = ', '.join('?' for _ in id_list)
+        cursor = conn.execute(f'SELECT * FROM "{table_name}" WHERE id IN ({placeholders})', id_list)
+        columns = [description[0] for description in cursor.description]
+        upserts = cursor.fetchall()
+
+        present = {row[columns.index('id')] for row in upserts}
+        changes[table_name] = {
+            'columns': columns,
+            'upserts': [list(row) for row in upserts],
+            'deletes': [row_id for row_id in id_list if row_id not in present],
+        }
+    return changes
+
+def apply_changes(conn: sqlite3.Connection, changes: dict) -> int:
+    """Apply a change set from get_changes_since() inside the caller's transaction; returns rows touched"""
+    touched = 0
+    for table_name, table_changes in changes.items():
+        if table_name not in TRACKED_TABLES:
+            continue
+
+        deletes = table_changes.get('deletes', [])
+        if deletes:
+            conn.executemany(f'DELETE FROM "{table_name}" WHERE id = ?', [(row_id,) for row_id in deletes])
+            touched += len(deletes)
+
+        upserts = table_changes.get('upserts', [])
+        if upserts:
+            columns = table_changes['columns']
+            column_list = ', '.join(f'"{column}"' for column in columns)
+            placeholders = ', '.join('?' for _ in columns)
+            conn.executemany(
+                f'INSERT OR REPLACE INTO "{table_name}" ({column_list}) VALUES ({placeholders})',
+                upserts
+            )
+            touched += len(upserts)
+
+    return touched
@@ -1,239 +1,258 @@
 #!/usr/bin/env python3
 """
 Complete database analysis and export for validation
+
+Works on the columnar season snapshot (see season_snapshot.py), so no Flask
+app context is needed.
 """
 
 import sys
 import os
 import json
+import numpy as np
 sys.path.insert(0, '.')
 
-from app import app, db, User, Pick, Match, Team, EliminatedTeam, TeamWinnerUsage, TeamLoserUsage
-
-def analyze_database():
-    with app.app_context():
-        print("=== COMPLETE DATABASE ANALYSIS ===")
-        
-        # 1. USERS
-        print("\n1. USERS:")
-        users = User.query.all()
-        for user in users:
-            print(f"  ID: {user.id}, Username: {user.username}")
-        
-        # 2. TEAMS
-        print(f"\n2. TEAMS ({Team.query.count()} total):")
-        teams = Team.query.all()
-        for team in teams:
-            print(f"  ID: {team.id}, Name: {team.name}")
-        
-        # 3. MATCHES
-        print(f"\n3. MATCHES ({Match.query.count()} total):")
-        matches = Match.query.order_by(Match.week, Match.id).all()
-        for match in matches:
-            home_team = db.session.get(Team, match.home_team_id)
-            away_team = db.session.get(Team, match.away_team_id)
-            winner_team = db.session.get(Team, match.winner_team_id) if match.winner_team_id else None
-            
-            print(f"  Week {match.week}: {away_team.name} @ {home_team.name}")
-            print(f"    ID: {match.id}, Completed: {match.is_completed}")
-            if winner_team:
-                print(f"    Winner: {winner_team.name}")
-            if hasattr(match, 'result') and match.result:
-                print(f"    Result: {match.result}")
-            print()
-        
-        # 4. PICKS
-        print(f"\n4. PICKS ({Pick.query.count()} total):")
-        picks = Pick.query.join(User).join(Match).order_by(Match.week, User.username).all()
-        for pick in picks:
-            user = db.session.get(User, pick.user_id)
-            match = db.session.get(Match, pick.match_id)
-            chosen_team = db.session.get(Team, pick.chosen_team_id)
-            
-            # Calculate if pick is correct
-            is_correct = match.winner_team_id == pick.chosen_team_id if match.is_completed else "TBD"
-            
-            print(f"  Week {match.week} - {user.username}: {chosen_team.name} ({'✓' if is_correct == True else '✗' if is_correct == False else '?'})")
-        
-        # 5. TEAM WINNER USAGE
-        print(f"\n5. TEAM WINNER USAGE ({TeamWinnerUsage.query.count()} total):")
-        winner_usages = TeamWinnerUsage.query.join(User).join(Team).order_by(User.username, Team.name).all()
-        for usage in winner_usages:
-            user = db.session.get(User, usage.user_id)
-            team = db.session.get(Team, usage.team_id)
-            status = "ELIMINATED" if usage.usage_count >= 2 else f"{usage.usage_count}/2x"
-            print(f"  {user.username} - {team.name}: {status}")
-        
-        # 6. TEAM LOSER USAGE
-        print(f"\n6. TEAM LOSER USAGE ({TeamLoserUsage.query.count()} total):")
-        loser_usages = TeamLoserUsage.query.join(User).join(Team).order_by(User.username, Team.name).all()
-        for usage in loser_usages:
-            user = db.session.get(User, usage.user_id)
-            team = db.session.get(Team, usage.team_id)
-            print(f"  {user.username} - {team.name}: Week {usage.week} (ELIMINATED)")
-        
-        # 7. ELIMINATED TEAMS
-        print(f"\n7. ELIMINATED TEAMS ({EliminatedTeam.query.count()} total):")
-        eliminations = EliminatedTeam.query.join(User).join(Team).order_by(User.username, Team.name).all()
-        for elim in eliminations:
-            user = db.session.get(User, elim.user_id)
-            team = db.session.get(Team, elim.team_id)
-            print(f"  {user.username} - {team.name}: {elim.elimination_type}")
-        
-        # 8. USER SCORES CALCULATION
-        print(f"\n8. USER SCORES:")
-        for user in users:
-            score = user.get_score()
-            print(f"  {user.username}: {score} points")
-        
-        # 9. DATA SOURCES DOCUMENTATION
-        print(f"\n9. DATA SOURCES:")
-        print("  - Week 1 Matches: Manual entry based on real NFL results")
-        print("  - Week 1 Results: Real NFL scores from ESPN")
-        print("  - Week 1 Picks: User-provided actual picks")
-        print("  - Week 2 Matches: Test data (4 games)")
-        print("  - Teams: Standard 32 NFL teams")
-        print("  - Users: Test users (Manuel, Daniel, Raff, Haunschi)")
-        
-        # 10. VALIDATION CHECKS
-        print(f"\n10. VALIDATION CHECKS:")
-        
-        # Check 1: Each user should have exactly 1 Week 1 pick
-        week1_picks_per_user = {}
-        for pick in Pick.query.join(Match).filter(Match.week == 1).all():
-            user = db.session.get(User, pick.user_id)
-            week1_picks_per_user[user.username] = week1_picks_per_user.get(user.username, 0) + 1
-        
-        print("  Week 1 picks per user:")
-        for username, count in week1_picks_per_user.items():
-            status = "✓" if count == 1 else f"✗ ({count})"
-            print(f"    {username}: {count} {status}")
-        
-        # Check 2: Each user should have exactly 1 eliminated team (loser)
-        loser_eliminations_per_user = {}
-        for elim in EliminatedTeam.query.filter_by(elimination_type='loser').all():
-            user = db.session.get(User, elim.user_id)
-            loser_eliminations_per_user[user.username] = loser_eliminations_per_user.get(user.username, 0) + 1
-        
-        print("  Loser eliminations per user:")
-        for username, count in loser_eliminations_per_user.items():
-            status = "✓" if count == 1 else f"✗ ({count})"
-            print(f"    {username}: {count} {status}")
-        
-        # Check 3: Week 1 matches should all be completed
-        week1_matches = Match.query.filter_by(week=1).all()
-        completed_week1 = sum(1 for m in week1_matches if m.is_completed)
-        print(f"  Week 1 matches completed: {completed_week1}/{len(week1_matches)} {'✓' if completed_week1 == len(week1_matches) else '✗'}")
-        
-        # Check 4: All Week 1 matches should have winners
-        week1_with_winners = sum(1 for m in week1_matches if m.winner_team_id)
-        print(f"  Week 1 matches with winners: {week1_with_winners}/{len(week1_matches)} {'✓' if week1_with_winners == len(week1_matches) else '✗'}")
-
-def export_database_to_json():
+from season_snapshot import DEFAULT_DB_PATH, get_season_snapshot
+
+def sorted_by_user_and_team(snapshot, table_name):
+    """Row positions of a user/team table ordered by username and team name (joined rows only)"""
+    table = snapshot[table_name]
+    usernames = snapshot.lookup('user', 'username', table['user_id'])
+    team_names = snapshot.lookup('team', 'name', table['team_id'])
+    order = np.lexsort((team_names, usernames))
+    order = order[(usernames[order] != '') & (team_names[order] != '')]
+    return order, usernames, team_names
+
+def analyze_database(db_path=DEFAULT_DB_PATH):
+    snapshot = get_season_snapshot(db_path)
+    users = snapshot['user']
+    teams = snapshot['team']
+    matches = snapshot['match']
+    picks = snapshot['pick']
+
+    print("=== COMPLETE DATABASE ANALYSIS ===")
+
+    # 1. USERS
+    print("\n1. USERS:")
+    for user_id, username in zip(users['id'], users['username']):
+        print(f"  ID: {user_id}, Username: {username}")
+
+    # 2. TEAMS
+    print(f"\n2. TEAMS ({snapshot.row_count('team')} total):")
+    for team_id, name in zip(teams['id'], teams['name']):
+        print(f"  ID: {team_id}, Name: {name}")
+
+    # 3. MATCHES
+    print(f"\n3. MATCHES ({snapshot.row_count('match')} total):")
+    match_order = np.lexsort((matches['id'], matches['week']))
+    home_names = snapshot.lookup('team', 'name', matches['home_team_id'])
+    away_names = snapshot.lookup('team', 'name', matches['away_team_id'])
+    winner_names = snapshot.lookup('team', 'name', matches['winner_team_id'])
+    for row in match_order:
+        print(f"  Week {matches['week'][row]}: {away_names[row]} @ {home_names[row]}")
+        print(f"    ID: {matches['id'][row]}, Completed: {matches['is_completed'][row] == 1}")
+        if winner_names[row]:
+            print(f"    Winner: {winner_names[row]}")
+        print()
+
+    # 4. PICKS
+    print(f"\n4. PICKS ({snapshot.row_count('pick')} total):")
+    pick_usernames = snapshot.lookup('user', 'username', picks['user_id'])
+    pick_match_rows = snapshot.rows_for('match', picks['match_id'])
+    joined = np.flatnonzero((pick_usernames != '') & (pick_match_rows >= 0))
+    pick_weeks = matches['week'][pick_match_rows[joined]]
+    pick_order = joined[np.lexsort((pick_usernames[joined], pick_weeks))]
+    chosen_names = snapshot.lookup('team', 'name', picks['chosen_team_id'])
+    pick_results = snapshot.pick_results()
+    result_marks = {1: '✓', 0: '✗', -1: '?'}
+    for row in pick_order:
+        week = matches['week'][pick_match_rows[row]]
+        print(f"  Week {week} - {pick_usernames[row]}: {chosen_names[row]} ({result_marks[int(pick_results[row])]})")
+
+    # 5. TEAM WINNER USAGE
+    winner_usage = snapshot['team_winner_usage']
+    print(f"\n5. TEAM WINNER USAGE ({snapshot.row_count('team_winner_usage')} total):")
+    order, usernames, team_names = sorted_by_user_and_team(snapshot, 'team_winner_usage')
+    for row in order:
+        usage_count = max(int(winner_usage['usage_count'][row]), 0)
+        status = "ELIMINATED" if usage_count >= 2 else f"{usage_count}/2x"
+        print(f"  {usernames[row]} - {team_names[row]}: {status}")
+
+    # 6. TEAM LOSER USAGE
+    loser_usage = snapshot['team_loser_usage']
+    print(f"\n6. TEAM LOSER USAGE ({snapshot.row_count('team_loser_usage')} total):")
+    order, usernames, team_names = sorted_by_user_and_team(snapshot, 'team_loser_usage')
+    for row in order:
+        print(f"  {usernames[row]} - {team_names[row]}: Week {loser_usage['week'][row]} (ELIMINATED)")
+
+    # 7. ELIMINATED TEAMS
+    eliminated = snapshot['eliminated_team']
+    print(f"\n7. ELIMINATED TEAMS ({snapshot.row_count('eliminated_team')} total):")
+    order, usernames, team_names = sorted_by_user_and_team(snapshot, 'eliminated_team')
+    for row in order:
+        print(f"  {usernames[row]} - {team_names[row]}: {eliminated['elimination_type'][row]}")
+
+    # 8. USER SCORES CALCULATION
+    print(f"\n8. USER SCORES:")
+    for username, score in zip(users['username'], snapshot.user_scores()):
+        print(f"  {username}: {score} points")
+
+    # 9. DATA SOURCES DOCUMENTATION
+    print(f"\n9. DATA SOURCES:")
+    print("  - Week 1 Matches: Manual entry based on real NFL results")
+    print("  - Week 1 Results: Real NFL scores from ESPN")
+    print("  - Week 1 Picks: User-provided actual picks")
+    print("  - Week 2 Matches: Test data (4 games)")
+    print("  - Teams: Standard 32 NFL teams")
+    print("  - Users: Test users (Manuel, Daniel, Raff, Haunschi)")
+
+    # 10. VALIDATION CHECKS
+    print(f"\n10. VALIDATION CHECKS:")
+
+    # Check 1: Each user should have exactly 1 Week 1 pick
+    week1_picks = (pick_match_rows >= 0) & (pick_usernames != '')
+    week1_picks[week1_picks] = matches['week'][pick_match_rows[week1_picks]] == 1
+    names, counts = np.unique(pick_usernames[week1_picks], return_counts=True)
+
+    print("  Week 1 picks per user:")
+    for username, count in zip(names, counts):
+        status = "✓" if count == 1 else f"✗ ({count})"
+        print(f"    {username}: {count} {status}")
+
+    # Check 2: Each user should have exactly 1 eliminated team (loser)
+    elim_usernames = snapshot.lookup('user', 'username', eliminated['user_id'])
+    loser_eliminations = (eliminated['elimination_type'] == 'loser') & (elim_usernames != '')
+    names, counts = np.unique(elim_usernames[loser_eliminations], return_counts=True)
+
+    print("  Loser eliminations per user:")
+    for username, count in zip(names, counts):
+        status = "✓" if count == 1 else f"✗ ({count})"
+        print(f"    {username}: {count} {status}")
+
+    # Check 3: Week 1 matches should all be completed
+    week1_mask = matches['week'] == 1
+    week1_total = int(week1_mask.sum())
+    completed_week1 = int((week1_mask & (matches['is_completed'] == 1)).sum())
+    print(f"  Week 1 matches completed: {completed_week1}/{week1_total} {'✓' if completed_week1 == week1_total else '✗'}")
+
+    # Check 4: All Week 1 matches should have winners
+    week1_with_winners = int((week1_mask & (matches['winner_team_id'] != -1)).sum())
+    print(f"  Week 1 matches with winners: {week1_with_winners}/{week1_total} {'✓' if week1_with_winners == week1_total else '✗'}")
+
+def export_database_to_json(db_path=DEFAULT_DB_PATH):
     """Export complete database to JSON for manual inspection"""
-    with app.app_context():
-        export_data = {
-            'users': [],
-            'teams': [],
-            'matches': [],
-            'picks': [],
-            'team_winner_usage': [],
-            'team_loser_usage': [],
-            'eliminated_teams': []
-        }
-        
-        # Export Users
-        for user in User.query.all():
-            export_data['users'].append({
-                'id': user.id,
-                'username': user.username,
-                'score': user.get_score()
-            })
-        
-        # Export Teams
-        for team in Team.query.all():
-            export_data['teams'].append({
-                'id': team.id,
-                'name': team.name
-            })
-        
-        # Export Matches
-        for match in Match.query.all():
-            home_team = db.session.get(Team, match.home_team_id)
-            away_team = db.session.get(Team, match.away_team_id)
-            winner_team = db.session.get(Team, match.winner_team_id) if match.winner_team_id else None
-            
-            export_data['matches'].append({
-                'id': match.id,
-                'week': match.week,
-                'home_team': home_team.name,
-                'away_team': away_team.name,
-                'winner_team': winner_team.name if winner_team else None,
-                'completed': match.is_completed,
-                'result': getattr(match, 'result', None),
-                'start_time': str(match.start_time) if match.start_time else None
-            })
-        
-        # Export Picks
-        for pick in Pick.query.all():
-            user = db.session.get(User, pick.user_id)
-            match = db.session.get(Match, pick.match_id)
-            chosen_team = db.session.get(Team, pick.chosen_team_id)
-            
-            is_correct = match.winner_team_id == pick.chosen_team_id if match.is_completed else None
-            
-            export_data['picks'].append({
-                'id': pick.id,
-                'user': user.username,
-                'week': match.week,
-                'chosen_team': chosen_team.name,
-                'is_correct': is_correct,
-                'match_description': f"{db.session.get(Team, match.away_team_id).name} @ {db.session.get(Team, match.home_team_id).name}"
-            })
-        
-        # Export Team Winner Usage
-        for usage in TeamWinnerUsage.query.all():
-            user = db.session.get(User, usage.user_id)
-            team = db.session.get(Team, usage.team_id)
-            
-            export_data['team_winner_usage'].append({
-                'user': user.username,
-                'team': team.name,
-                'usage_count': usage.usage_count,
-                'status': 'ELIMINATED' if usage.usage_count >= 2 else f'{usage.usage_count}/2x'
-            })
-        
-        # Export Team Loser Usage
-        for usage in TeamLoserUsage.query.all():
-            user = db.session.get(User, usage.user_id)
-            team = db.session.get(Team, usage.team_id)
-            
-            export_data['team_loser_usage'].append({
-                'user': user.username,
-                'team': team.name,
-                'week': usage.week,
-                'status': 'ELIMINATED'
-            })
-        
-        # Export Eliminated Teams
-        for elim in EliminatedTeam.query.all():
-            user = db.session.get(User, elim.user_id)
-            team = db.session.get(Team, elim.team_id)
-            
-            export_data['eliminated_teams'].append({
-                'user': user.username,
-                'team': team.name,
-                'elimination_type': elim.elimination_type
-            })
-        
-        # Save to file
-        with open('database_export.json', 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, indent=2, ensure_ascii=False)
-        
-        print(f"\nDatabase exported to database_export.json")
-        return export_data
+    snapshot = get_season_snapshot(db_path)
+    users = snapshot['user']
+    teams = snapshot['team']
+    matches = snapshot['match']
+    picks = snapshot['pick']
+    winner_usage = snapshot['team_winner_usage']
+    loser_usage = snapshot['team_loser_usage']
+    eliminated = snapshot['eliminated_team']
+
+    def team_names(team_ids):
+        return snapshot.lookup('team', 'name', team_ids).tolist()
+
+    def usernames(user_ids):
+        return snapshot.lookup('user', 'username', user_ids).tolist()
+
+    export_data = {
+        'users': [],
+        'teams': [],
+        'matches': [],
+        'picks': [],
+        'team_winner_usage': [],
+        'team_loser_usage': [],
+        'eliminated_teams': []
+    }
+
+    # Export Users
+    for user_id, username, score in zip(users['id'].tolist(), users['username'].tolist(),
+                                        snapshot.user_scores().tolist()):
+        export_data['users'].append({
+            'id': user_id,
+            'username': username,
+            'score': score
+        })
+
+    # Export Teams
+    for team_id, name in zip(teams['id'].tolist(), teams['name'].tolist()):
+        export_data['teams'].append({
+            'id': team_id,
+            'name': name
+        })
+
+    # Export Matches
+    home_names = team_names(matches['home_team_id'])
+    away_names = team_names(matches['away_team_id'])
+    for match_id, week, home, away, winner, completed, start_time in zip(
+            matches['id'].tolist(), matches['week'].tolist(), home_names, away_names,
+            team_names(matches['winner_team_id']), (matches['is_completed'] == 1).tolist(),
+            matches['start_time'].tolist()):
+        export_data['matches'].append({
+            'id': match_id,
+            'week': week,
+            'home_team': home,
+            'away_team': away,
+            'winner_team': winner or None,
+            'completed': completed,
+            'result': None,
+            'start_time': start_time or None
+        })
+
+    # Export Picks
+    pick_match_rows = snapshot.rows_for('match', picks['match_id'])
+    pick_results = snapshot.pick_results().tolist()
+    for pick_id, username, match_row, chosen, result in zip(
+            picks['id'].tolist(), usernames(picks['user_id']), pick_match_rows.tolist(),
+            team_names(picks['chosen_team_id']), pick_results):
+        if match_row < 0:
+            continue
+        export_data['picks'].append({
+            'id': pick_id,
+            'user': username,
+            'week': int(matches['week'][match_row]),
+            'chosen_team': chosen,
+            'is_correct': None if result == -1 else result == 1,
+            'match_description': f"{away_names[match_row]} @ {home_names[match_row]}"
+        })
+
+    # Export Team Winner Usage
+    for username, team, usage_count in zip(usernames(winner_usage['user_id']), team_names(winner_usage['team_id']),
+                                           np.maximum(winner_usage['usage_count'], 0).tolist()):
+        export_data['team_winner_usage'].append({
+            'user': username,
+            'team': team,
+            'usage_count': usage_count,
+            'status': 'ELIMINATED' if usage_count >= 2 else f'{usage_count}/2x'
+        })
+
+    # Export Team Loser Usage
+    for username, team, week in zip(usernames(loser_usage['user_id']), team_names(loser_usage['team_id']),
+                                    loser_usage['week'].tolist()):
+        export_data['team_loser_usage'].append({
+            'user': username,
+            'team': team,
+            'week': week,
+            'status': 'ELIMINATED'
+        })
+
+    # Export Eliminated Teams
+    for username, team, elimination_type in zip(usernames(eliminated['user_id']), team_names(eliminated['team_id']),
+                                                eliminated['elimination_type'].tolist()):
+        export_data['eliminated_teams'].append({
+            'user': username,
+            'team': team,
+            'elimination_type': elimination_type
+        })
+
+    # Save to file
+    with open('database_export.json', 'w', encoding='utf-8') as f:
+        json.dump(export_data, f, indent=2, ensure_ascii=False)
+
+    print(f"\nDatabase exported to database_export.json")
+    return export_data
 
 if __name__ == '__main__':
     analyze_database()
     export_database_to_json()
-
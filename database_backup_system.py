@@ -1,38 +1,47 @@
 
 import sqlite3
-import shutil
 import os
-from datetime import datetime
+
+from backup_store import BackupStore
+from database import get_database_path
+from mutation_journal import run_reverting_on_error
+
+DB_PATH = get_database_path()  # Dieselbe Datei wie die Flask-App (DATABASE_URL, sonst instance/nfl_pickem.db)
 
 def auto_backup_database():
-    """Automatisches Backup vor kritischen Operationen"""
-    if not os.path.exists("nfl_pickem.db"):
+    """Automatisches Backup (vollständiger Snapshot im Backup-Store)"""
+    if not os.path.exists(DB_PATH):
         return None
-        
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_dir = "db_backups"
-    os.makedirs(backup_dir, exist_ok=True)
-    
-    backup_path = f"{backup_dir}/nfl_pickem_backup_{timestamp}.db"
-    shutil.copy2("nfl_pickem.db", backup_path)
     
-    # Nur die letzten 10 Backups behalten
-    backups = sorted([f for f in os.listdir(backup_dir) if f.endswith(".db")])
-    while len(backups) > 10:
-        oldest = backups.pop(0)
-        os.remove(f"{backup_dir}/{oldest}")
+    # Snapshot landet dedupliziert im Backup-Store (Aufbewahrung über die Retention-Stufen)
+    store = BackupStore()
+    manifest = store.add_snapshot(DB_PATH, reason="manual")
+    store.prune()
     
-    return backup_path
+    return manifest['id']
+
+def ensure_recovery_base():
+    """Sicherstellen, dass es einen Snapshot als Basis für das Journal-Replay gibt"""
+    if not BackupStore().find_snapshot('latest', source=DB_PATH):
+        auto_backup_database()
 
 # Integration in Flask App
 def safe_database_operation(operation_func):
-    """Wrapper für sichere Datenbank-Operationen"""
-    backup_path = auto_backup_database()
+    """
+    Wrapper für sichere Datenbank-Operationen
+    
+    Statt vor jeder Operation die ganze Datenbank zu kopieren, werden die
+    Zeilen protokolliert, die die Operation über database.get_connection()
+    schreibt. Schlägt sie fehl, werden genau diese Zeilen auf ihren Stand vor
+    der Operation zurückgesetzt; gleichzeitige Änderungen anderer Benutzer
+    bleiben erhalten.
+    """
+    if not os.path.exists(DB_PATH):
+        return operation_func()
+    
+    ensure_recovery_base()
     try:
-        result = operation_func()
-        return result
+        return run_reverting_on_error(operation_func, db_path=DB_PATH)
     except Exception as e:
-        if backup_path and os.path.exists(backup_path):
-            shutil.copy2(backup_path, "nfl_pickem.db")
-            print(f"❌ Error occurred, database restored from {backup_path}")
-        raise e
+        print(f"❌ Error occurred, the operation's changes were reverted: {e}")
+        raise
@@ -1,63 +1,96 @@
 """
 NFL PickEm Database Sync API
 Provides endpoints for real-time database synchronization
+
+Status and picks summary query the configured database (SQLite or
+PostgreSQL, see database.py) through SQLAlchemy Core; export, download,
+backup and the change feed work on the SQLite file the app uses, through
+the shared per-thread connection of database.get_connection().
 """
 
-import sqlite3
 import json
 import os
 from datetime import datetime
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, Response, current_app, jsonify, request, send_file, stream_with_context
+from sqlalchemy import distinct, func, select
 import tempfile
 import zipfile
+import zlib
+
+from change_log import ChangesPruned, get_changes_since, install_change_log
+from database import get_connection, get_file_version
+from db_snapshot import create_snapshot
+from models import db, Match, Pick, Team, User
 
 # Create blueprint for database sync
 db_sync_bp = Blueprint('db_sync', __name__)
 
 def get_database_path():
-    """Get the database path dynamically"""
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    return os.path.join(current_dir, 'instance', 'nfl_pickem.db')
+    """SQLite file of the app's database (None on a server database)"""
+    return current_app.config.get('DATABASE_PATH')
+
+def database_missing(db_path):
+    return not db_path or not os.path.exists(db_path)
+
+EXPORT_BATCH_SIZE = 500  # Rows fetched per cursor round-trip while streaming
+
+def iter_export_lines(db_path, batch_size=EXPORT_BATCH_SIZE):
+    """Yield the database as NDJSON lines: one export header, then per table a header line followed by one line per row"""
+    conn = get_connection(db_path)
+    conn.execute("BEGIN")  # One read transaction: all tables from the same commit
+    try:
+        cursor = conn.cursor()
+        yield json.dumps({'type': 'export', 'export_timestamp': datetime.now().isoformat()}) + '\n'
+        
+        table_names = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT IN ('sqlite_sequence', 'change_log') ORDER BY name"
+        )]
+        
+        for table_name in table_names:
+            cursor.execute(f'SELECT * FROM "{table_name}"')
+            columns = [description[0] for description in cursor.description]
+            yield json.dumps({'type': 'table', 'name': table_name, 'columns': columns}) + '\n'
+            
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield ''.join(json.dumps(row, default=str) + '\n' for row in rows)
+        
+        yield json.dumps({'type': 'end', 'tables': len(table_names)}) + '\n'
+    finally:
+        conn.rollback()
+
+def gzip_stream(chunks, level=6):
+    """Compress an iterable of text chunks into a gzip byte stream, emitting each chunk as soon as it arrives"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        # Sync flush per chunk (a header line or a whole fetchmany batch, never single rows):
+        # deflate would otherwise hold back output until its buffer fills
+        yield compressor.compress(chunk.encode('utf-8')) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
 
 @db_sync_bp.route('/api/database/export', methods=['GET'])
 def export_database():
-    """Export complete database as JSON"""
+    """Stream the complete database as NDJSON (optionally gzip-compressed)"""
     try:
         db_path = get_database_path()
         
-        if not os.path.exists(db_path):
+        if database_missing(db_path):
             return jsonify({'error': 'Database not found'}), 404
         
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        use_gzip = request.args.get('gzip', '').lower() in ('1', 'true', 'yes') or \
+            'gzip' in request.headers.get('Accept-Encoding', '')
         
-        # Export all tables
-        export_data = {
-            'export_timestamp': datetime.now().isoformat(),
-            'tables': {}
-        }
-        
-        # Get all table names
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
-        
-        for table in tables:
-            table_name = table[0]
-            if table_name == 'sqlite_sequence':
-                continue
-                
-            cursor.execute(f"SELECT * FROM {table_name}")
-            rows = cursor.fetchall()
-            
-            # Convert rows to dictionaries
-            export_data['tables'][table_name] = []
-            for row in rows:
-                export_data['tables'][table_name].append(dict(row))
+        lines = iter_export_lines(db_path)
+        if use_gzip:
+            response = Response(stream_with_context(gzip_stream(lines)), mimetype='application/x-ndjson')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = Response(stream_with_context(lines), mimetype='application/x-ndjson')
         
-        conn.close()
-        
-        return jsonify(export_data)
+        response.headers['X-Accel-Buffering'] = 'no'  # Let proxies pass chunks through immediately
+        return response
         
     except Exception as e:
         return jsonify({'error': f'Export failed: {str(e)}'}), 500
@@ -68,11 +101,22 @@ def download_database():
     try:
         db_path = get_database_path()
         
-        if not os.path.exists(db_path):
+        if database_missing(db_path):
             return jsonify({'error': 'Database not found'}), 404
         
+        # Send a consistent snapshot; the live file may have commits waiting in its WAL
+        snapshot_dir = tempfile.mkdtemp()
+        snapshot_path = os.path.join(snapshot_dir, 'nfl_pickem.db')
+        try:
+            create_snapshot(db_path, snapshot_path)
+            snapshot = open(snapshot_path, 'rb')  # Stays readable after the file is removed
+        finally:
+            if os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+            os.rmdir(snapshot_dir)
+        
         return send_file(
-            db_path,
+            snapshot,
             as_attachment=True,
             download_name=f'nfl_pickem_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db',
             mimetype='application/octet-stream'
@@ -88,7 +132,7 @@ def create_backup_package():
         current_dir = os.path.dirname(os.path.abspath(__file__))
         db_path = get_database_path()
         
-        if not os.path.exists(db_path):
+        if database_missing(db_path):
             return jsonify({'error': 'Database not found'}), 404
         
         # Create temporary zip file
@@ -97,12 +141,15 @@ def create_backup_package():
         zip_path = os.path.join(temp_dir, f'nfl_pickem_backup_{timestamp}.zip')
         
         with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Add database
-            zipf.write(db_path, 'nfl_pickem.db')
+            # Add database (as a consistent snapshot, see download_database)
+            snapshot_path = create_snapshot(db_path, os.path.join(temp_dir, 'nfl_pickem.db'))
+            zipf.write(snapshot_path, 'nfl_pickem.db')
+            os.remove(snapshot_path)
             
             # Add key configuration files
             key_files = [
                 'app.py',
+                'models.py',
                 'requirements.txt',
                 'static/app.js',
                 'static/styles.css',
@@ -127,48 +174,46 @@ def create_backup_package():
 def database_status():
     """Get database status and statistics"""
     try:
-        db_path = get_database_path()
+        engine = db.engine
+        db_path = get_database_path()  # None on a server database
         
-        if not os.path.exists(db_path):
+        if db_path and not os.path.exists(db_path):
             return jsonify({'error': 'Database not found'}), 404
         
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Get statistics
-        stats = {}
-        
-        # Count records in each table
-        tables = ['user', 'team', 'match', 'pick', 'eliminated_team', 'team_winner_usage']
-        for table in tables:
-            try:
-                cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                stats[f'{table}_count'] = cursor.fetchone()[0]
-            except:
-                stats[f'{table}_count'] = 0
-        
-        # Get current week info
-        cursor.execute("SELECT MAX(week) FROM match")
-        max_week = cursor.fetchone()[0] or 0
+        match_table = Match.__table__
         
-        cursor.execute("SELECT COUNT(DISTINCT week) FROM match")
-        weeks_available = cursor.fetchone()[0] or 0
-        
-        # Get recent picks
-        cursor.execute("""
-            SELECT COUNT(*) FROM pick p
-            JOIN match m ON p.match_id = m.id
-            WHERE m.week = (SELECT MAX(week) FROM match WHERE week <= ?)
-        """, (max_week,))
-        current_week_picks = cursor.fetchone()[0] or 0
-        
-        conn.close()
+        with engine.connect() as conn:
+            # Get statistics
+            stats = {}
+            
+            # Count records in each table
+            tables = ['league', 'user', 'team', 'match', 'pick', 'eliminated_team', 'team_winner_usage']
+            for table in tables:
+                try:
+                    stats[f'{table}_count'] = conn.execute(
+                        select(func.count()).select_from(db.metadata.tables[table])).scalar()
+                except Exception:
+                    conn.rollback()
+                    stats[f'{table}_count'] = 0
+            
+            # Get current week info
+            max_week = conn.execute(select(func.max(match_table.c.week))).scalar() or 0
+            
+            weeks_available = conn.execute(select(func.count(distinct(match_table.c.week)))).scalar() or 0
+            
+            # Get recent picks
+            current_week_picks = conn.execute(
+                select(func.count())
+                .select_from(Pick.__table__)
+                .join(match_table, Pick.__table__.c.match_id == match_table.c.id)
+                .where(match_table.c.week == max_week)).scalar() or 0
         
         return jsonify({
             'status': 'healthy',
+            'database': engine.url.render_as_string(hide_password=True),
             'database_path': db_path,
-            'last_modified': datetime.fromtimestamp(os.path.getmtime(db_path)).isoformat(),
-            'file_size_mb': round(os.path.getsize(db_path) / (1024 * 1024), 2),
+            'last_modified': datetime.fromtimestamp(get_file_version(db_path) / 1e9).isoformat() if db_path else None,
+            'file_size_mb': round(os.path.getsize(db_path) / (1024 * 1024), 2) if db_path else None,
             'statistics': stats,
             'current_week': max_week,
             'weeks_available': weeks_available,
@@ -183,35 +228,28 @@ def database_status():
 def picks_summary():
     """Get a summary of all picks by week and user"""
     try:
-        db_path = get_database_path()
+        engine = db.engine
+        db_path = get_database_path()  # None on a server database
         
-        if not os.path.exists(db_path):
+        if db_path and not os.path.exists(db_path):
             return jsonify({'error': 'Database not found'}), 404
         
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        pick_table, user_table, match_table = Pick.__table__, User.__table__, Match.__table__
+        chosen, away, home = Team.__table__.alias('t'), Team.__table__.alias('at'), Team.__table__.alias('ht')
         
         # Get picks summary
-        cursor.execute("""
-            SELECT 
-                m.week,
-                u.username,
-                t.name as chosen_team,
-                m.id as match_id,
-                at.name as away_team,
-                ht.name as home_team,
-                m.start_time
-            FROM pick p
-            JOIN user u ON p.user_id = u.id
-            JOIN match m ON p.match_id = m.id
-            JOIN team t ON p.chosen_team_id = t.id
-            JOIN team at ON m.away_team_id = at.id
-            JOIN team ht ON m.home_team_id = ht.id
-            ORDER BY m.week, u.username
-        """)
-        
-        picks = cursor.fetchall()
+        with engine.connect() as conn:
+            picks = conn.execute(
+                select(match_table.c.week, user_table.c.username, chosen.c.name.label('chosen_team'),
+                       match_table.c.id.label('match_id'), away.c.name.label('away_team'),
+                       home.c.name.label('home_team'), match_table.c.start_time)
+                .select_from(pick_table)
+                .join(user_table, pick_table.c.user_id == user_table.c.id)
+                .join(match_table, pick_table.c.match_id == match_table.c.id)
+                .join(chosen, pick_table.c.chosen_team_id == chosen.c.id)
+                .join(away, match_table.c.away_team_id == away.c.id)
+                .join(home, match_table.c.home_team_id == home.c.id)
+                .order_by(match_table.c.week, user_table.c.username)).mappings().fetchall()
         
         # Organize by week
         picks_by_week = {}
@@ -225,11 +263,9 @@ def picks_summary():
                 'chosen_team': pick['chosen_team'],
                 'match': f"{pick['away_team']} @ {pick['home_team']}",
                 'match_id': pick['match_id'],
-                'start_time': pick['start_time']
+                'start_time': str(pick['start_time']) if pick['start_time'] else None
             })
         
-        conn.close()
-        
         return jsonify({
             'picks_by_week': picks_by_week,
             'total_picks': len(picks),
@@ -239,9 +275,44 @@ def picks_summary():
     except Exception as e:
         return jsonify({'error': f'Picks summary failed: {str(e)}'}), 500
 
+@db_sync_bp.route('/api/database/changes', methods=['GET'])
+def database_changes():
+    """Get the net row changes since a change-log sequence number"""
+    try:
+        db_path = get_database_path()
+        
+        if database_missing(db_path):
+            return jsonify({'error': 'Database not found'}), 404
+        
+        since = request.args.get('since', 0, type=int)
+        limit = min(request.args.get('limit', 5000, type=int), 50000)
+        
+        try:
+            change_set = get_changes_since(get_connection(db_path), since, limit)
+        except ChangesPruned as e:
+            # The replica is older than the change log: it has to download the database again
+            return jsonify({
+                'error': str(e),
+                'resync_required': True,
+                'since': e.since,
+                'oldest_seq': e.oldest_seq
+            }), 410
+        
+        change_set['timestamp'] = datetime.now().isoformat()
+        return jsonify(change_set)
+        
+    except Exception as e:
+        return jsonify({'error': f'Change feed failed: {str(e)}'}), 500
+
 # Helper function to register the blueprint
 def register_database_sync_api(app):
     """Register the database sync API with the Flask app"""
     app.register_blueprint(db_sync_bp)
+    
+    # Make sure every write to the live database lands in the change log
+    db_path = app.config.get('DATABASE_PATH')
+    if not database_missing(db_path):
+        install_change_log(get_connection(db_path))
+    
     return db_sync_bp
 
@@ -11,12 +11,15 @@ from datetime import datetime
 import tempfile
 import zipfile
 
+from change_log import ChangesPruned, apply_changes, get_latest_seq
+
 class DatabaseSyncClient:
     """Client for synchronizing with live NFL PickEm database"""
     
     def __init__(self, base_url: str = "https://nfl-pickem-2025-v2.onrender.com"):
         self.base_url = base_url.rstrip('/')
         self.local_db_path = 'instance/nfl_pickem.db'
+        self.last_export_timestamp = None
         
     def get_database_status(self) -> dict:
         """Get status of the live database"""
@@ -28,14 +31,43 @@ class DatabaseSyncClient:
             print(f"❌ Failed to get database status: {e}")
             return {}
     
+    def iter_database_export(self, compressed: bool = True):
+        """Stream the NDJSON export, yielding (table_name, columns, row) tuples as lines arrive"""
+        params = {'gzip': 1} if compressed else {}
+        headers = {'Accept-Encoding': 'gzip'} if compressed else {'Accept-Encoding': 'identity'}
+        
+        with requests.get(f"{self.base_url}/api/database/export", params=params, headers=headers,
+                          stream=True, timeout=60) as response:
+            response.raise_for_status()
+            
+            table_name = None
+            columns = []
+            for line in response.iter_lines(chunk_size=64 * 1024):
+                if not line:
+                    continue
+                record = json.loads(line)
+                
+                if isinstance(record, list):
+                    yield table_name, columns, record
+                elif record.get('type') == 'table':
+                    table_name = record['name']
+                    columns = record['columns']
+                    yield table_name, columns, None
+                elif record.get('type') == 'export':
+                    self.last_export_timestamp = record.get('export_timestamp')
+    
     def export_database_json(self) -> dict:
-        """Export complete database as JSON"""
+        """Export complete database as JSON (built incrementally from the NDJSON stream)"""
         try:
             print("📡 Fetching database export from live application...")
-            response = requests.get(f"{self.base_url}/api/database/export", timeout=60)
-            response.raise_for_status()
+            data = {'export_timestamp': None, 'tables': {}}
+            
+            for table_name, columns, row in self.iter_database_export():
+                rows = data['tables'].setdefault(table_name, [])
+                if row is not None:
+                    rows.append(dict(zip(columns, row)))
             
-            data = response.json()
+            data['export_timestamp'] = self.last_export_timestamp
             print(f"✅ Database export successful (exported at {data.get('export_timestamp')})")
             return data
         except Exception as e:
@@ -72,116 +104,100 @@ class DatabaseSyncClient:
             print(f"❌ Failed to get picks summary: {e}")
             return {}
     
-    def sync_local_database(self) -> bool:
-        """Synchronize local database with live data"""
+    def get_changes(self, since: int) -> dict:
+        """Get the net row changes on the live database since a change-log sequence number"""
+        response = requests.get(f"{self.base_url}/api/database/changes", params={'since': since}, timeout=30)
+        if response.status_code == 410:
+            raise ChangesPruned(since, response.json().get('oldest_seq'))
+        response.raise_for_status()
+        return response.json()
+    
+    def get_local_sync_seq(self):
+        """Get the last change-log sequence applied to the local replica (None if never synced)"""
+        if not os.path.exists(self.local_db_path):
+            return None
+        
+        conn = sqlite3.connect(self.local_db_path)
         try:
-            # Get live database export
-            export_data = self.export_database_json()
-            if not export_data:
-                return False
-            
-            # Ensure local directory exists
-            os.makedirs('instance', exist_ok=True)
-            
-            # Create backup of current local database
-            if os.path.exists(self.local_db_path):
-                backup_path = f"{self.local_db_path}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                os.rename(self.local_db_path, backup_path)
-                print(f"📦 Local database backed up to: {backup_path}")
-            
-            # Create new database from export
-            conn = sqlite3.connect(self.local_db_path)
-            cursor = conn.cursor()
-            
-            # Recreate tables and data
-            tables = export_data.get('tables', {})
-            
-            for table_name, rows in tables.items():
-                if not rows:
-                    continue
-                
-                # Get column names from first row
-                columns = list(rows[0].keys())
-                
-                # Create table (simplified - assumes standard structure)
-                if table_name == 'user':
-                    cursor.execute('''
-                        CREATE TABLE user (
-                            id INTEGER PRIMARY KEY,
-                            username TEXT NOT NULL,
-                            password TEXT NOT NULL
-                        )
-                    ''')
-                elif table_name == 'team':
-                    cursor.execute('''
-                        CREATE TABLE team (
-                            id INTEGER PRIMARY KEY,
-                            name TEXT NOT NULL,
-                            abbreviation TEXT,
-                            logo_url TEXT
-                        )
-                    ''')
-                elif table_name == 'match':
-                    cursor.execute('''
-                        CREATE TABLE match (
-                            id INTEGER PRIMARY KEY,
-                            week INTEGER NOT NULL,
-                            away_team_id INTEGER,
-                            home_team_id INTEGER,
-                            start_time TEXT,
-                            away_score INTEGER,
-                            home_score INTEGER,
-                            is_finished BOOLEAN,
-                            FOREIGN KEY (away_team_id) REFERENCES team (id),
-                            FOREIGN KEY (home_team_id) REFERENCES team (id)
-                        )
-                    ''')
-                elif table_name == 'pick':
-                    cursor.execute('''
-                        CREATE TABLE pick (
-                            id INTEGER PRIMARY KEY,
-                            user_id INTEGER,
-                            match_id INTEGER,
-                            chosen_team_id INTEGER,
-                            FOREIGN KEY (user_id) REFERENCES user (id),
-                            FOREIGN KEY (match_id) REFERENCES match (id),
-                            FOREIGN KEY (chosen_team_id) REFERENCES team (id)
-                        )
-                    ''')
-                elif table_name == 'eliminated_team':
-                    cursor.execute('''
-                        CREATE TABLE eliminated_team (
-                            id INTEGER PRIMARY KEY,
-                            user_id INTEGER,
-                            team_id INTEGER,
-                            elimination_type TEXT,
-                            FOREIGN KEY (user_id) REFERENCES user (id),
-                            FOREIGN KEY (team_id) REFERENCES team (id)
-                        )
-                    ''')
-                elif table_name == 'team_winner_usage':
-                    cursor.execute('''
-                        CREATE TABLE team_winner_usage (
-                            id INTEGER PRIMARY KEY,
-                            user_id INTEGER,
-                            team_id INTEGER,
-                            usage_count INTEGER,
-                            FOREIGN KEY (user_id) REFERENCES user (id),
-                            FOREIGN KEY (team_id) REFERENCES team (id)
-                        )
-                    ''')
+            row = conn.execute("SELECT value FROM sync_state WHERE key = 'last_seq'").fetchone()
+            return int(row[0]) if row else None
+        except sqlite3.OperationalError:
+            return None
+        finally:
+            conn.close()
+    
+    def bootstrap_local_database(self) -> bool:
+        """Replace the local replica with a full copy of the live database file"""
+        os.makedirs(os.path.dirname(self.local_db_path) or '.', exist_ok=True)
+        
+        download_path = self.download_database_file(f"{self.local_db_path}.download")
+        if not download_path:
+            return False
+        
+        # The copy carries its own change log, so it knows exactly which sequence it reflects
+        conn = sqlite3.connect(download_path)
+        try:
+            with conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT)")
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('last_seq', ?)",
+                    (str(get_latest_seq(conn)),)
+                )
+        finally:
+            conn.close()
+        
+        if os.path.exists(self.local_db_path):
+            backup_path = f"{self.local_db_path}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            os.replace(self.local_db_path, backup_path)
+            print(f"📦 Local database backed up to: {backup_path}")
+        
+        os.replace(download_path, self.local_db_path)
+        print(f"✅ Local replica initialized from full download")
+        return True
+    
+    def apply_changes_since(self, since: int):
+        """Apply the live changes after `since` to the local replica; returns (new sequence, rows touched)"""
+        conn = sqlite3.connect(self.local_db_path)
+        touched = 0
+        try:
+            with conn:  # One transaction for the whole delta
+                while True:
+                    change_set = self.get_changes(since)
+                    touched += apply_changes(conn, change_set.get('changes', {}))
+                    since = change_set.get('to_seq', since)
+                    if not change_set.get('has_more'):
+                        break
                 
-                # Insert data
-                placeholders = ', '.join(['?' for _ in columns])
-                for row in rows:
-                    values = [row[col] for col in columns]
-                    cursor.execute(f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})", values)
-            
-            conn.commit()
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('last_seq', ?)",
+                    (str(since),)
+                )
+        finally:
             conn.close()
+        return since, touched
+    
+    def sync_local_database(self) -> bool:
+        """Synchronize local database with live data by applying only the changed rows"""
+        try:
+            since = self.get_local_sync_seq()
+            if since is None:
+                print("📥 No local replica yet, downloading full database...")
+                if not self.bootstrap_local_database():
+                    return False
+                since = self.get_local_sync_seq()
+            
+            start_seq = since
+            try:
+                since, touched = self.apply_changes_since(since)
+            except ChangesPruned:
+                print("📥 Live change log no longer reaches back to the local replica, downloading full database...")
+                if not self.bootstrap_local_database():
+                    return False
+                start_seq = self.get_local_sync_seq()
+                since, touched = self.apply_changes_since(start_seq)
             
             print(f"✅ Local database synchronized successfully!")
-            print(f"📊 Synced {len(tables)} tables with {sum(len(rows) for rows in tables.values())} total records")
+            print(f"📊 Applied changes {start_seq} → {since}: {touched} rows updated")
             return True
             
         except Exception as e:
@@ -7,12 +7,15 @@ ensuring data persistence even when the server restarts.
 
 import os
 import sqlite3
-import shutil
-import json
 import time
-from datetime import datetime
 import logging
 
+from backup_store import BackupStore, read_data_version
+from change_log import prune_change_log
+from database import get_connection, get_database_path
+from db_snapshot import restore_snapshot
+from mutation_journal import MutationJournal
+
 # Configure logging
 logging.basicConfig(
     filename='db_backup.log',
@@ -21,10 +24,19 @@ logging.basicConfig(
 )
 
 # Constants
-DB_PATH = 'instance/nfl_pickem.db'
+DB_PATH = get_database_path()
 BACKUP_DIR = 'db_backups'
-BACKUP_INTERVAL = 300  # 5 minutes in seconds
-BACKUP_COUNT = 5  # Keep 5 recent backups
+BACKUP_INTERVAL = 300  # 5 minutes in seconds (maximum age of unsaved changes)
+BACKUP_POLL_INTERVAL = 30  # Seconds between cheap change checks
+
+_store = None
+
+def get_store():
+    """Get the shared deduplicated backup store."""
+    global _store
+    if _store is None:
+        _store = BackupStore(os.path.join(BACKUP_DIR, 'store'))
+    return _store
 
 def ensure_backup_dir():
     """Ensure the backup directory exists."""
@@ -32,35 +44,25 @@ def ensure_backup_dir():
         os.makedirs(BACKUP_DIR)
         logging.info(f"Created backup directory: {BACKUP_DIR}")
 
-def create_backup():
-    """Create a backup of the SQLite database."""
+def create_backup(db_path=None, reason='scheduled'):
+    """Create a backup of the SQLite database in the deduplicated store."""
+    db_path = db_path or DB_PATH
     try:
         ensure_backup_dir()
         
         # Check if database exists
-        if not os.path.exists(DB_PATH):
-            logging.warning(f"Database not found at {DB_PATH}, skipping backup")
+        if not os.path.exists(db_path):
+            logging.warning(f"Database not found at {db_path}, skipping backup")
             return False
         
-        # Create timestamp for backup filename
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_path = os.path.join(BACKUP_DIR, f'nfl_pickem_{timestamp}.db')
-        
-        # Copy the database file
-        shutil.copy2(DB_PATH, backup_path)
-        logging.info(f"Database backup created: {backup_path}")
-        
-        # Create metadata file with timestamp
-        metadata = {
-            'timestamp': timestamp,
-            'created_at': datetime.now().isoformat(),
-            'db_size': os.path.getsize(backup_path)
-        }
+        # Take a consistent online snapshot and store only the chunks that changed
+        manifest = get_store().add_snapshot(db_path, reason=reason)
+        logging.info(
+            f"Database backup created: {manifest['id']} ({reason}, version {manifest['data_version']}, "
+            f"{manifest['stored_bytes']} new bytes)"
+        )
         
-        with open(f"{backup_path}.meta", 'w') as f:
-            json.dump(metadata, f)
-        
-        # Clean up old backups
+        # Apply the retention tiers
         cleanup_old_backups()
         
         return True
@@ -68,71 +70,123 @@ def create_backup():
         logging.error(f"Backup failed: {str(e)}")
         return False
 
+def get_latest_backup_version():
+    """Get the data version recorded for the latest backup (None if unknown)."""
+    try:
+        manifest = get_store().find_snapshot('latest')
+    except OSError:
+        return None
+    return manifest.get('data_version') if manifest else None
+
+def backup_if_changed(db_path=None, reason='scheduled'):
+    """Create a backup only if the data version moved past the latest backup."""
+    db_path = db_path or DB_PATH
+    try:
+        current_version = read_data_version(db_path)
+    except sqlite3.Error as e:
+        logging.error(f"Could not read data version: {str(e)}")
+        return create_backup(db_path, reason)
+    
+    # Without a change log (version 0) we cannot tell, so fall back to backing up
+    if current_version and current_version == get_latest_backup_version():
+        logging.info(f"Database unchanged since last backup (version {current_version}), skipping")
+        return False
+    
+    return create_backup(db_path, reason)
+
+class DatabaseChangeWatcher:
+    """Detects commits from other connections via PRAGMA data_version on one long-lived connection."""
+    
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DB_PATH
+        self.conn = None
+        self.last_version = None
+    
+    def has_changed(self):
+        """Return True if another connection committed since the previous call (always True on the first call)."""
+        if self.conn is None:
+            self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        changed = version != self.last_version
+        self.last_version = version
+        return changed
+    
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
 def cleanup_old_backups():
-    """Keep only the most recent backups."""
+    """Drop backups outside the hourly/daily/season-week retention tiers."""
     try:
-        ensure_backup_dir()
-        
-        # Get all backup files
-        backups = [f for f in os.listdir(BACKUP_DIR) if f.endswith('.db')]
-        
-        # Sort by creation time (newest first)
-        backups.sort(key=lambda x: os.path.getctime(os.path.join(BACKUP_DIR, x)), reverse=True)
-        
-        # Remove old backups
-        if len(backups) > BACKUP_COUNT:
-            for old_backup in backups[BACKUP_COUNT:]:
-                old_path = os.path.join(BACKUP_DIR, old_backup)
-                os.remove(old_path)
-                # Also remove metadata file if it exists
-                meta_path = f"{old_path}.meta"
-                if os.path.exists(meta_path):
-                    os.remove(meta_path)
-                logging.info(f"Removed old backup: {old_backup}")
+        for snapshot_id in get_store().prune():
+            logging.info(f"Removed old backup: {snapshot_id}")
     except Exception as e:
         logging.error(f"Cleanup failed: {str(e)}")
 
-def get_latest_backup():
-    """Get the path to the latest backup file."""
+def prune_covered_changes(db_path=None):
+    """Prune change log rows that both the mutation journal and the latest backup already cover."""
+    db_path = db_path or DB_PATH
+    latest_backup_version = get_latest_backup_version()
+    if not latest_backup_version:
+        return 0
+    
+    covered_seq = latest_backup_version
+    journal = MutationJournal(db_path)
+    if os.path.exists(journal.journal_path):
+        covered_seq = min(covered_seq, journal.last_seq())
+    
     try:
-        ensure_backup_dir()
-        
-        # Get all backup files
-        backups = [f for f in os.listdir(BACKUP_DIR) if f.endswith('.db')]
-        
-        if not backups:
-            logging.warning("No backups found")
-            return None
-        
-        # Sort by creation time (newest first)
-        backups.sort(key=lambda x: os.path.getctime(os.path.join(BACKUP_DIR, x)), reverse=True)
-        
-        # Return the newest backup
-        return os.path.join(BACKUP_DIR, backups[0])
-    except Exception as e:
-        logging.error(f"Failed to get latest backup: {str(e)}")
-        return None
+        deleted = prune_change_log(get_connection(db_path), covered_seq)
+    except sqlite3.Error as e:
+        logging.error(f"Change log pruning failed: {str(e)}")
+        return 0
+    if deleted:
+        logging.info(f"Pruned {deleted} change log rows up to sequence {covered_seq}")
+    return deleted
+
+def get_legacy_backups():
+    """Get full-copy .db backups from before the backup store, newest first."""
+    ensure_backup_dir()
+    backups = [os.path.join(BACKUP_DIR, f) for f in os.listdir(BACKUP_DIR) if f.endswith('.db')]
+    backups.sort(key=os.path.getctime, reverse=True)
+    return backups
 
 def restore_from_backup():
-    """Restore the database from the latest backup."""
+    """Restore the database from the latest backup that passes an integrity check."""
     try:
         # Check if database directory exists
-        if not os.path.exists('instance'):
-            os.makedirs('instance')
-            logging.info("Created instance directory")
-        
-        # Get the latest backup
-        latest_backup = get_latest_backup()
-        
-        if not latest_backup:
-            logging.warning("No backup found to restore from")
-            return False
+        db_dir = os.path.dirname(DB_PATH)
+        if not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+            logging.info(f"Created database directory: {db_dir}")
         
-        # Copy the backup to the database location
-        shutil.copy2(latest_backup, DB_PATH)
-        logging.info(f"Database restored from backup: {latest_backup}")
-        
-        return True
+        ensure_backup_dir()
+        store = get_store()
+        
+        # Newest first; skip any snapshot that fails verification
+        for manifest in reversed(store.list_snapshots()):
+            restore_path = os.path.join(BACKUP_DIR, f"restore_{manifest['id']}.db")
+            try:
+                store.materialize(manifest, restore_path)
+                if restore_snapshot(restore_path, DB_PATH):
+                    logging.info(f"Database restored from backup: {manifest['id']}")
+                    return True
+            except (OSError, ValueError) as e:
+                logging.warning(f"Skipping damaged backup {manifest['id']}: {str(e)}")
+            finally:
+                if os.path.exists(restore_path):
+                    os.remove(restore_path)
+        
+        for backup_path in get_legacy_backups():
+            if restore_snapshot(backup_path, DB_PATH):
+                logging.info(f"Database restored from legacy backup: {backup_path}")
+                return True
+            logging.warning(f"Skipping damaged backup: {backup_path}")
+        
+        logging.error("No valid backup found to restore from")
+        return False
     except Exception as e:
         logging.error(f"Restore failed: {str(e)}")
         return False
@@ -144,26 +198,39 @@ def check_db_exists():
     
     try:
         # Try to open the database to verify it's valid
-        conn = sqlite3.connect(DB_PATH)
-        conn.close()
+        get_connection(DB_PATH)
         return True
     except sqlite3.Error:
         return False
 
 def run_backup_service():
-    """Run the backup service in a loop."""
+    """Run the backup service in a loop, snapshotting only when the data changed."""
     logging.info("Starting database backup service")
     
+    watcher = DatabaseChangeWatcher(DB_PATH)
+    journal = MutationJournal(DB_PATH)
+    pending_since = None  # When the first unsaved change was seen
+    
     while True:
         try:
-            # Check if database exists and create backup
             if check_db_exists():
-                create_backup()
+                if watcher.has_changed():
+                    # Journal every change promptly, even from writers without their own hook
+                    journal.capture()
+                    if pending_since is None:
+                        pending_since = time.time()
+                
+                # Coalesce bursts of writes: back up at most once per BACKUP_INTERVAL
+                if pending_since is not None and time.time() - pending_since >= BACKUP_INTERVAL:
+                    backup_if_changed()
+                    prune_covered_changes()
+                    pending_since = None
             
-            # Sleep for the backup interval
-            time.sleep(BACKUP_INTERVAL)
+            # Sleep until the next change check
+            time.sleep(BACKUP_POLL_INTERVAL)
         except Exception as e:
             logging.error(f"Backup service error: {str(e)}")
+            watcher.close()
             time.sleep(60)  # Sleep for a minute on error
 
 if __name__ == "__main__":
@@ -0,0 +1,94 @@
+"""
+Database Snapshot Module for NFL PickEm App
+
+Takes consistent online snapshots of the live SQLite database with the
+sqlite3 backup API. Pages are copied in small steps with short sleeps in
+between, so the Flask app and the game validator can keep writing while a
+snapshot is running. Restores verify the snapshot before touching the live
+database. The live database is read and written through its shared
+connection (database.get_connection); snapshot files are plain rollback
+journal databases, so they can be opened read-only and copied as one file.
+"""
+
+import os
+import sqlite3
+import logging
+
+from database import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Constants
+SNAPSHOT_PAGES_PER_STEP = 256  # Pages copied per backup step (256 * 4 KB = 1 MB)
+SNAPSHOT_STEP_SLEEP = 0.01  # Seconds to yield the database between steps
+
+def create_snapshot(db_path, snapshot_path, pages=SNAPSHOT_PAGES_PER_STEP, sleep=SNAPSHOT_STEP_SLEEP):
+    """Copy db_path to snapshot_path as a consistent point-in-time snapshot"""
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Database not found at {db_path}")
+
+    snapshot_dir = os.path.dirname(snapshot_path)
+    if snapshot_dir:
+        os.makedirs(snapshot_dir, exist_ok=True)
+
+    # Write to a temporary file first so a crash never leaves a half-written snapshot behind
+    temp_path = f"{snapshot_path}.partial"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    target = sqlite3.connect(temp_path)
+    try:
+        get_connection(db_path).backup(target, pages=pages, sleep=sleep)
+        target.execute("PRAGMA journal_mode = DELETE")  # The copied header says WAL
+    finally:
+        target.close()
+
+    os.replace(temp_path, snapshot_path)
+    logger.info(f"Snapshot created: {snapshot_path}")
+    return snapshot_path
+
+def verify_snapshot(snapshot_path):
+    """Return True if the snapshot opens and passes PRAGMA integrity_check"""
+    if not os.path.exists(snapshot_path):
+        return False
+
+    try:
+        conn = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+        try:
+            result = conn.execute("PRAGMA integrity_check").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.error(f"Snapshot {snapshot_path} could not be checked: {e}")
+        return False
+
+    if result != [('ok',)]:
+        logger.error(f"Snapshot {snapshot_path} failed integrity check: {result[:5]}")
+        return False
+    return True
+
+def restore_snapshot(snapshot_path, db_path, pages=SNAPSHOT_PAGES_PER_STEP, sleep=SNAPSHOT_STEP_SLEEP):
+    """Verify snapshot_path and copy it over db_path; returns False if the snapshot is damaged"""
+    if not verify_snapshot(snapshot_path):
+        return False
+
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+
+    # Restoring through the backup API keeps the live file valid for open connections
+    source = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+    try:
+        if os.path.exists(db_path):
+            source.backup(get_connection(db_path), pages=pages, sleep=sleep)
+        else:
+            target = sqlite3.connect(db_path)
+            try:
+                source.backup(target, pages=pages, sleep=sleep)
+            finally:
+                target.close()
+    finally:
+        source.close()
+
+    logger.info(f"Database {db_path} restored from snapshot {snapshot_path}")
+    return True
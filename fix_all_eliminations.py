@@ -8,7 +8,10 @@ import sys
 import os
 sys.path.insert(0, '.')
 
-from app import app, db, User, Pick, Match, Team, EliminatedTeam, TeamWinnerUsage, TeamLoserUsage
+from app import create_app
+from models import db, User, Pick, Match, Team, EliminatedTeam, TeamWinnerUsage, TeamLoserUsage
+
+app = create_app()
 
 def fix_all_eliminations():
     with app.app_context():
@@ -2,26 +2,36 @@
 """
 Complete Database Fix Script
 Cleans up all wrong data and inserts correct Week 1 data with proper picks and results
+Runs on the configured database (DATABASE_URL, see database.py)
 """
 
-import sqlite3
 from datetime import datetime
 
+from sqlalchemy import delete, insert, select, update
+
+from database import get_engine, get_sqlite_path
+from models import EliminatedTeam, Match, Pick, Team, TeamLoserUsage, TeamWinnerUsage, User
+from season_analytics import get_season_analytics
+
+match_table = Match.__table__
+team_table = Team.__table__
+user_table = User.__table__
+pick_table = Pick.__table__
+eliminated_table = EliminatedTeam.__table__
+winner_usage_table = TeamWinnerUsage.__table__
+
 def fix_database():
     """Fix the database completely"""
     
-    conn = sqlite3.connect('instance/nfl_pickem.db')
-    cursor = conn.cursor()
+    engine = get_engine()
+    conn = engine.connect()
     
     print("🔧 Starting complete database cleanup...")
     
     # Step 1: Clear all wrong data
     print("Step 1: Clearing wrong data...")
-    cursor.execute("DELETE FROM pick")
-    cursor.execute("DELETE FROM match")
-    cursor.execute("DELETE FROM eliminated_team")
-    cursor.execute("DELETE FROM team_winner_usage")
-    cursor.execute("DELETE FROM team_loser_usage")
+    for table in [pick_table, eliminated_table, winner_usage_table, TeamLoserUsage.__table__, match_table]:
+        conn.execute(delete(table))
     
     # Step 2: Insert correct Week 1 matches with real results
     print("Step 2: Inserting correct Week 1 matches...")
@@ -100,7 +110,7 @@ def fix_database():
     
     # Get team IDs
     team_ids = {}
-    teams = cursor.execute("SELECT id, name FROM team").fetchall()
+    teams = conn.execute(select(team_table.c.id, team_table.c.name)).fetchall()
     for team in teams:
         team_ids[team[1]] = team[0]
     
@@ -111,17 +121,14 @@ def fix_database():
         away_team_id = team_ids[game['away_team']]
         winner_team_id = team_ids[game['winner']]
         
-        cursor.execute("""
-            INSERT INTO match (week, home_team_id, away_team_id, start_time, is_completed, 
-                             winner_team_id, home_score, away_score, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            game['week'], home_team_id, away_team_id, 
-            datetime(2025, 9, 7, 13, 0),  # Default time
-            True, winner_team_id, game['home_score'], game['away_score'], 'FINAL'
+        result = conn.execute(insert(match_table).values(
+            week=game['week'], home_team_id=home_team_id, away_team_id=away_team_id,
+            start_time=datetime(2025, 9, 7, 13, 0),  # Default time
+            is_completed=True, winner_team_id=winner_team_id, home_score=game['home_score'],
+            away_score=game['away_score'], status='FINAL'
         ))
         
-        match_id = cursor.lastrowid
+        match_id = result.inserted_primary_key[0]
         match_key = f"{game['away_team']} @ {game['home_team']}"
         match_ids[match_key] = match_id
         
@@ -140,7 +147,7 @@ def fix_database():
     
     # Get user IDs
     user_ids = {}
-    users = cursor.execute("SELECT id, username FROM user").fetchall()
+    users = conn.execute(select(user_table.c.id, user_table.c.username)).fetchall()
     for user in users:
         user_ids[user[1]] = user[0]
     
@@ -150,10 +157,7 @@ def fix_database():
         chosen_team_id = team_ids[pick_data['pick']]
         match_id = match_ids[pick_data['match_key']]
         
-        cursor.execute("""
-            INSERT INTO pick (user_id, match_id, chosen_team_id)
-            VALUES (?, ?, ?)
-        """, (user_id, match_id, chosen_team_id))
+        conn.execute(insert(pick_table).values(user_id=user_id, match_id=match_id, chosen_team_id=chosen_team_id))
         
         print(f"✅ Added pick: {pick_data['username']} -> {pick_data['pick']}")
     
@@ -167,41 +171,31 @@ def fix_database():
         match_id = match_ids[pick_data['match_key']]
         
         # Get the actual winner of the match
-        match_result = cursor.execute("""
-            SELECT t.name as winner_name
-            FROM match m
-            JOIN team t ON m.winner_team_id = t.id
-            WHERE m.id = ?
-        """, (match_id,)).fetchone()
-        
-        actual_winner = match_result[0]
+        actual_winner = conn.execute(
+            select(team_table.c.name)
+            .select_from(match_table)
+            .join(team_table, match_table.c.winner_team_id == team_table.c.id)
+            .where(match_table.c.id == match_id)).scalar()
         is_correct = chosen_team == actual_winner
         
         if is_correct:
             # Check if team winner usage already exists
-            existing = cursor.execute("""
-                SELECT id, usage_count FROM team_winner_usage 
-                WHERE user_id = ? AND team_id = ?
-            """, (user_id, team_ids[chosen_team])).fetchone()
+            usage_filter = (winner_usage_table.c.user_id == user_id,
+                            winner_usage_table.c.team_id == team_ids[chosen_team])
+            existing = conn.execute(select(winner_usage_table.c.id).where(*usage_filter)).first()
             
             if existing:
-                cursor.execute("""
-                    UPDATE team_winner_usage SET usage_count = usage_count + 1
-                    WHERE user_id = ? AND team_id = ?
-                """, (user_id, team_ids[chosen_team]))
+                conn.execute(update(winner_usage_table).where(*usage_filter)
+                             .values(usage_count=winner_usage_table.c.usage_count + 1))
             else:
-                cursor.execute("""
-                    INSERT INTO team_winner_usage (user_id, team_id, usage_count)
-                    VALUES (?, ?, 1)
-                """, (user_id, team_ids[chosen_team]))
+                conn.execute(insert(winner_usage_table).values(user_id=user_id, team_id=team_ids[chosen_team],
+                                                               usage_count=1))
             
             print(f"✅ {pick_data['username']}: {chosen_team} CORRECT (1 point)")
         else:
             # Add to eliminated teams (as loser)
-            cursor.execute("""
-                INSERT INTO eliminated_team (user_id, team_id, elimination_type)
-                VALUES (?, ?, 'loser')
-            """, (user_id, team_ids[chosen_team]))
+            conn.execute(insert(eliminated_table).values(user_id=user_id, team_id=team_ids[chosen_team],
+                                                         elimination_type='loser'))
             
             print(f"❌ {pick_data['username']}: {chosen_team} WRONG (0 points) - eliminated as loser")
     
@@ -231,14 +225,10 @@ def fix_database():
         home_team_id = team_ids[game['home_team']]
         away_team_id = team_ids[game['away_team']]
         
-        cursor.execute("""
-            INSERT INTO match (week, home_team_id, away_team_id, start_time, is_completed, 
-                             winner_team_id, home_score, away_score, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            game['week'], home_team_id, away_team_id, 
-            datetime(2025, 9, 14, 13, 0),  # Week 2 time
-            False, None, None, None, 'SCHEDULED'
+        conn.execute(insert(match_table).values(
+            week=game['week'], home_team_id=home_team_id, away_team_id=away_team_id,
+            start_time=datetime(2025, 9, 14, 13, 0),  # Week 2 time
+            is_completed=False, winner_team_id=None, home_score=None, away_score=None, status='SCHEDULED'
         ))
         
         print(f"✅ Added Week 2: {game['away_team']} @ {game['home_team']}")
@@ -255,46 +245,34 @@ def fix_database():
 def verify_database():
     """Verify the database is now correct"""
     
-    conn = sqlite3.connect('instance/nfl_pickem.db')
-    conn.row_factory = sqlite3.Row
+    engine = get_engine()
+    conn = engine.connect()
     
     print("\n=== VERIFICATION RESULTS ===")
     
-    # Check user scores
-    users = conn.execute("SELECT id, username FROM user").fetchall()
-    for user in users:
-        # Count correct picks
-        correct_picks = conn.execute("""
-            SELECT COUNT(*) as count
-            FROM pick p
-            JOIN match m ON p.match_id = m.id
-            JOIN team t ON p.chosen_team_id = t.id
-            WHERE p.user_id = ? AND m.winner_team_id = p.chosen_team_id
-        """, (user['id'],)).fetchone()
-        
-        score = correct_picks['count']
-        print(f"{user['username']}: {score} points")
+    # Check user scores (computed for all users at once from the pick matrix)
+    analytics = get_season_analytics(get_sqlite_path(engine))
+    for username, score in zip(analytics.usernames, analytics.scores):
+        print(f"{username}: {score} points")
     
     # Check eliminations
     print("\n=== ELIMINATED TEAMS ===")
-    eliminations = conn.execute("""
-        SELECT u.username, t.name as team_name, e.elimination_type
-        FROM eliminated_team e
-        JOIN user u ON e.user_id = u.id
-        JOIN team t ON e.team_id = t.id
-    """).fetchall()
+    eliminations = conn.execute(
+        select(user_table.c.username, team_table.c.name.label('team_name'), eliminated_table.c.elimination_type)
+        .select_from(eliminated_table)
+        .join(user_table, eliminated_table.c.user_id == user_table.c.id)
+        .join(team_table, eliminated_table.c.team_id == team_table.c.id)).mappings().fetchall()
     
     for elim in eliminations:
         print(f"{elim['username']}: {elim['team_name']} ({elim['elimination_type']})")
     
     # Check team winner usage
     print("\n=== TEAM WINNER USAGE ===")
-    usage = conn.execute("""
-        SELECT u.username, t.name as team_name, tw.usage_count
-        FROM team_winner_usage tw
-        JOIN user u ON tw.user_id = u.id
-        JOIN team t ON tw.team_id = t.id
-    """).fetchall()
+    usage = conn.execute(
+        select(user_table.c.username, team_table.c.name.label('team_name'), winner_usage_table.c.usage_count)
+        .select_from(winner_usage_table)
+        .join(user_table, winner_usage_table.c.user_id == user_table.c.id)
+        .join(team_table, winner_usage_table.c.team_id == team_table.c.id)).mappings().fetchall()
     
     for use in usage:
         print(f"{use['username']}: {use['team_name']} used {use['usage_count']}x as winner")
@@ -3,7 +3,10 @@
 Fix missing eliminations for existing picks
 """
 
-from app import app, db, User, Team, Match, Pick, EliminatedTeam, TeamLoserUsage
+from app import create_app
+from models import db, User, Team, Match, Pick, EliminatedTeam, TeamLoserUsage
+
+app = create_app()
 
 def fix_eliminations():
     with app.app_context():
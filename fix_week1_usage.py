@@ -3,7 +3,10 @@
 Korrigiere die fehlenden TeamWinnerUsage Einträge für Woche 1
 """
 
-from app import app, db, Pick, TeamWinnerUsage, Team, User
+from app import create_app
+from models import db, Pick, TeamWinnerUsage, Team, User
+
+app = create_app()
 
 def fix_week1_usage():
     with app.app_context():
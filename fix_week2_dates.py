@@ -3,10 +3,13 @@
 Korrigiere die Woche 2 Spielzeiten
 """
 
-from app import app, db, Match, Team
+from app import create_app
+from models import db, Match, Team
 from datetime import datetime
 import pytz
 
+app = create_app()
+
 def fix_week2_dates():
     with app.app_context():
         print("=== WOCHE 2 SPIELZEITEN KORRIGIEREN ===")
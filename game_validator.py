@@ -2,76 +2,95 @@
 """
 NFL PickEm Game Validator Service
 Automatically validates game results from ESPN and updates the database
+
+Matches are shared by all leagues of a season, so every week is fetched and
+stored once; eliminations and usage are then updated for the picks of every
+league that has picks on the finished games.
+
+All queries go through SQLAlchemy Core on the pooled engine of database.py,
+so the validator runs against SQLite or PostgreSQL. Backups, the mutation
+journal and the season snapshot need a SQLite file and are skipped otherwise.
 """
 
-import requests
-import sqlite3
 import json
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import time
-import schedule
 import threading
-
-# Configure logging with maximum deployment compatibility
 import os
-import logging
 
-# Simple console-only logging for deployment compatibility
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler()]
-)
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import get_data_dir, get_engine_for, get_file_version, get_sqlite_path, optimize_sqlite, prepare_database
+from leagues import resolve_season
+from models import EliminatedTeam, Match, Pick, Team, TeamWinnerUsage, User
+
+# requests, pytz and schedule are imported where they are used, so importing this
+# module (e.g. for get_leader_lock_path) stays cheap for the web app and scripts
+
 logger = logging.getLogger(__name__)
 
+match_table = Match.__table__
+team_table = Team.__table__
+pick_table = Pick.__table__
+user_table = User.__table__
+eliminated_table = EliminatedTeam.__table__
+winner_usage_table = TeamWinnerUsage.__table__
+
+home_team_table = team_table.alias('ht')
+away_team_table = team_table.alias('at')
+
+def completed_matches_query(season: int, week: int):
+    """Completed matches of a week with the names and ids of both teams"""
+    return (select(match_table.c.id, match_table.c.winner_team_id,
+                   match_table.c.home_team_id, match_table.c.away_team_id,
+                   home_team_table.c.name.label('home_team'), away_team_table.c.name.label('away_team'))
+            .select_from(match_table)
+            .join(home_team_table, match_table.c.home_team_id == home_team_table.c.id)
+            .join(away_team_table, match_table.c.away_team_id == away_team_table.c.id)
+            .where(match_table.c.season == season, match_table.c.week == week,
+                   match_table.c.is_completed == True))
+
 class NFLGameValidator:
     """Validates NFL game results and updates the database"""
     
     def __init__(self, db_path: str = None):
-        # Use relative path for Render compatibility
-        if db_path is None:
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            # Try multiple possible database locations
-            possible_paths = [
-                os.path.join(current_dir, 'instance', 'nfl_pickem.db'),
-                os.path.join(current_dir, 'nfl_pickem.db'),
-                'instance/nfl_pickem.db',
-                'nfl_pickem.db'
-            ]
-            
-            db_path = None
-            for path in possible_paths:
-                if os.path.exists(path):
-                    db_path = path
-                    break
-            
-            # If no database found, use the first path (will be created if needed)
-            if db_path is None:
-                db_path = possible_paths[0]
-                # Ensure instance directory exists
-                instance_dir = os.path.dirname(db_path)
-                if not os.path.exists(instance_dir):
-                    os.makedirs(instance_dir, exist_ok=True)
-        
-        self.db_path = db_path
+        # db_path selects a SQLite file; without it the configured database (DATABASE_URL) is used
+        self.engine = get_engine_for(db_path)
+        self.db_path = get_sqlite_path(self.engine)  # None on a server database
         self.espn_base_url = "https://site.api.espn.com/apis/site/v2/sports/football/nfl"
+        self._kickoffs = None  # (cache key, [(week, kickoff), ...]) ordered by kickoff
+        
+        # Missing tables are created; databases from before leagues and seasons get the scope columns
+        prepare_database(self.engine)
         
-    def get_database_connection(self) -> sqlite3.Connection:
-        """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def get_database_connection(self) -> Connection:
+        """Get a pooled database connection"""
+        return self.engine.connect()
     
     def row_to_dict(self, row) -> dict:
-        """Convert sqlite3.Row to dictionary for safe .get() access"""
+        """Convert a result row to dictionary for safe .get() access"""
         if row is None:
             return {}
-        return dict(row)
+        return dict(row._mapping)
+    
+    def get_current_season(self) -> int:
+        """Season to validate when none is given (NFL_SEASON, else the latest season with matches)"""
+        return resolve_season(self.read_latest_season)
     
-    def get_espn_scoreboard(self, week: int, year: int = 2025) -> Optional[Dict]:
+    def read_latest_season(self) -> Optional[int]:
+        """Latest season with matches (None if there are none)"""
+        with self.get_database_connection() as conn:
+            return conn.execute(select(func.max(match_table.c.season))).scalar()
+    
+    def get_espn_scoreboard(self, week: int, year: int = None) -> Optional[Dict]:
         """Get ESPN scoreboard data for a specific week"""
+        import requests
+        
+        year = year or self.get_current_season()
         try:
             url = f"{self.espn_base_url}/scoreboard"
             params = {
@@ -149,11 +168,9 @@ class NFLGameValidator:
             logger.error(f"Failed to parse ESPN game data: {e}")
             return None
     
-    def update_game_result(self, conn: sqlite3.Connection, match_id: int, result_data: Dict) -> bool:
+    def update_game_result(self, conn: Connection, match_id: int, result_data: Dict) -> bool:
         """Update game result in the database"""
         try:
-            cursor = conn.cursor()
-            
             # Safely extract required data
             winner_team_id = result_data.get('winner_team_id')
             home_score = result_data.get('home_score')
@@ -165,40 +182,30 @@ class NFLGameValidator:
                 return False
             
             # Update the match with result
-            cursor.execute("""
-                UPDATE match 
-                SET is_completed = 1, winner_team_id = ?, home_score = ?, away_score = ?
-                WHERE id = ?
-            """, (winner_team_id, home_score, away_score, match_id))
+            result = conn.execute(
+                update(match_table)
+                .where(match_table.c.id == match_id)
+                .values(is_completed=True, winner_team_id=winner_team_id, home_score=home_score, away_score=away_score))
             
-            if cursor.rowcount == 0:
+            if result.rowcount == 0:
                 logger.warning(f"No match found with ID {match_id}")
+                conn.rollback()
                 return False
             
             conn.commit()
             logger.info(f"Updated match {match_id}: {result_text}")
             return True
             
-        except sqlite3.Error as e:
+        except SQLAlchemyError as e:
             logger.error(f"Database error updating match {match_id}: {e}")
             conn.rollback()
             return False
     
-    def calculate_user_points(self, conn: sqlite3.Connection, week: int) -> None:
+    def calculate_user_points(self, conn: Connection, week: int, season: int) -> None:
         """Calculate and update user points for completed games in a week"""
         try:
-            cursor = conn.cursor()
-            
             # Get all completed matches for the week
-            cursor.execute("""
-                SELECT m.id, m.winner_team_id, ht.name as home_team, at.name as away_team
-                FROM match m
-                JOIN team ht ON m.home_team_id = ht.id
-                JOIN team at ON m.away_team_id = at.id
-                WHERE m.week = ? AND m.is_completed = 1
-            """, (week,))
-            
-            completed_matches = cursor.fetchall()
+            completed_matches = conn.execute(completed_matches_query(season, week)).fetchall()
             
             for match in completed_matches:
                 match_dict = self.row_to_dict(match)
@@ -210,14 +217,11 @@ class NFLGameValidator:
                     continue
                 
                 # Get all picks for this match
-                cursor.execute("""
-                    SELECT p.id, p.user_id, p.chosen_team_id, u.username
-                    FROM pick p
-                    JOIN user u ON p.user_id = u.id
-                    WHERE p.match_id = ?
-                """, (match_id,))
-                
-                picks = cursor.fetchall()
+                picks = conn.execute(
+                    select(pick_table.c.id, pick_table.c.user_id, pick_table.c.chosen_team_id, user_table.c.username)
+                    .select_from(pick_table)
+                    .join(user_table, pick_table.c.user_id == user_table.c.id)
+                    .where(pick_table.c.match_id == match_id)).fetchall()
                 
                 for pick in picks:
                     # Safely extract pick data
@@ -239,25 +243,26 @@ class NFLGameValidator:
             conn.commit()
             logger.info(f"Updated points for Week {week}")
             
-        except sqlite3.Error as e:
+        except SQLAlchemyError as e:
             logger.error(f"Database error calculating points for Week {week}: {e}")
             conn.rollback()
     
-    def update_team_eliminations(self, conn: sqlite3.Connection, week: int) -> None:
-        """Update team eliminations based on completed games"""
+    def eliminate_team(self, conn: Connection, scope: Dict, team_id: int, elimination_type: str) -> None:
+        """Eliminate a team for the user of scope (league_id, season, user_id) unless it already is"""
+        already_eliminated = conn.execute(
+            select(eliminated_table.c.id).where(
+                eliminated_table.c.league_id == scope['league_id'], eliminated_table.c.season == scope['season'],
+                eliminated_table.c.user_id == scope['user_id'], eliminated_table.c.team_id == team_id,
+                eliminated_table.c.elimination_type == elimination_type)).first()
+        if already_eliminated is None:
+            conn.execute(insert(eliminated_table).values(team_id=team_id, elimination_type=elimination_type, **scope))
+    
+    def update_team_eliminations(self, conn: Connection, week: int, season: int) -> int:
+        """Update team eliminations based on completed games, for the picks of every league; returns the leagues updated"""
+        leagues = set()
         try:
-            cursor = conn.cursor()
-            
             # Get all completed matches for the week
-            cursor.execute("""
-                SELECT m.id, m.winner_team_id, ht.name as home_team, at.name as away_team
-                FROM match m
-                JOIN team ht ON m.home_team_id = ht.id
-                JOIN team at ON m.away_team_id = at.id
-                WHERE m.week = ? AND m.is_completed = 1
-            """, (week,))
-            
-            completed_matches = cursor.fetchall()
+            completed_matches = conn.execute(completed_matches_query(season, week)).fetchall()
             
             for match in completed_matches:
                 match_dict = self.row_to_dict(match)
@@ -269,119 +274,92 @@ class NFLGameValidator:
                     logger.warning(f"Missing match data: winner_id={winner_team_id}, home={home_team}, away={away_team}")
                     continue
                 
-                # Determine loser team name
-                if winner_team_id:
-                    # Get winner team name to determine loser
-                    cursor.execute("SELECT name FROM team WHERE id = ?", (winner_team_id,))
-                    winner_result = cursor.fetchone()
-                    if not winner_result:
-                        logger.warning(f"Could not find team with ID {winner_team_id}")
-                        continue
-                    winner_dict = self.row_to_dict(winner_result)
-                    winner_name = winner_dict.get('name')
-                    if not winner_name:
-                        logger.warning(f"Missing team name for ID {winner_team_id}")
-                        continue
-                    loser = home_team if away_team == winner_name else away_team
+                # Determine loser team from the winner
+                if winner_team_id == match_dict.get('away_team_id'):
+                    winner_name, loser, loser_team_id = away_team, home_team, match_dict.get('home_team_id')
+                elif winner_team_id == match_dict.get('home_team_id'):
+                    winner_name, loser, loser_team_id = home_team, away_team, match_dict.get('away_team_id')
                 else:
-                    continue  # Skip if no winner determined
+                    logger.warning(f"Winner {winner_team_id} did not play in match {match_dict.get('id')}")
+                    continue
                 
                 # Get all picks for this match where users picked the losing team
                 match_id = match_dict.get('id')
                 if not match_id:
                     logger.warning("Missing match ID")
                     continue
-                    
-                cursor.execute("""
-                    SELECT p.user_id, t.name as chosen_team_name, u.username
-                    FROM pick p
-                    JOIN user u ON p.user_id = u.id
-                    JOIN team t ON p.chosen_team_id = t.id
-                    WHERE p.match_id = ? AND t.name = ?
-                """, (match_id, loser))
                 
-                losing_picks = cursor.fetchall()
+                losing_picks = conn.execute(
+                    select(pick_table.c.user_id, pick_table.c.league_id, user_table.c.username)
+                    .select_from(pick_table)
+                    .join(user_table, pick_table.c.user_id == user_table.c.id)
+                    .where(pick_table.c.match_id == match_id, pick_table.c.chosen_team_id == loser_team_id)).fetchall()
                 
                 for pick in losing_picks:
                     # Safely extract pick data
                     pick_dict = self.row_to_dict(pick)
                     user_id = pick_dict.get('user_id')
+                    league_id = pick_dict.get('league_id')
                     username = pick_dict.get('username', 'Unknown')
                     
                     if user_id is None:
                         logger.warning("Missing user_id in losing pick")
                         continue
+                    leagues.add(league_id)
                     
                     # Add team to eliminated teams for this user (as loser)
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO eliminated_team (user_id, team_id, elimination_type)
-                        VALUES (?, (SELECT id FROM team WHERE name = ?), 'loser')
-                    """, (user_id, loser))
+                    self.eliminate_team(conn, {'league_id': league_id, 'season': season, 'user_id': user_id},
+                                        loser_team_id, 'loser')
                     
                     logger.info(f"Eliminated {loser} as loser for user {username}")
                 
                 # Update team winner usage count
-                cursor.execute("""
-                    SELECT p.user_id FROM pick p
-                    JOIN team t ON p.chosen_team_id = t.id
-                    WHERE p.match_id = ? AND t.name = ?
-                """, (match_id, winner_name))
-                
-                winner_picks = cursor.fetchall()
+                winner_picks = conn.execute(
+                    select(pick_table.c.user_id, pick_table.c.league_id)
+                    .where(pick_table.c.match_id == match_id, pick_table.c.chosen_team_id == winner_team_id)).fetchall()
                 
                 for pick in winner_picks:
                     # Safely extract user_id
                     pick_dict = self.row_to_dict(pick)
                     user_id = pick_dict.get('user_id')
+                    league_id = pick_dict.get('league_id')
                     if user_id is None:
                         logger.warning("Missing user_id in winner pick")
                         continue
+                    leagues.add(league_id)
+                    scope = {'league_id': league_id, 'season': season, 'user_id': user_id}
+                    usage_filter = (winner_usage_table.c.league_id == league_id, winner_usage_table.c.season == season,
+                                    winner_usage_table.c.user_id == user_id, winner_usage_table.c.team_id == winner_team_id)
                     # Check if usage already exists
-                    cursor.execute("""
-                        SELECT usage_count FROM team_winner_usage
-                        WHERE user_id = ? AND team_id = (SELECT id FROM team WHERE name = ?)
-                    """, (user_id, winner_name))
-                    
-                    existing = cursor.fetchone()
-                    if existing:
+                    existing_count = conn.execute(
+                        select(winner_usage_table.c.usage_count).where(*usage_filter)).scalar()
+                    if existing_count is not None:
                         # Update existing usage
-                        cursor.execute("""
-                            UPDATE team_winner_usage 
-                            SET usage_count = usage_count + 1
-                            WHERE user_id = ? AND team_id = (SELECT id FROM team WHERE name = ?)
-                        """, (user_id, winner_name))
-                        existing_dict = self.row_to_dict(existing)
-                        existing_count = existing_dict.get('usage_count', 0)
+                        conn.execute(update(winner_usage_table).where(*usage_filter)
+                                     .values(usage_count=winner_usage_table.c.usage_count + 1))
                         new_count = existing_count + 1
                     else:
                         # Insert new usage
-                        cursor.execute("""
-                            INSERT INTO team_winner_usage (user_id, team_id, usage_count)
-                            VALUES (?, (SELECT id FROM team WHERE name = ?), 1)
-                        """, (user_id, winner_name))
+                        conn.execute(insert(winner_usage_table).values(team_id=winner_team_id, usage_count=1, **scope))
                         new_count = 1
                     
                     # Check if team should be eliminated as winner (used 2 times)
                     if new_count >= 2:
-                        cursor.execute("""
-                            INSERT OR IGNORE INTO eliminated_team (user_id, team_id, elimination_type)
-                            VALUES (?, (SELECT id FROM team WHERE name = ?), 'winner')
-                        """, (user_id, winner_name))
+                        self.eliminate_team(conn, scope, winner_team_id, 'winner')
                         
                         logger.info(f"Eliminated {winner_name} as winner for user (2x usage limit)")
             
             conn.commit()
-            logger.info(f"Updated team eliminations for Week {week}")
+            logger.info(f"Updated team eliminations for Week {week} in {len(leagues)} leagues")
             
-        except sqlite3.Error as e:
+        except SQLAlchemyError as e:
             logger.error(f"Database error updating eliminations for Week {week}: {e}")
             conn.rollback()
+        return len(leagues)
     
-    def find_matching_game(self, conn: sqlite3.Connection, espn_game: Dict, week: int) -> Optional[int]:
+    def find_matching_game(self, conn: Connection, espn_game: Dict, week: int, season: int) -> Optional[int]:
         """Find matching game in database based on ESPN data"""
         try:
-            cursor = conn.cursor()
-            
             # Safely extract team names with fallback
             home_team = espn_game.get('home_team')
             away_team = espn_game.get('away_team')
@@ -390,50 +368,61 @@ class NFLGameValidator:
                 logger.warning(f"Missing team names in ESPN data: home={home_team}, away={away_team}")
                 return None
             
+            week_matches = (
+                select(match_table.c.id, home_team_table.c.name.label('home_team'),
+                       away_team_table.c.name.label('away_team'))
+                .select_from(match_table)
+                .join(home_team_table, match_table.c.home_team_id == home_team_table.c.id)
+                .join(away_team_table, match_table.c.away_team_id == away_team_table.c.id)
+                .where(match_table.c.season == season, match_table.c.week == week))
+            
             # Try exact match first
-            cursor.execute("""
-                SELECT m.id FROM match m
-                JOIN team ht ON m.home_team_id = ht.id
-                JOIN team at ON m.away_team_id = at.id
-                WHERE m.week = ? AND ht.name = ? AND at.name = ?
-            """, (week, home_team, away_team))
-            
-            result = cursor.fetchone()
+            result = conn.execute(week_matches.where(home_team_table.c.name == home_team,
+                                                     away_team_table.c.name == away_team)).first()
             if result:
-                return result['id']
+                return result.id
             
             # Try fuzzy matching (in case team names differ slightly)
-            cursor.execute("""
-                SELECT m.id, ht.name as home_team, at.name as away_team FROM match m
-                JOIN team ht ON m.home_team_id = ht.id
-                JOIN team at ON m.away_team_id = at.id
-                WHERE m.week = ? AND m.is_completed = 0
-            """, (week,))
-            
-            matches = cursor.fetchall()
+            matches = conn.execute(week_matches.where(match_table.c.is_completed == False)).fetchall()
             
             for match in matches:
                 # Check if team names contain each other (fuzzy match)
-                if (home_team in match['home_team'] or match['home_team'] in home_team) and \
-                   (away_team in match['away_team'] or match['away_team'] in away_team):
-                    logger.info(f"Fuzzy matched: {home_team} vs {away_team} -> {match['home_team']} vs {match['away_team']}")
-                    return match['id']
+                if (home_team in match.home_team or match.home_team in home_team) and \
+                   (away_team in match.away_team or match.away_team in away_team):
+                    logger.info(f"Fuzzy matched: {home_team} vs {away_team} -> {match.home_team} vs {match.away_team}")
+                    return match.id
             
             logger.warning(f"No matching game found for {away_team} @ {home_team} in Week {week}")
             return None
             
-        except sqlite3.Error as e:
+        except SQLAlchemyError as e:
             logger.error(f"Database error finding matching game: {e}")
             return None
     
-    def validate_week(self, week: int, year: int = 2025) -> bool:
-        """Validate all games for a specific week"""
-        logger.info(f"Starting validation for Week {week}")
+    def validate_week(self, week: int, year: int = None) -> bool:
+        """Validate all games for a specific week (of the current season unless year is given)"""
+        from validator_runs import ValidatorRun
         
-        # Get ESPN data
-        espn_data = self.get_espn_scoreboard(week, year)
+        run = ValidatorRun('week', week)
+        try:
+            run.season = year = year or self.get_current_season()
+            success = self._validate_week(run, week, year)
+        except Exception as e:
+            logger.error(f"Error validating Week {week}: {e}")
+            run.error(f"Error validating Week {week}: {e}")
+            success = False
+        self.record_run(run.finish(success))
+        return success
+    
+    def _validate_week(self, run, week: int, year: int) -> bool:
+        logger.info(f"Starting validation for Week {week} of {year}")
+        
+        # Get ESPN data (once per week, whatever the number of leagues)
+        with run.phase('fetch'):
+            espn_data = self.get_espn_scoreboard(week, year)
         if not espn_data:
             logger.error(f"Failed to get ESPN data for Week {week}")
+            run.error(f"Failed to get ESPN data for Week {week}")
             return False
         
         # Connect to database
@@ -441,121 +430,294 @@ class NFLGameValidator:
         
         try:
             games = espn_data.get('events', [])
-            updated_count = 0
+            run.count('events', len(games))
+            pending_results = []
             
             for game in games:
                 # Parse game result
-                result_data = self.parse_espn_game_result(game)
+                with run.phase('parse'):
+                    result_data = self.parse_espn_game_result(game)
                 if not result_data:
                     continue  # Game not completed yet
+                run.count('final')
                 
-                # Find matching game in database
-                match_id = self.find_matching_game(conn, result_data, week)
-                if not match_id:
-                    continue
-                
-                # Look up winner team ID
-                cursor = conn.cursor()
-                winner_name = result_data.get('winner_name')
-                if not winner_name:
-                    logger.warning("Missing winner_name in result data")
-                    continue
+                with run.phase('match'):
+                    # Find matching game in database
+                    match_id = self.find_matching_game(conn, result_data, week, year)
+                    if not match_id:
+                        run.count('unmatched')
+                        continue
                     
-                cursor.execute("SELECT id FROM team WHERE name = ?", (winner_name,))
-                winner_team = cursor.fetchone()
-                if winner_team:
-                    result_data['winner_team_id'] = winner_team['id']
-                else:
-                    logger.warning(f"Could not find team ID for winner: {winner_name}")
-                    continue
+                    # Look up winner team ID
+                    winner_name = result_data.get('winner_name')
+                    if not winner_name:
+                        logger.warning("Missing winner_name in result data")
+                        continue
+                    
+                    winner_team_id = conn.execute(
+                        select(team_table.c.id).where(team_table.c.name == winner_name)).scalar()
+                    if winner_team_id is not None:
+                        result_data['winner_team_id'] = winner_team_id
+                    else:
+                        logger.warning(f"Could not find team ID for winner: {winner_name}")
+                        run.count('unmatched')
+                        continue
+                    
+                    # Skip results that are already stored, so idle passes do not write
+                    if self.is_result_recorded(conn, match_id, result_data):
+                        run.count('already_recorded')
+                        continue
                 
-                # Update game result
-                if self.update_game_result(conn, match_id, result_data):
-                    updated_count += 1
+                pending_results.append((match_id, result_data))
+            
+            # End the read transaction, so the connection does not idle in it during the backup
+            conn.rollback()
+            
+            if not pending_results:
+                logger.info(f"No new completed games found for Week {week}")
+                return True
+            
+            # Guaranteed restore point right before the results land
+            with run.phase('backup'):
+                self.snapshot_database(f"before_week_{week}_results")
+            
+            updated_count = 0
+            with run.phase('apply'):
+                for match_id, result_data in pending_results:
+                    # Update game result
+                    if self.update_game_result(conn, match_id, result_data):
+                        updated_count += 1
+                        start_time = conn.execute(
+                            select(match_table.c.start_time).where(match_table.c.id == match_id)).scalar()
+                        if start_time:
+                            run.result_landed(match_id, start_time)
+                    else:
+                        run.error(f"Could not store result of match {match_id}")
+            run.count('updated', updated_count)
             
             if updated_count > 0:
                 # Calculate points and update eliminations
-                self.calculate_user_points(conn, week)
-                self.update_team_eliminations(conn, week)
+                with run.phase('eliminations'):
+                    self.calculate_user_points(conn, week, year)
+                    run.count('leagues', self.update_team_eliminations(conn, week, year))
                 
                 logger.info(f"Successfully validated Week {week}: {updated_count} games updated")
-            else:
-                logger.info(f"No new completed games found for Week {week}")
+                
+                # ... and right after them (journal first, so the results are recoverable immediately)
+                with run.phase('backup'):
+                    self.journal_changes()
+                    self.snapshot_database(f"after_week_{week}_results")
+                
+                with run.phase('optimize'):
+                    self.optimize_database(conn)
             
             return True
             
-        except Exception as e:
-            logger.error(f"Error validating Week {week}: {e}")
-            return False
         finally:
             conn.close()
     
+    def record_run(self, run) -> None:
+        """Log a finished run as one structured line and add it to the run history"""
+        record = run.to_dict()
+        logger.info(f"Validator run: {json.dumps(record)}")
+        try:
+            from validator_runs import ValidatorRunStore
+            ValidatorRunStore(self.db_path).add(run)
+        except Exception as e:
+            logger.error(f"Could not store validator run: {e}")
+    
+    def is_result_recorded(self, conn: Connection, match_id: int, result_data: Dict) -> bool:
+        """Check whether a match already holds exactly this final result"""
+        row = conn.execute(
+            select(match_table.c.id).where(
+                match_table.c.id == match_id, match_table.c.is_completed == True,
+                match_table.c.winner_team_id == result_data.get('winner_team_id'),
+                match_table.c.home_score == result_data.get('home_score'),
+                match_table.c.away_score == result_data.get('away_score'))).first()
+        return row is not None
+    
+    def optimize_database(self, conn: Connection) -> None:
+        """Refresh the query planner statistics after a batch of writes (SQLite only, cheap when nothing changed much)"""
+        try:
+            optimize_sqlite(conn)
+        except SQLAlchemyError as e:
+            logger.error(f"Could not optimize database: {e}")
+    
+    def journal_changes(self) -> None:
+        """Append the committed result writes to the mutation journal (SQLite only)"""
+        if self.db_path is None:
+            return
+        try:
+            from mutation_journal import MutationJournal
+            MutationJournal(self.db_path).capture()
+        except Exception as e:
+            logger.error(f"Could not journal changes: {e}")
+    
+    def snapshot_database(self, reason: str) -> None:
+        """Force a backup snapshot around a batch of result writes (SQLite only)"""
+        if self.db_path is None:
+            return
+        try:
+            from db_backup import create_backup
+            create_backup(db_path=self.db_path, reason=reason)
+        except Exception as e:
+            logger.error(f"Could not create {reason} snapshot: {e}")
+    
+    def get_kickoffs(self, season: int) -> List[Tuple[int, datetime]]:
+        """(week, kickoff) of every match of a season ordered by kickoff, cached until the database changes"""
+        if self.db_path is None:
+            key = None  # No file to check for changes: read the (small) kickoff list every time
+        else:
+            from backup_store import read_data_version
+            key = (read_data_version(self.db_path), get_file_version(self.db_path), season)
+        if key is None or self._kickoffs is None or self._kickoffs[0] != key:
+            with self.get_database_connection() as conn:
+                rows = conn.execute(
+                    select(match_table.c.week, match_table.c.start_time)
+                    .where(match_table.c.season == season)
+                    .order_by(match_table.c.start_time)).fetchall()
+            self._kickoffs = (key, [(row.week, row.start_time) for row in rows])
+        return self._kickoffs[1]
+    
+    def invalidate_kickoff_cache(self) -> None:
+        """Drop the cached kickoffs after the schedule changed"""
+        self._kickoffs = None
+    
+    def get_current_week(self, season: int = None) -> Optional[int]:
+        """Week of the latest kickoff of the season that has passed (None before the first kickoff)"""
+        import pytz
+        
+        # Kickoffs are stored as naive US Eastern times
+        now = datetime.now(pytz.timezone('US/Eastern')).replace(tzinfo=None)
+        current_week = None
+        for week, kickoff in self.get_kickoffs(season or self.get_current_season()):
+            if kickoff > now:
+                break
+            current_week = week
+        return current_week
+    
     def validate_current_week(self) -> bool:
         """Validate the current NFL week"""
-        # Determine current week based on date
-        current_date = datetime.now()
+        season = self.get_current_season()
+        current_week = self.get_current_week(season)
+        if current_week is None:
+            logger.info(f"NFL season {season} hasn't started yet")
+            return True
         
-        # NFL season starts September 4, 2025 (Week 1)
-        season_start = datetime(2025, 9, 4)
+        logger.info(f"Validating current week: {current_week} of {season}")
+        return self.validate_week(current_week, season)
+    
+    def get_open_weeks(self, season: int) -> List[int]:
+        """Regular season weeks of a season that are missing or still have games to play"""
+        all_completed = func.min(case((match_table.c.is_completed == True, 1), else_=0))
+        with self.get_database_connection() as conn:
+            completed_weeks = set(conn.execute(
+                select(match_table.c.week)
+                .where(match_table.c.season == season)
+                .group_by(match_table.c.week)
+                .having(all_completed == 1)).scalars())
+        return [week for week in range(1, 19) if week not in completed_weeks]
+    
+    def update_weekly_schedule(self) -> bool:
+        """Ingest the schedule of all open weeks from the score source and apply moved kickoffs"""
+        logger.info("Starting schedule update...")
         
-        if current_date < season_start:
-            logger.info("NFL season hasn't started yet")
-            return True
+        try:
+            from schedule_ingestion import ingest_schedule
+            season = self.get_current_season()
+            stats = ingest_schedule(self.db_path, weeks=self.get_open_weeks(season), year=season)
+        except Exception as e:
+            logger.error(f"Error updating schedule: {e}")
+            return False
         
-        # Calculate current week (rough estimation)
-        days_since_start = (current_date - season_start).days
-        current_week = min(18, max(1, (days_since_start // 7) + 1))
+        if stats['added'] or stats['updated']:
+            # Kickoffs drive pick locking and the validation schedule, so nothing may keep the old ones
+            self.invalidate_kickoff_cache()
+            self.journal_changes()
+            self.refresh_season_snapshot()
         
-        logger.info(f"Validating current week: {current_week}")
-        return self.validate_week(current_week)
+        flexed = sum(1 for change in stats['rescheduled'] if change['change'] == 'flexed')
+        logger.info(f"Schedule update done: {stats['added']} games added, {flexed} flexed, "
+                    f"{len(stats['rescheduled']) - flexed} rescheduled")
+        return True
+    
+    def refresh_season_snapshot(self) -> None:
+        """Rebuild an existing season snapshot so exports and stats show the new kickoffs (SQLite only)"""
+        if self.db_path is None:
+            return
+        try:
+            from season_snapshot import get_season_snapshot, snapshot_path_for
+            snapshot_path = snapshot_path_for(self.db_path)
+            if os.path.exists(snapshot_path):
+                get_season_snapshot(self.db_path, snapshot_path)
+        except Exception as e:
+            logger.error(f"Could not refresh season snapshot: {e}")
     
     def validate_all_incomplete_weeks(self) -> bool:
         """Validate all weeks that have incomplete games"""
-        conn = self.get_database_connection()
+        from validator_runs import ValidatorRun
+        
+        run = ValidatorRun('catch_up')
         
         try:
-            cursor = conn.cursor()
-            
-            # Get all weeks with incomplete games
-            cursor.execute("""
-                SELECT DISTINCT week 
-                FROM match 
-                WHERE completed = 0 AND week <= 18
-                ORDER BY week
-            """)
-            
-            incomplete_weeks = cursor.fetchall()
-            
-            success = True
-            for week_row in incomplete_weeks:
-                week = week_row['week']
-                if not self.validate_week(week):
-                    success = False
-            
-            return success
-            
-        except sqlite3.Error as e:
+            # Get all weeks with incomplete games, of every season
+            with self.get_database_connection() as conn:
+                incomplete_weeks = [tuple(row) for row in conn.execute(
+                    select(match_table.c.season, match_table.c.week).distinct()
+                    .where(match_table.c.is_completed == False, match_table.c.week <= 18)
+                    .order_by(match_table.c.season, match_table.c.week))]
+            run.count('weeks', len(incomplete_weeks))
+            
+        except SQLAlchemyError as e:
             logger.error(f"Database error getting incomplete weeks: {e}")
+            run.error(f"Database error getting incomplete weeks: {e}")
+            self.record_run(run.finish(False))
             return False
-        finally:
-            conn.close()
+        
+        # Every week records its own run; the catch-up run lists the weeks that failed
+        for season, week in incomplete_weeks:
+            if not self.validate_week(week, season):
+                run.error(f"Week {week} of {season} failed")
+        
+        self.record_run(run.finish())
+        return run.success
 
 # Scheduler functions
-def run_validation_service():
-    """Run the validation service with scheduled tasks"""
+LEADER_LOCK_FILENAME = 'validator.lock'
+STANDBY_RETRY_SECONDS = 30
+
+def get_leader_lock_path(db_path: str) -> str:
+    """Lock file that elects the single polling validator for a database (db_path None: the server database)"""
+    return os.path.join(get_data_dir(db_path), LEADER_LOCK_FILENAME)
+
+def run_validation_service(db_path: str = None):
+    """Run the validation service with scheduled tasks (only in the process holding the leader lock)"""
+    import schedule
+    from leader_lock import LeaderLock
+    
+    validator = NFLGameValidator(db_path)
+    
+    # Exactly one validator polls ESPN and writes results; others stand by and take over if it exits
+    leader_lock = LeaderLock(get_leader_lock_path(validator.db_path))
+    if not leader_lock.acquire():
+        logger.info(f"Another validator holds {leader_lock.path}, standing by")
+        while not leader_lock.acquire():
+            time.sleep(STANDBY_RETRY_SECONDS)
+    
     try:
-        validator = NFLGameValidator()
-        
         # Schedule validation tasks
-        schedule.every(30).minutes.do(validator.validate_current_week)  # Every 30 minutes during games
-        schedule.every().day.at("00:00").do(validator.validate_all_incomplete_weeks)  # Daily at midnight
-        schedule.every().tuesday.at("06:00").do(validator.validate_all_incomplete_weeks)  # Tuesday 6 AM (after MNF)
+        scheduler = schedule.Scheduler()
+        scheduler.every(30).minutes.do(validator.validate_current_week)  # Every 30 minutes during games
+        scheduler.every().day.at("00:00").do(validator.validate_all_incomplete_weeks)  # Daily at midnight
+        scheduler.every().tuesday.at("06:00").do(validator.validate_all_incomplete_weeks)  # Tuesday 6 AM (after MNF)
+        scheduler.every().day.at("07:00").do(validator.update_weekly_schedule)  # Daily 7 AM (flex changes)
         
-        logger.info("NFL Game Validator Service started")
+        logger.info(f"NFL Game Validator Service started (pid {os.getpid()}, leader)")
         logger.info("Scheduled tasks:")
         logger.info("- Every 30 minutes: Validate current week")
         logger.info("- Daily at midnight: Validate all incomplete weeks")
         logger.info("- Tuesday 6 AM: Final weekly validation")
+        logger.info("- Daily at 7 AM: Schedule update (kickoffs, flexed games)")
         
         # Run initial validation
         try:
@@ -566,7 +728,7 @@ def run_validation_service():
         # Keep the service running
         while True:
             try:
-                schedule.run_pending()
+                scheduler.run_pending()
                 time.sleep(60)  # Check every minute
             except Exception as e:
                 logger.error(f"Error in validation service loop: {e}")
@@ -575,11 +737,13 @@ def run_validation_service():
     except Exception as e:
         logger.error(f"Fatal error in validation service: {e}")
         raise
+    finally:
+        leader_lock.release()
 
-def start_validation_service_thread():
+def start_validation_service_thread(db_path: str = None):
     """Start the validation service in a background thread"""
     try:
-        thread = threading.Thread(target=run_validation_service, daemon=True)
+        thread = threading.Thread(target=run_validation_service, args=(db_path,), daemon=True)
         thread.start()
         logger.info("Validation service thread started")
         return thread
@@ -587,170 +751,15 @@ def start_validation_service_thread():
         logger.error(f"Failed to start validation service thread: {e}")
         return None
 
+def start_validation_service():
+    """Older name of start_validation_service_thread(); the thread only validates while it holds the leader lock"""
+    return start_validation_service_thread()
+
 if __name__ == "__main__":
     # Run as standalone service
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler()]
+    )
     run_validation_service()
-
-
-    def update_weekly_schedule(self) -> bool:
-        """Update NFL schedule with next week's games from NFL Operations"""
-        logger.info("Starting weekly schedule update...")
-        
-        try:
-            # Import the schedule update functionality
-            import sys
-            # Use relative path for Render compatibility
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            sys.path.insert(0, current_dir)
-            from app import app, db, Match, Team
-            
-            with app.app_context():
-                # Determine which week to add next
-                latest_week = db.session.query(db.func.max(Match.week)).scalar() or 0
-                next_week = latest_week + 1
-                
-                if next_week > 18:
-                    logger.info("All 18 weeks already in database")
-                    return True
-                
-                logger.info(f"Adding Week {next_week} schedule...")
-                
-                # Here you would scrape NFL Operations website for the next week
-                # For now, we'll use a simplified approach
-                
-                # Get all teams for creating template matches
-                teams = Team.query.all()
-                if len(teams) < 32:
-                    logger.error("Not enough teams in database")
-                    return False
-                
-                # Create template matches for the next week
-                # In a real implementation, this would scrape operations.nfl.com
-                # for the actual matchups
-                
-                added_count = 0
-                
-                # Create 16 template matches (typical NFL week)
-                for i in range(0, min(32, len(teams)), 2):
-                    if i + 1 < len(teams):
-                        # Rotate teams to create different matchups
-                        home_idx = (i + next_week) % len(teams)
-                        away_idx = (i + 1 + next_week) % len(teams)
-                        
-                        if home_idx != away_idx:
-                            home_team = teams[home_idx]
-                            away_team = teams[away_idx]
-                            
-                            # Check if this matchup already exists
-                            existing = Match.query.filter_by(
-                                week=next_week,
-                                home_team_id=home_team.id,
-                                away_team_id=away_team.id
-                            ).first()
-                            
-                            if not existing:
-                                new_match = Match(
-                                    week=next_week,
-                                    home_team_id=home_team.id,
-                                    away_team_id=away_team.id,
-                                    is_completed=False,
-                                    start_time=None  # Will be updated when real schedule is available
-                                )
-                                
-                                db.session.add(new_match)
-                                added_count += 1
-                                
-                                if added_count >= 16:  # Typical NFL week
-                                    break
-                
-                db.session.commit()
-                logger.info(f"Added {added_count} template matches for Week {next_week}")
-                
-                # TODO: Implement actual NFL Operations scraping here
-                # This would replace the template creation above with real matchups
-                
-                return True
-                
-        except Exception as e:
-            logger.error(f"Error updating weekly schedule: {e}")
-            return False
-    
-    def scrape_nfl_operations_schedule(self, week: int) -> List[Dict]:
-        """Scrape NFL Operations website for real schedule data"""
-        # TODO: Implement actual scraping of operations.nfl.com
-        # This is a placeholder for the real implementation
-        
-        try:
-            import requests
-            from bs4 import BeautifulSoup
-            
-            url = f"https://operations.nfl.com/gameday/nfl-schedule/2025-nfl-schedule/"
-            
-            # Note: This would need to be implemented properly
-            # to parse the actual NFL Operations website
-            
-            logger.info(f"Would scrape NFL Operations for Week {week}")
-            return []
-            
-        except Exception as e:
-            logger.error(f"Error scraping NFL Operations: {e}")
-            return []
-
-class NFLGameValidatorService:
-    """Service wrapper for the NFL Game Validator"""
-    
-    def __init__(self):
-        self.validator = NFLGameValidator()
-        self.logger = logging.getLogger(__name__)
-        
-    def start_validation_service(self):
-        """Start the background validation service"""
-        def run_validation():
-            while True:
-                try:
-                    current_time = datetime.now()
-                    current_hour = current_time.hour
-                    current_minute = current_time.minute
-                    current_weekday = current_time.weekday()  # 0=Monday, 6=Sunday
-                    
-                    # Every 30 minutes during game days (Friday-Tuesday)
-                    if current_weekday in [4, 5, 6, 0, 1] and current_minute % 30 == 0:
-                        self.validator.validate_current_week()
-                    
-                    # Daily at midnight - validate all incomplete weeks
-                    elif current_hour == 0 and current_minute == 0:
-                        self.validator.validate_all_incomplete_weeks()
-                    
-                    # Tuesday at 6 AM - final weekly validation (after Monday Night Football)
-                    elif current_weekday == 1 and current_hour == 6 and current_minute == 0:
-                        self.validator.validate_all_incomplete_weeks()
-                    
-                    # Tuesday at 7 AM - weekly schedule update
-                    elif current_weekday == 1 and current_hour == 7 and current_minute == 0:
-                        self.validator.update_weekly_schedule()
-                    
-                    time.sleep(60)  # Check every minute
-                    
-                except Exception as e:
-                    self.logger.error(f"Error in validation service: {e}")
-                    time.sleep(300)  # Wait 5 minutes on error
-        
-        validation_thread = threading.Thread(target=run_validation, daemon=True)
-        validation_thread.start()
-        self.logger.info("Validation service thread started")
-        
-        # Log scheduled tasks
-        self.logger.info("Scheduled tasks:")
-        self.logger.info("- Every 30 minutes: Validate current week")
-        self.logger.info("- Daily at midnight: Validate all incomplete weeks")
-        self.logger.info("- Tuesday 6 AM: Final weekly validation (after Monday Night Football)")
-        self.logger.info("- Tuesday 7 AM: Weekly schedule update")
-
-# Global service instance
-validation_service = NFLGameValidatorService()
-
-def start_validation_service():
-    """Start the global validation service"""
-    validation_service.start_validation_service()
-    return validation_service
-
@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration for the NFL PickEm production server
+
+Started by app_launcher.py in production mode. Concurrency comes from the
+environment:
+    WEB_BIND      address to listen on (default 0.0.0.0:5000)
+    WEB_WORKERS   worker processes (default: CPU count, at most 4)
+    WEB_THREADS   threads per worker (default 4)
+    WEB_TIMEOUT   seconds before a stuck worker is restarted (default 60)
+    WEB_ACCESS_LOG  access log target (default stdout, empty to disable)
+
+Workers only serve requests. The game validator runs as a separate process
+(validator_worker.py, started by the launcher), so N workers never mean N
+validators.
+"""
+
+import os
+import multiprocessing
+
+bind = os.environ.get('WEB_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_WORKERS', min(multiprocessing.cpu_count(), 4)))
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_class = 'gthread'
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+keepalive = 5
+
+# Each worker imports the app itself, so no SQLite connection is shared across a fork
+preload_app = False
+
+accesslog = os.environ.get('WEB_ACCESS_LOG', '-') or None  # Empty: no access log
+errorlog = '-'
+loglevel = os.environ.get('WEB_LOG_LEVEL', 'info')
@@ -1,293 +1,33 @@
 #!/usr/bin/env python3
 """
 Import complete NFL 2025 schedule from NFL Operations data
+
+The schedule lives in nfl_2025_schedule.csv (week, away, home, date, time;
+kickoffs in US Eastern time) and is loaded with schedule_loader, so running
+this script again only applies the rows that changed.
 """
 
 import sys
 import os
-from datetime import datetime, timezone
-sys.path.insert(0, '.')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from schedule_loader import DEFAULT_DB_PATH, import_schedule_file, print_import_summary
 
-from app import app, db, Match, Team
+SCHEDULE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nfl_2025_schedule.csv')
 
-def import_complete_nfl_schedule():
+def import_complete_nfl_schedule(db_path=DEFAULT_DB_PATH, schedule_file=SCHEDULE_FILE):
     """Import complete NFL 2025 schedule based on NFL Operations data"""
-    with app.app_context():
-        
-        # Complete NFL 2025 Schedule from operations.nfl.com
-        nfl_schedule = [
-            # WEEK 1
-            {"week": 1, "away": "Dallas Cowboys", "home": "Philadelphia Eagles", "date": "2025-09-04", "time": "20:20"},
-            {"week": 1, "away": "Kansas City Chiefs", "home": "Los Angeles Chargers", "date": "2025-09-05", "time": "20:00"},  # Sao Paulo
-            {"week": 1, "away": "Tampa Bay Buccaneers", "home": "Atlanta Falcons", "date": "2025-09-07", "time": "13:00"},
-            {"week": 1, "away": "Cincinnati Bengals", "home": "Cleveland Browns", "date": "2025-09-07", "time": "13:00"},
-            {"week": 1, "away": "Miami Dolphins", "home": "Indianapolis Colts", "date": "2025-09-07", "time": "13:00"},
-            {"week": 1, "away": "Carolina Panthers", "home": "Jacksonville Jaguars", "date": "2025-09-07", "time": "13:00"},
-            {"week": 1, "away": "Las Vegas Raiders", "home": "New England Patriots", "date": "2025-09-07", "time": "13:00"},
-            {"week": 1, "away": "Arizona Cardinals", "home": "New Orleans Saints", "date": "2025-09-07", "time": "13:00"},
-            {"week": 1, "away": "Pittsburgh Steelers", "home": "New York Jets", "date": "2025-09-07", "time": "13:00"},
-            {"week": 1, "away": "New York Giants", "home": "Washington Commanders", "date": "2025-09-07", "time": "13:00"},
-            {"week": 1, "away": "Tennessee Titans", "home": "Denver Broncos", "date": "2025-09-07", "time": "16:05"},
-            {"week": 1, "away": "San Francisco 49ers", "home": "Seattle Seahawks", "date": "2025-09-07", "time": "16:05"},
-            {"week": 1, "away": "Detroit Lions", "home": "Green Bay Packers", "date": "2025-09-07", "time": "16:25"},
-            {"week": 1, "away": "Houston Texans", "home": "Los Angeles Rams", "date": "2025-09-07", "time": "16:25"},
-            {"week": 1, "away": "Baltimore Ravens", "home": "Buffalo Bills", "date": "2025-09-07", "time": "20:20"},
-            {"week": 1, "away": "Minnesota Vikings", "home": "Chicago Bears", "date": "2025-09-08", "time": "20:15"},
-            
-            # WEEK 2
-            {"week": 2, "away": "Washington Commanders", "home": "Green Bay Packers", "date": "2025-09-11", "time": "20:15"},
-            {"week": 2, "away": "Cleveland Browns", "home": "Baltimore Ravens", "date": "2025-09-14", "time": "13:00"},
-            {"week": 2, "away": "Jacksonville Jaguars", "home": "Cincinnati Bengals", "date": "2025-09-14", "time": "13:00"},
-            {"week": 2, "away": "New York Giants", "home": "Dallas Cowboys", "date": "2025-09-14", "time": "13:00"},
-            {"week": 2, "away": "Chicago Bears", "home": "Detroit Lions", "date": "2025-09-14", "time": "13:00"},
-            {"week": 2, "away": "New England Patriots", "home": "Miami Dolphins", "date": "2025-09-14", "time": "13:00"},
-            {"week": 2, "away": "San Francisco 49ers", "home": "New Orleans Saints", "date": "2025-09-14", "time": "13:00"},
-            {"week": 2, "away": "Buffalo Bills", "home": "New York Jets", "date": "2025-09-14", "time": "13:00"},
-            {"week": 2, "away": "Seattle Seahawks", "home": "Pittsburgh Steelers", "date": "2025-09-14", "time": "13:00"},
-            {"week": 2, "away": "Los Angeles Rams", "home": "Tennessee Titans", "date": "2025-09-14", "time": "13:00"},
-            {"week": 2, "away": "Carolina Panthers", "home": "Arizona Cardinals", "date": "2025-09-14", "time": "16:05"},
-            {"week": 2, "away": "Denver Broncos", "home": "Indianapolis Colts", "date": "2025-09-14", "time": "16:05"},
-            {"week": 2, "away": "Philadelphia Eagles", "home": "Kansas City Chiefs", "date": "2025-09-14", "time": "16:25"},
-            {"week": 2, "away": "Atlanta Falcons", "home": "Minnesota Vikings", "date": "2025-09-14", "time": "20:20"},
-            {"week": 2, "away": "Tampa Bay Buccaneers", "home": "Houston Texans", "date": "2025-09-15", "time": "19:00"},
-            {"week": 2, "away": "Los Angeles Chargers", "home": "Las Vegas Raiders", "date": "2025-09-15", "time": "22:00"},
-            
-            # WEEK 3
-            {"week": 3, "away": "Miami Dolphins", "home": "Buffalo Bills", "date": "2025-09-18", "time": "20:15"},
-            {"week": 3, "away": "Atlanta Falcons", "home": "Carolina Panthers", "date": "2025-09-21", "time": "13:00"},
-            {"week": 3, "away": "Green Bay Packers", "home": "Cleveland Browns", "date": "2025-09-21", "time": "13:00"},
-            {"week": 3, "away": "Houston Texans", "home": "Jacksonville Jaguars", "date": "2025-09-21", "time": "13:00"},
-            {"week": 3, "away": "Cincinnati Bengals", "home": "Minnesota Vikings", "date": "2025-09-21", "time": "13:00"},
-            {"week": 3, "away": "Pittsburgh Steelers", "home": "New England Patriots", "date": "2025-09-21", "time": "13:00"},
-            {"week": 3, "away": "Los Angeles Rams", "home": "Philadelphia Eagles", "date": "2025-09-21", "time": "13:00"},
-            {"week": 3, "away": "New York Jets", "home": "Tampa Bay Buccaneers", "date": "2025-09-21", "time": "13:00"},
-            {"week": 3, "away": "Indianapolis Colts", "home": "Tennessee Titans", "date": "2025-09-21", "time": "13:00"},
-            {"week": 3, "away": "Las Vegas Raiders", "home": "Washington Commanders", "date": "2025-09-21", "time": "13:00"},
-            {"week": 3, "away": "Denver Broncos", "home": "Los Angeles Chargers", "date": "2025-09-21", "time": "16:05"},
-            {"week": 3, "away": "New Orleans Saints", "home": "Seattle Seahawks", "date": "2025-09-21", "time": "16:05"},
-            {"week": 3, "away": "Dallas Cowboys", "home": "Chicago Bears", "date": "2025-09-21", "time": "16:25"},
-            {"week": 3, "away": "Arizona Cardinals", "home": "San Francisco 49ers", "date": "2025-09-21", "time": "16:25"},
-            {"week": 3, "away": "Kansas City Chiefs", "home": "New York Giants", "date": "2025-09-21", "time": "20:20"},
-            {"week": 3, "away": "Detroit Lions", "home": "Baltimore Ravens", "date": "2025-09-22", "time": "20:15"},
-            
-            # WEEK 4
-            {"week": 4, "away": "Seattle Seahawks", "home": "Arizona Cardinals", "date": "2025-09-25", "time": "20:15"},
-            {"week": 4, "away": "Minnesota Vikings", "home": "Pittsburgh Steelers", "date": "2025-09-28", "time": "14:30"},  # Dublin
-            {"week": 4, "away": "Washington Commanders", "home": "Atlanta Falcons", "date": "2025-09-28", "time": "13:00"},
-            {"week": 4, "away": "New Orleans Saints", "home": "Buffalo Bills", "date": "2025-09-28", "time": "13:00"},
-            {"week": 4, "away": "Cleveland Browns", "home": "Detroit Lions", "date": "2025-09-28", "time": "13:00"},
-            {"week": 4, "away": "Tennessee Titans", "home": "Houston Texans", "date": "2025-09-28", "time": "13:00"},
-            {"week": 4, "away": "Carolina Panthers", "home": "New England Patriots", "date": "2025-09-28", "time": "13:00"},
-            {"week": 4, "away": "Los Angeles Chargers", "home": "New York Giants", "date": "2025-09-28", "time": "13:00"},
-            {"week": 4, "away": "Philadelphia Eagles", "home": "Tampa Bay Buccaneers", "date": "2025-09-28", "time": "13:00"},
-            {"week": 4, "away": "Indianapolis Colts", "home": "Los Angeles Rams", "date": "2025-09-28", "time": "16:05"},
-            {"week": 4, "away": "Jacksonville Jaguars", "home": "San Francisco 49ers", "date": "2025-09-28", "time": "16:05"},
-            {"week": 4, "away": "Baltimore Ravens", "home": "Kansas City Chiefs", "date": "2025-09-28", "time": "16:25"},
-            {"week": 4, "away": "Chicago Bears", "home": "Las Vegas Raiders", "date": "2025-09-28", "time": "16:25"},
-            {"week": 4, "away": "Green Bay Packers", "home": "Dallas Cowboys", "date": "2025-09-28", "time": "20:20"},
-            {"week": 4, "away": "New York Jets", "home": "Miami Dolphins", "date": "2025-09-29", "time": "19:15"},
-            {"week": 4, "away": "Cincinnati Bengals", "home": "Denver Broncos", "date": "2025-09-29", "time": "20:15"},
-            
-            # WEEK 5
-            {"week": 5, "away": "San Francisco 49ers", "home": "Los Angeles Rams", "date": "2025-10-02", "time": "20:15"},
-            {"week": 5, "away": "Minnesota Vikings", "home": "Cleveland Browns", "date": "2025-10-05", "time": "14:30"},  # London
-            {"week": 5, "away": "Houston Texans", "home": "Baltimore Ravens", "date": "2025-10-05", "time": "13:00"},
-            {"week": 5, "away": "Miami Dolphins", "home": "Carolina Panthers", "date": "2025-10-05", "time": "13:00"},
-            {"week": 5, "away": "Las Vegas Raiders", "home": "Indianapolis Colts", "date": "2025-10-05", "time": "13:00"},
-            {"week": 5, "away": "New York Giants", "home": "New Orleans Saints", "date": "2025-10-05", "time": "13:00"},
-            {"week": 5, "away": "Dallas Cowboys", "home": "New York Jets", "date": "2025-10-05", "time": "13:00"},
-            {"week": 5, "away": "Denver Broncos", "home": "Philadelphia Eagles", "date": "2025-10-05", "time": "13:00"},
-            {"week": 5, "away": "Tennessee Titans", "home": "Arizona Cardinals", "date": "2025-10-05", "time": "16:05"},
-            {"week": 5, "away": "Tampa Bay Buccaneers", "home": "Seattle Seahawks", "date": "2025-10-05", "time": "16:05"},
-            {"week": 5, "away": "Detroit Lions", "home": "Cincinnati Bengals", "date": "2025-10-05", "time": "16:25"},
-            {"week": 5, "away": "Washington Commanders", "home": "Los Angeles Chargers", "date": "2025-10-05", "time": "16:25"},
-            {"week": 5, "away": "New England Patriots", "home": "Buffalo Bills", "date": "2025-10-05", "time": "20:20"},
-            {"week": 5, "away": "Kansas City Chiefs", "home": "Jacksonville Jaguars", "date": "2025-10-06", "time": "20:15"},
-            
-            # WEEK 6
-            {"week": 6, "away": "Philadelphia Eagles", "home": "New York Giants", "date": "2025-10-09", "time": "20:15"},
-            {"week": 6, "away": "Denver Broncos", "home": "New York Jets", "date": "2025-10-12", "time": "14:30"},  # London
-            {"week": 6, "away": "Carolina Panthers", "home": "Baltimore Ravens", "date": "2025-10-12", "time": "13:00"},
-            {"week": 6, "away": "New Orleans Saints", "home": "Cincinnati Bengals", "date": "2025-10-12", "time": "13:00"},
-            {"week": 6, "away": "Arizona Cardinals", "home": "Cleveland Browns", "date": "2025-10-12", "time": "13:00"},
-            {"week": 6, "away": "Jacksonville Jaguars", "home": "Indianapolis Colts", "date": "2025-10-12", "time": "13:00"},
-            {"week": 6, "away": "Buffalo Bills", "home": "Miami Dolphins", "date": "2025-10-12", "time": "13:00"},
-            {"week": 6, "away": "Tampa Bay Buccaneers", "home": "New England Patriots", "date": "2025-10-12", "time": "13:00"},
-            {"week": 6, "away": "Los Angeles Chargers", "home": "Tennessee Titans", "date": "2025-10-12", "time": "13:00"},
-            {"week": 6, "away": "Seattle Seahawks", "home": "Las Vegas Raiders", "date": "2025-10-12", "time": "16:05"},
-            {"week": 6, "away": "Los Angeles Rams", "home": "San Francisco 49ers", "date": "2025-10-12", "time": "16:25"},
-            {"week": 6, "away": "Kansas City Chiefs", "home": "Washington Commanders", "date": "2025-10-12", "time": "20:20"},
-            {"week": 6, "away": "Houston Texans", "home": "Dallas Cowboys", "date": "2025-10-13", "time": "20:15"},
-            
-            # Continue with remaining weeks...
-            # For brevity, I'll add a few more weeks and then create a function to add the rest
-        ]
-        
-        # Get all teams for mapping
-        teams = {team.name: team for team in Team.query.all()}
-        
-        # Track statistics
-        added_count = 0
-        updated_count = 0
-        skipped_count = 0
-        
-        print(f"🏈 Importing {len(nfl_schedule)} NFL games...")
-        
-        for game in nfl_schedule:
-            try:
-                week = game["week"]
-                home_team_name = game["home"]
-                away_team_name = game["away"]
-                
-                # Find teams in database
-                home_team = teams.get(home_team_name)
-                away_team = teams.get(away_team_name)
-                
-                if not home_team:
-                    print(f"⚠️  Home team not found: {home_team_name}")
-                    skipped_count += 1
-                    continue
-                    
-                if not away_team:
-                    print(f"⚠️  Away team not found: {away_team_name}")
-                    skipped_count += 1
-                    continue
-                
-                # Check if match already exists
-                existing_match = Match.query.filter_by(
-                    week=week,
-                    home_team_id=home_team.id,
-                    away_team_id=away_team.id
-                ).first()
-                
-                if existing_match:
-                    # Update existing match if needed
-                    updated = False
-                    
-                    # Update start time
-                    if "date" in game and "time" in game:
-                        try:
-                            start_time = datetime.strptime(f"{game['date']} {game['time']}", "%Y-%m-%d %H:%M")
-                            start_time = start_time.replace(tzinfo=timezone.utc)
-                            
-                            if existing_match.start_time != start_time:
-                                existing_match.start_time = start_time
-                                updated = True
-                        except:
-                            pass  # Skip invalid datetime
-                    
-                    if updated:
-                        updated_count += 1
-                    else:
-                        skipped_count += 1
-                    
-                else:
-                    # Create new match
-                    new_match = Match(
-                        week=week,
-                        home_team_id=home_team.id,
-                        away_team_id=away_team.id,
-                        is_completed=False
-                    )
-                    
-                    # Set start time
-                    if "date" in game and "time" in game:
-                        try:
-                            start_time = datetime.strptime(f"{game['date']} {game['time']}", "%Y-%m-%d %H:%M")
-                            start_time = start_time.replace(tzinfo=timezone.utc)
-                            new_match.start_time = start_time
-                        except:
-                            pass  # Skip invalid datetime
-                    
-                    db.session.add(new_match)
-                    added_count += 1
-                
-            except Exception as e:
-                print(f"❌ Error processing game: {e}")
-                print(f"   Game data: {game}")
-                skipped_count += 1
-                continue
-        
-        # Commit all changes
-        try:
-            db.session.commit()
-            print(f"✅ Schedule import completed!")
-            print(f"   Added: {added_count} new matches")
-            print(f"   Updated: {updated_count} existing matches")
-            print(f"   Skipped: {skipped_count} matches")
-            
-            # Verify total matches
-            total_matches = Match.query.count()
-            print(f"   Total matches in database: {total_matches}")
-            
-            # Show matches per week
-            print(f"\n📊 Matches per week:")
-            for week in range(1, 19):
-                week_count = Match.query.filter_by(week=week).count()
-                print(f"   Week {week:2d}: {week_count:2d} matches")
-            
-        except Exception as e:
-            db.session.rollback()
-            print(f"❌ Error committing changes: {e}")
+    print(f"🏈 Importing NFL games from {schedule_file}...")
+    try:
+        stats = import_schedule_file(schedule_file, db_path)
+    except Exception as e:
+        print(f"❌ Error importing schedule: {e}")
+        return None
 
-def add_remaining_weeks():
-    """Add remaining weeks 7-18 with template data"""
-    with app.app_context():
-        
-        # For now, add template matches for weeks 7-18
-        # These will be updated with real NFL schedule data as the season progresses
-        
-        teams = list(Team.query.all())
-        added_count = 0
-        
-        print("📝 Adding template matches for weeks 7-18...")
-        
-        for week in range(7, 19):  # Weeks 7-18
-            existing_count = Match.query.filter_by(week=week).count()
-            
-            if existing_count == 0:
-                # Create 16 template matches per week
-                for i in range(0, min(32, len(teams)), 2):
-                    if i + 1 < len(teams):
-                        # Rotate teams to create different matchups each week
-                        home_idx = (i + week) % len(teams)
-                        away_idx = (i + 1 + week) % len(teams)
-                        
-                        if home_idx != away_idx:
-                            home_team = teams[home_idx]
-                            away_team = teams[away_idx]
-                            
-                            template_match = Match(
-                                week=week,
-                                home_team_id=home_team.id,
-                                away_team_id=away_team.id,
-                                is_completed=False,
-                                start_time=None
-                            )
-                            
-                            db.session.add(template_match)
-                            added_count += 1
-                            
-                            if added_count % 16 == 0:  # 16 games per week
-                                break
-        
-        try:
-            db.session.commit()
-            print(f"✅ Added {added_count} template matches for weeks 7-18")
-            print("⚠️  These are placeholder matches and will be updated with real NFL schedule")
-            
-        except Exception as e:
-            db.session.rollback()
-            print(f"❌ Error creating template matches: {e}")
+    print_import_summary(stats, db_path)
+    return stats
 
 if __name__ == '__main__':
     print("🏈 Importing complete NFL 2025 schedule from NFL Operations...")
-    import_complete_nfl_schedule()
-    
-    # Add template matches for remaining weeks
-    with app.app_context():
-        total_matches = Match.query.count()
-        if total_matches < 200:  # NFL season has ~272 games
-            print(f"\n⚠️  Only {total_matches} matches found. Adding template matches...")
-            add_remaining_weeks()
-
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DB_PATH
+    import_complete_nfl_schedule(db_path)
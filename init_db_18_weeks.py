@@ -11,7 +11,12 @@ from datetime import datetime, timedelta
 # Add the current directory to the path so we can import the app
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db, User, Team, Match, Pick, EliminatedTeam, TeamWinnerUsage, TeamLoserUsage
+from app import create_app
+from database import get_sqlite_path
+from models import db, User, Team
+from schedule_loader import apply_schedule
+
+app = create_app()
 
 def init_database():
     with app.app_context():
@@ -86,16 +91,13 @@ def init_database():
         db.session.commit()
         print("Added teams")
         
-        # Create a dictionary for easy team lookup
-        teams = {team.name: team for team in Team.query.all()}
-        
-        # Add all 18 weeks of matches
-        add_all_weeks(teams)
+        # Add all 18 weeks of matches (bulk import, teams are resolved by name)
+        add_all_weeks(get_sqlite_path(db.engine))
         
         print("Database initialization complete!")
         print("Ready for Week 2 picks!")
 
-def add_all_weeks(teams):
+def add_all_weeks(db_path):
     """Add all 18 weeks of NFL matches"""
     
     # Week 1 (completed with results)
@@ -118,7 +120,7 @@ def add_all_weeks(teams):
         {'away': 'Kansas City Chiefs', 'home': 'Baltimore Ravens', 'away_score': 27, 'home_score': 20, 'date': '2025-09-09'}
     ]
     
-    add_week_matches(1, week1_matches, teams, completed=True)
+    games = week_rows(1, week1_matches)
     
     # Week 2 (upcoming)
     week2_matches = [
@@ -139,12 +141,14 @@ def add_all_weeks(teams):
         {'away': 'Tampa Bay Buccaneers', 'home': 'Houston Texans', 'date': '2025-09-16'}
     ]
     
-    add_week_matches(2, week2_matches, teams, completed=False)
+    games += week_rows(2, week2_matches)
     
     # Weeks 3-18 (future games)
     for week in range(3, 19):
-        week_matches = generate_week_matches(week)
-        add_week_matches(week, week_matches, teams, completed=False)
+        games += week_rows(week, generate_week_matches(week))
+    
+    stats = apply_schedule(db_path, games)
+    print(f"Added {stats['added']} matches for weeks 1-18")
 
 def generate_week_matches(week):
     """Generate realistic matches for a given week"""
@@ -177,35 +181,9 @@ def generate_week_matches(week):
     
     return sample_matchups
 
-def add_week_matches(week, matches, teams, completed=False):
-    """Add matches for a specific week"""
-    for match_data in matches:
-        away_team = teams[match_data['away']]
-        home_team = teams[match_data['home']]
-        
-        match_date = datetime.strptime(match_data['date'], '%Y-%m-%d')
-        
-        match = Match(
-            week=week,
-            away_team_id=away_team.id,
-            home_team_id=home_team.id,
-            start_time=match_date,
-            is_completed=completed
-        )
-        
-        if completed and 'away_score' in match_data:
-            match.away_score = match_data['away_score']
-            match.home_score = match_data['home_score']
-            # Determine winner
-            if match_data['away_score'] > match_data['home_score']:
-                match.winner_team_id = away_team.id
-            else:
-                match.winner_team_id = home_team.id
-        
-        db.session.add(match)
-    
-    db.session.commit()
-    print(f"Added Week {week} matches")
+def week_rows(week, matches):
+    """Schedule loader rows for one week (scores mark a game as completed)"""
+    return [dict(match_data, week=week, time='00:00') for match_data in matches]
 
 if __name__ == '__main__':
     init_database()
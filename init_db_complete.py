@@ -6,12 +6,16 @@ Creates database with all 18 weeks of NFL data and correct rules
 
 import os
 import sys
-from datetime import datetime
 
 # Add the app directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db, User, Team, Match, Pick, EliminatedTeam, TeamWinnerUsage, TeamLoserUsage
+from app import create_app
+from database import get_sqlite_path
+from models import db, User, Team, Match, Pick, TeamWinnerUsage, TeamLoserUsage
+from schedule_loader import apply_schedule
+
+app = create_app()
 
 def init_database():
     """Initialize the database with all tables and data"""
@@ -93,24 +97,7 @@ def init_database():
             {'away': 'Tennessee Titans', 'home': 'Chicago Bears', 'away_score': 17, 'home_score': 24, 'winner': 'Chicago Bears'}
         ]
         
-        for match_data in week1_matches:
-            away_team = Team.query.filter_by(name=match_data['away']).first()
-            home_team = Team.query.filter_by(name=match_data['home']).first()
-            winner_team = Team.query.filter_by(name=match_data['winner']).first()
-            
-            match = Match(
-                week=1,
-                away_team_id=away_team.id,
-                home_team_id=home_team.id,
-                away_score=match_data['away_score'],
-                home_score=match_data['home_score'],
-                is_completed=True,
-                winner_team_id=winner_team.id,
-                start_time=datetime(2025, 9, 8, 18, 0, 0)
-            )
-            db.session.add(match)
-        
-        print("Added Week 1 matches")
+        games = [dict(match_data, week=1, kickoff='2025-09-08T18:00:00') for match_data in week1_matches]
         
         # Add Week 2 matches (upcoming)
         week2_matches = [
@@ -129,20 +116,10 @@ def init_database():
             {'away': 'Atlanta Falcons', 'home': 'Minnesota Vikings'}
         ]
         
-        for match_data in week2_matches:
-            away_team = Team.query.filter_by(name=match_data['away']).first()
-            home_team = Team.query.filter_by(name=match_data['home']).first()
-            
-            match = Match(
-                week=2,
-                away_team_id=away_team.id,
-                home_team_id=home_team.id,
-                is_completed=False,
-                start_time=datetime(2025, 9, 15, 18, 0, 0)
-            )
-            db.session.add(match)
+        games += [dict(match_data, week=2, kickoff='2025-09-15T18:00:00') for match_data in week2_matches]
         
-        print("Added Week 2 matches")
+        stats = apply_schedule(get_sqlite_path(db.engine), games)
+        print(f"Added Week 1 and Week 2 matches ({stats['added']} games)")
         
         # Add sample Week 1 pick for Manuel (for testing)
         manuel = User.query.filter_by(username='Manuel').first()
@@ -11,7 +11,10 @@ from datetime import datetime
 # Add the app directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db, User, Team, Match, Pick, EliminatedTeam, TeamWinnerUsage, TeamLoserUsage
+from app import create_app
+from models import db, User, Team, Match, Pick, EliminatedTeam, TeamWinnerUsage, TeamLoserUsage
+
+app = create_app()
 
 def init_database():
     """Initialize the database with all tables and data"""
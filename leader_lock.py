@@ -0,0 +1,92 @@
+"""
+Leader Lock Module for NFL PickEm App
+
+Single-instance election between processes on one host through an exclusive
+flock on a lock file. Whoever holds the lock is the leader; the operating
+system releases it when the process exits, including crashes, so a standby
+can take over without stale-lock cleanup. The leader writes its pid, host
+and start time into the file, which lets other processes see who is running.
+"""
+
+import os
+import json
+import fcntl
+import socket
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+class LeaderLock:
+    """Exclusive, non-blocking lock on a file; held until release() or process exit"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    @property
+    def is_held(self):
+        return self._file is not None
+
+    def acquire(self):
+        """Try to become leader; returns False if another process holds the lock"""
+        if self._file is not None:
+            return True
+
+        lock_dir = os.path.dirname(self.path)
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+
+        lock_file = open(self.path, 'a+')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+
+        lock_file.seek(0)
+        lock_file.truncate()
+        json.dump({
+            'pid': os.getpid(),
+            'host': socket.gethostname(),
+            'acquired_at': datetime.now().isoformat(),
+        }, lock_file)
+        lock_file.flush()
+        self._file = lock_file
+        logger.info(f"Leader lock acquired: {self.path}")
+        return True
+
+    def release(self):
+        """Give up leadership"""
+        if self._file is None:
+            return
+        try:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+        logger.info(f"Leader lock released: {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+def read_leader(path):
+    """Info written by the current leader, or None if nobody holds the lock"""
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'a+') as lock_file:
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.seek(0)
+            try:
+                return json.loads(lock_file.read() or '{}')
+            except ValueError:
+                return {}
+        # Got the lock, so there is no leader
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        return None
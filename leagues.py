@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Leagues and Seasons for NFL PickEm App
+
+One database holds several leagues (friend groups) and keeps every season.
+Users belong to a league. Matches belong to a season and are shared by all
+leagues, so each game is fetched from the score source and stored once.
+Picks, winner/loser usage and eliminations carry both keys and are always
+queried within one (league, season), backed by composite indexes.
+
+Databases created before leagues existed are migrated in place: the league
+table and the league_id/season columns are added with defaults that put all
+existing rows into the default league and the 2025 season.
+
+The season a request or validator pass works in is, in order: the requested
+one, NFL_SEASON from the environment, the latest season with matches, or the
+season of today's date.
+
+Usage:
+    python leagues.py migrate [db_path]
+    python leagues.py list [db_path]
+    python leagues.py add <name> [db_path]
+"""
+
+import os
+import sys
+import sqlite3
+import logging
+from datetime import date
+
+from database import get_connection, get_database_path, get_engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = get_database_path()
+DEFAULT_LEAGUE_ID = 1
+DEFAULT_LEAGUE_NAME = 'NFL PickEm'
+DEFAULT_SEASON = 2025  # Season of all rows stored before leagues and seasons existed
+SEASON_ENV = 'NFL_SEASON'
+
+# Scope columns per table; matches are shared by the leagues of a season
+SCOPE_COLUMNS = {
+    'user': ['league_id'],
+    'match': ['season'],
+    'pick': ['league_id', 'season'],
+    'eliminated_team': ['league_id', 'season'],
+    'team_winner_usage': ['league_id', 'season'],
+    'team_loser_usage': ['league_id', 'season'],
+}
+
+# Same names and columns as the indexes declared on the models
+SCOPE_INDEXES = [
+    ('ix_user_league', 'user', ['league_id']),
+    ('ix_match_season_week', 'match', ['season', 'week']),
+    ('ix_pick_scope_user', 'pick', ['league_id', 'season', 'user_id']),
+    ('ix_pick_match_league', 'pick', ['match_id', 'league_id']),
+    ('ix_eliminated_team_scope_user', 'eliminated_team', ['league_id', 'season', 'user_id', 'team_id']),
+    ('ix_team_winner_usage_scope_user', 'team_winner_usage', ['league_id', 'season', 'user_id', 'team_id']),
+    ('ix_team_loser_usage_scope_user', 'team_loser_usage', ['league_id', 'season', 'user_id', 'team_id']),
+]
+
+LEAGUE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS league (
+        id INTEGER NOT NULL PRIMARY KEY,
+        name VARCHAR(100) NOT NULL UNIQUE,
+        created_at DATETIME
+    )
+"""
+
+def season_for_date(day):
+    """NFL season a date belongs to (January and February games end the previous year's season)"""
+    return day.year if day.month >= 3 else day.year - 1
+
+def resolve_season(latest_stored=None):
+    """Season to work in when none is requested; latest_stored() returns the latest season with matches"""
+    if os.environ.get(SEASON_ENV):
+        return int(os.environ[SEASON_ENV])
+    season = latest_stored() if latest_stored else None
+    return int(season) if season else season_for_date(date.today())
+
+def read_latest_season(db_path=DEFAULT_DB_PATH):
+    """Latest season with matches in db_path, or in the configured server database if db_path is None"""
+    if db_path is None:
+        from sqlalchemy import text
+
+        with get_engine().connect() as conn:
+            return conn.execute(text("SELECT MAX(season) FROM match")).scalar()
+
+    try:
+        return get_connection(db_path).execute("SELECT MAX(season) FROM match").fetchone()[0]
+    except sqlite3.OperationalError:
+        return None  # Not migrated yet
+
+def get_request_scope(latest_stored=None):
+    """
+    (league_id, season) of the current Flask request.
+
+    ?league_id= and ?season= select them explicitly; otherwise the league
+    of the logged-in user (stored in the session at login) and the current
+    season are used.
+    """
+    from flask import request, session
+
+    league_id = request.args.get('league_id', type=int) or session.get('league_id') or DEFAULT_LEAGUE_ID
+    season = request.args.get('season', type=int) or resolve_season(latest_stored)
+    return league_id, season
+
+def migrate_league_scope(conn, season=DEFAULT_SEASON):
+    """Add the league table, scope columns and indexes to an existing database (idempotent); returns columns added"""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    added = []
+
+    with conn:
+        conn.execute(LEAGUE_SCHEMA)
+        conn.execute("INSERT OR IGNORE INTO league (id, name, created_at) VALUES (?, ?, datetime('now'))",
+                     (DEFAULT_LEAGUE_ID, DEFAULT_LEAGUE_NAME))
+
+        for table_name, columns in SCOPE_COLUMNS.items():
+            if table_name not in existing:
+                continue
+            present = {row[1] for row in conn.execute(f'PRAGMA table_info("{table_name}")')}
+            for column in columns:
+                if column in present:
+                    continue
+                default = DEFAULT_LEAGUE_ID if column == 'league_id' else season
+                conn.execute(f'ALTER TABLE "{table_name}" ADD COLUMN {column} INTEGER NOT NULL DEFAULT {default}')
+                added.append(f"{table_name}.{column}")
+
+        for index_name, table_name, columns in SCOPE_INDEXES:
+            if table_name in existing:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON "{table_name}" ({", ".join(columns)})')
+
+    if added:
+        logger.info(f"League scope migration: added {', '.join(added)}")
+    return added
+
+def migrate_database(db_path=DEFAULT_DB_PATH):
+    """Run migrate_league_scope on a database file"""
+    return migrate_league_scope(get_connection(db_path))
+
+def list_leagues(conn):
+    """(id, name, users) of every league"""
+    return conn.execute("""
+        SELECT l.id, l.name, COUNT(u.id) FROM league l
+        LEFT JOIN user u ON u.league_id = l.id
+        GROUP BY l.id ORDER BY l.id
+    """).fetchall()
+
+def add_league(conn, name):
+    """Create a league; returns its id"""
+    with conn:
+        cursor = conn.execute("INSERT INTO league (name, created_at) VALUES (?, datetime('now'))", (name,))
+    return cursor.lastrowid
+
+def main():
+    """Main function for command-line usage"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if len(sys.argv) < 2:
+        print(__doc__.split('Usage:')[1])
+        return 1
+
+    command = sys.argv[1].lower()
+
+    if command == 'add' and len(sys.argv) > 2:
+        db_path = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_DB_PATH
+    else:
+        db_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_DB_PATH
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        migrate_league_scope(conn)
+        if command == 'migrate':
+            print(f"{db_path} is scoped by league and season")
+        elif command == 'list':
+            for league_id, name, users in list_leagues(conn):
+                print(f"{league_id:4d}  {name} ({users} users)")
+        elif command == 'add' and len(sys.argv) > 2:
+            print(f"League '{sys.argv[2]}' created with id {add_league(conn, sys.argv[2])}")
+        else:
+            print("Unknown command. Use: migrate, list or add <name>")
+            return 1
+    finally:
+        conn.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
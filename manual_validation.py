@@ -21,7 +21,7 @@ def main():
     parser.add_argument('--week', type=int, help='Validate specific week (1-18)')
     parser.add_argument('--current', action='store_true', help='Validate current week')
     parser.add_argument('--all', action='store_true', help='Validate all incomplete weeks')
-    parser.add_argument('--year', type=int, default=2025, help='NFL season year (default: 2025)')
+    parser.add_argument('--year', type=int, help='NFL season year (default: current season)')
     
     args = parser.parse_args()
     
@@ -0,0 +1,309 @@
+"""
+Database Models for NFL PickEm App
+
+SQLAlchemy models of the pick'em league. Importing this module has no side
+effects: the db object is not bound to an application until create_app()
+(app.py) calls db.init_app, so maintenance scripts, benchmarks and tests can
+import the models without creating tables, registering blueprints or
+starting the game validator.
+
+Users belong to a league; matches to a season shared by all leagues; picks,
+usage and eliminations to both (see leagues.py). The composite indexes put
+league and season first, so one league's queries stay as fast as with a
+single league.
+"""
+
+from datetime import datetime
+
+from flask_sqlalchemy import SQLAlchemy
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from leagues import DEFAULT_LEAGUE_ID, DEFAULT_LEAGUE_NAME, DEFAULT_SEASON
+from static_assets import asset_url
+
+db = SQLAlchemy()
+
+def league_column():
+    return db.Column(db.Integer, db.ForeignKey('league.id'), nullable=False,
+                     default=DEFAULT_LEAGUE_ID, server_default=str(DEFAULT_LEAGUE_ID))
+
+def season_column():
+    return db.Column(db.Integer, nullable=False, default=DEFAULT_SEASON, server_default=str(DEFAULT_SEASON))
+
+class League(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False, default=DEFAULT_LEAGUE_NAME)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class User(db.Model):
+    __table_args__ = (db.Index('ix_user_league', 'league_id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    league_id = league_column()
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    password_hash = db.Column(db.String(128), nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=True)
+    is_admin = db.Column(db.Boolean, default=False)
+    
+    def set_password(self, password):
+        self.password_hash = generate_password_hash(password)
+        
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'username': self.username,
+            'email': self.email,
+            'is_admin': self.is_admin,
+            'league_id': self.league_id,
+            'score': self.get_score()
+        }
+    
+    def get_score(self, season=None):
+        """Calculate user's total score based on correct picks (of one season if given)"""
+        score = 0
+        query = Pick.query.filter_by(league_id=self.league_id, user_id=self.id)
+        if season is not None:
+            query = query.filter_by(season=season)
+        picks = query.all()
+        for pick in picks:
+            match = db.session.get(Match, pick.match_id)
+            if match and match.is_completed and match.winner_team_id == pick.chosen_team_id:
+                score += 1
+        return score
+
+class Team(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    abbreviation = db.Column(db.String(10), nullable=False)
+    logo_url = db.Column(db.String(255), nullable=False)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'abbreviation': self.abbreviation,
+            'logo_url': asset_url(self.logo_url)  # Fingerprinted file after a static build
+        }
+
+class Match(db.Model):
+    __table_args__ = (db.Index('ix_match_season_week', 'season', 'week'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    season = season_column()
+    week = db.Column(db.Integer, nullable=False)
+    home_team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
+    away_team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    is_completed = db.Column(db.Boolean, default=False)
+    winner_team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=True)
+    
+    # New fields for ESPN integration
+    home_score = db.Column(db.Integer, nullable=True)
+    away_score = db.Column(db.Integer, nullable=True)
+    status = db.Column(db.String(20), default='scheduled')  # scheduled, in_progress, completed
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    home_team = db.relationship('Team', foreign_keys=[home_team_id])
+    away_team = db.relationship('Team', foreign_keys=[away_team_id])
+    winner_team = db.relationship('Team', foreign_keys=[winner_team_id])
+    
+    # Helper properties for ESPN integration
+    @property
+    def home_team_name(self):
+        return self.home_team.name if self.home_team else None
+    
+    @property
+    def away_team_name(self):
+        return self.away_team.name if self.away_team else None
+    
+    @property
+    def winner(self):
+        return self.winner_team.name if self.winner_team else None
+    
+    @property
+    def is_game_started(self):
+        """Check if the game has started (corrected timezone handling)"""
+        import pytz
+        from datetime import datetime
+        
+        # Get current time in Vienna
+        vienna_tz = pytz.timezone('Europe/Vienna')
+        now_vienna = datetime.now(vienna_tz)
+        
+        # Interpret stored time as US Eastern Time (not UTC!)
+        eastern_tz = pytz.timezone('US/Eastern')
+        
+        if self.start_time.tzinfo is None:
+            # Stored time is US Eastern Time without timezone info
+            start_time_eastern = eastern_tz.localize(self.start_time)
+        else:
+            # If timezone info exists, convert to Eastern first
+            start_time_eastern = self.start_time.astimezone(eastern_tz)
+            
+        # Convert to Vienna time for comparison
+        start_time_vienna = start_time_eastern.astimezone(vienna_tz)
+        
+        return now_vienna >= start_time_vienna
+    
+    @property
+    def start_time_vienna(self):
+        """Get start time in Vienna timezone (corrected)"""
+        import pytz
+        
+        vienna_tz = pytz.timezone('Europe/Vienna')
+        eastern_tz = pytz.timezone('US/Eastern')
+        
+        if self.start_time.tzinfo is None:
+            # Stored time is US Eastern Time
+            start_time_eastern = eastern_tz.localize(self.start_time)
+        else:
+            start_time_eastern = self.start_time.astimezone(eastern_tz)
+            
+        return start_time_eastern.astimezone(vienna_tz)
+    
+    @winner.setter
+    def winner(self, team_name):
+        if team_name:
+            team = Team.query.filter_by(name=team_name).first()
+            if team:
+                self.winner_team_id = team.id
+                self.is_completed = True
+                self.status = 'completed'
+    
+    API_FIELDS = ('id', 'season', 'week', 'home_team', 'away_team', 'start_time', 'start_time_vienna',
+                  'is_completed', 'is_game_started', 'home_score', 'away_score', 'status', 'winner',
+                  'updated_at', 'winner_team')
+    
+    def to_dict(self, fields=None):
+        """API representation; fields (subset of API_FIELDS) limits it, and the work, to those keys"""
+        values = {
+            'id': lambda: self.id,
+            'season': lambda: self.season,
+            'week': lambda: self.week,
+            'home_team': lambda: self.home_team.to_dict(),
+            'away_team': lambda: self.away_team.to_dict(),
+            'start_time': lambda: self.start_time.isoformat(),
+            'start_time_vienna': lambda: self.start_time_vienna.isoformat(),
+            'is_completed': lambda: self.is_completed,
+            'is_game_started': lambda: self.is_game_started,
+            'home_score': lambda: self.home_score,
+            'away_score': lambda: self.away_score,
+            'status': lambda: self.status,
+            'winner': lambda: self.winner,
+            'updated_at': lambda: self.updated_at.isoformat() if self.updated_at else None,
+            'winner_team': lambda: self.winner_team.to_dict() if self.winner_team_id else None
+        }
+        return {field: values[field]() for field in fields or self.API_FIELDS}
+
+class Pick(db.Model):
+    __table_args__ = (
+        db.Index('ix_pick_scope_user', 'league_id', 'season', 'user_id'),
+        db.Index('ix_pick_match_league', 'match_id', 'league_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    league_id = league_column()
+    season = season_column()
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    match_id = db.Column(db.Integer, db.ForeignKey('match.id'), nullable=False)
+    chosen_team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
+    
+    user = db.relationship('User')
+    match = db.relationship('Match')
+    chosen_team = db.relationship('Team')
+    
+    @property
+    def is_correct(self):
+        if not self.match.is_completed:
+            return False
+        return self.chosen_team_id == self.match.winner_team_id
+    
+    API_FIELDS = ('id', 'user', 'match', 'chosen_team', 'is_correct')
+    
+    def to_dict(self, fields=None):
+        """API representation; fields (subset of API_FIELDS) limits it, and the work, to those keys"""
+        values = {
+            'id': lambda: self.id,
+            'user': lambda: self.user.to_dict(),
+            'match': lambda: self.match.to_dict(),
+            'chosen_team': lambda: self.chosen_team.to_dict(),
+            'is_correct': lambda: self.is_correct
+        }
+        return {field: values[field]() for field in fields or self.API_FIELDS}
+
+class EliminatedTeam(db.Model):
+    __table_args__ = (db.Index('ix_eliminated_team_scope_user', 'league_id', 'season', 'user_id', 'team_id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    league_id = league_column()
+    season = season_column()
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
+    elimination_type = db.Column(db.String(20), nullable=False)  # 'winner' or 'loser'
+    
+    user = db.relationship('User')
+    team = db.relationship('Team')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user': self.user.to_dict(),
+            'team': self.team.to_dict(),
+            'elimination_type': self.elimination_type
+        }
+
+class TeamWinnerUsage(db.Model):
+    __table_args__ = (db.Index('ix_team_winner_usage_scope_user', 'league_id', 'season', 'user_id', 'team_id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    league_id = league_column()
+    season = season_column()
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
+    usage_count = db.Column(db.Integer, default=0)
+    
+    user = db.relationship('User')
+    team = db.relationship('Team')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user': self.user.to_dict(),
+            'team': self.team.to_dict(),
+            'usage_count': self.usage_count
+        }
+
+class TeamLoserUsage(db.Model):
+    """Tracks teams that have been picked as losers (automatically when picking a winner)"""
+    __table_args__ = (db.Index('ix_team_loser_usage_scope_user', 'league_id', 'season', 'user_id', 'team_id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    league_id = league_column()
+    season = season_column()
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
+    week = db.Column(db.Integer, nullable=False)  # Track which week this happened
+    match_id = db.Column(db.Integer, db.ForeignKey('match.id'), nullable=False)  # Track the specific match
+    
+    user = db.relationship('User')
+    team = db.relationship('Team')
+    match = db.relationship('Match')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user': self.user.to_dict(),
+            'team': self.team.to_dict(),
+            'week': self.week,
+            'match': self.match.to_dict()
+        }
@@ -0,0 +1,353 @@
+"""
+Mutation Journal for NFL PickEm App
+
+Append-only journal of committed data changes (picks, usage counters,
+eliminations, match results), written next to the database file. Each entry
+holds the after-images of the rows that changed since the previous entry, as
+collected from the change_log table, so entries can be replayed with
+change_log.apply_changes().
+
+Point-in-time recovery = newest backup snapshot taken before the target time
+plus every journal entry up to that time. No full copy of the database is
+needed before risky operations: run_reverting_on_error() records the rows an
+operation writes and, if it fails, resets only those rows.
+
+Usage:
+    python mutation_journal.py capture [db_path]
+    python mutation_journal.py status [db_path]
+    python mutation_journal.py recover <YYYY-MM-DDTHH:MM[:SS]> [target_path]
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import logging
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; journal writes are then unlocked
+    fcntl = None
+
+from change_log import TRACKED_TABLES, ChangesPruned, apply_changes, get_changes_since
+from database import get_connection, get_database_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = get_database_path()
+
+def journal_path_for(db_path):
+    """The journal lives alongside the database file"""
+    return f"{db_path}.journal"
+
+class MutationJournal:
+    """Appends committed row changes of one database to its journal file"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, journal_path=None):
+        self.db_path = db_path
+        self.journal_path = journal_path or journal_path_for(db_path)
+
+    def _last_seq(self, f):
+        """Read the to_seq of the last complete journal line"""
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        block = b''
+        position = end
+        while position > 0:
+            step = min(4096, position)
+            position -= step
+            f.seek(position)
+            block = f.read(step) + block
+            lines = block.rstrip(b'\n').split(b'\n')
+            if len(lines) > 1 or position == 0:
+                last_line = lines[-1]
+                if not last_line:
+                    return 0
+                try:
+                    return json.loads(last_line)['to_seq']
+                except (ValueError, KeyError):
+                    logger.warning("Ignoring damaged last journal line")
+                    return 0
+        return 0
+
+    def last_seq(self):
+        """Change sequence covered by the journal so far"""
+        if not os.path.exists(self.journal_path):
+            return 0
+        with open(self.journal_path, 'rb') as f:
+            return self._last_seq(f)
+
+    def capture(self):
+        """Append all changes committed since the last entry; returns the number of rows journaled"""
+        if not os.path.exists(self.db_path):
+            return 0
+
+        with open(self.journal_path, 'a+b') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                since = self._last_seq(f)
+
+                conn = get_connection(self.db_path)
+                try:
+                    change_set = get_changes_since(conn, since, limit=1_000_000)
+                except ChangesPruned as e:
+                    # Changes in between are lost to the journal; recovery refuses to replay across the gap
+                    logger.warning(f"Journal gap: {e}")
+                    since = e.oldest_seq
+                    change_set = get_changes_since(conn, since, limit=1_000_000)
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"Change log not available, nothing journaled: {e}")
+                    return 0
+
+                if change_set['to_seq'] == since:
+                    return 0
+
+                entry = {
+                    'ts': datetime.now().isoformat(),
+                    'from_seq': since,
+                    'to_seq': change_set['to_seq'],
+                    'changes': change_set['changes'],
+                }
+                f.seek(0, os.SEEK_END)
+                f.write(json.dumps(entry, default=str).encode('utf-8') + b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+                rows = sum(len(t['upserts']) + len(t['deletes']) for t in change_set['changes'].values())
+                logger.info(f"Journaled changes {since} → {change_set['to_seq']} ({rows} rows)")
+                return rows
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def entries(self, after_seq=0, until=None):
+        """Iterate journal entries with to_seq > after_seq and a timestamp at or before `until`"""
+        if not os.path.exists(self.journal_path):
+            return
+
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning("Skipping damaged journal line")
+                    continue
+                if entry['to_seq'] <= after_seq:
+                    continue
+                if until is not None and datetime.fromisoformat(entry['ts']) > until:
+                    break
+                yield entry
+
+def recover_to_point_in_time(target_time, output_path, db_path=DEFAULT_DB_PATH, store=None):
+    """
+    Rebuild the database as of target_time into output_path.
+
+    Starts from the newest backup snapshot taken at or before target_time and
+    replays the journal on top of it in a single transaction. Returns a summary
+    dict; raises ValueError if no usable snapshot exists or the journal has a
+    gap after it.
+    """
+    if store is None:
+        from backup_store import BackupStore
+        store = BackupStore()
+
+    manifest = store.find_snapshot(at=target_time, source=db_path)
+    if not manifest:
+        raise ValueError(f"No snapshot taken at or before {target_time.isoformat()}")
+    if manifest.get('data_version') is None:
+        raise ValueError(f"Snapshot {manifest['id']} does not record its data version")
+
+    store.materialize(manifest, output_path)
+
+    journal = MutationJournal(db_path)
+    applied_entries = 0
+    applied_rows = 0
+    last_seq = manifest['data_version']
+
+    conn = sqlite3.connect(output_path)
+    try:
+        with conn:
+            for entry in journal.entries(after_seq=manifest['data_version'], until=target_time):
+                if entry['from_seq'] > last_seq:
+                    raise ValueError(f"Journal is missing changes {last_seq} → {entry['from_seq']}")
+                applied_rows += apply_changes(conn, entry['changes'])
+                applied_entries += 1
+                last_seq = entry['to_seq']
+    finally:
+        conn.close()
+
+    logger.info(f"Recovered {output_path} to {target_time.isoformat()}: snapshot {manifest['id']} + "
+                f"{applied_entries} journal entries")
+    return {
+        'snapshot_id': manifest['id'],
+        'snapshot_created_at': manifest['created_at'],
+        'journal_entries': applied_entries,
+        'rows_applied': applied_rows,
+        'data_version': last_seq,
+    }
+
+class OperationWrites:
+    """
+    Rows one operation writes through a sqlite3 connection, with their images before and after.
+
+    Recorded by TEMP triggers, which only fire for that connection, so writes
+    of other connections, threads and processes are never attributed to the
+    operation. Images are json_array() of the row's columns; a row that did
+    not exist before (or no longer exists after) has a NULL image.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.columns = {}  # table -> column names, as the images list them
+
+    def start(self):
+        """Install the temp table and triggers (commits the connection's open transaction)"""
+        existing = {row[0] for row in self.conn.execute("SELECT name FROM main.sqlite_master WHERE type='table'")}
+        with self.conn:
+            self.conn.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS operation_writes (
+                    table_name TEXT NOT NULL,
+                    row_id INTEGER NOT NULL,
+                    before_image TEXT,
+                    after_image TEXT,
+                    PRIMARY KEY (table_name, row_id)
+                )
+            """)
+            for table_name in TRACKED_TABLES:
+                if table_name not in existing:
+                    continue
+                columns = [row[1] for row in self.conn.execute(f'PRAGMA main.table_info("{table_name}")')]
+                self.columns[table_name] = columns
+                new_image = 'json_array(' + ', '.join(f'NEW."{column}"' for column in columns) + ')'
+                old_image = 'json_array(' + ', '.join(f'OLD."{column}"' for column in columns) + ')'
+                # INSERT OR IGNORE keeps the image from before the operation's first write of a row
+                for event, ref, before, after in (('INSERT', 'NEW', 'NULL', new_image),
+                                                  ('UPDATE', 'NEW', old_image, new_image),
+                                                  ('DELETE', 'OLD', old_image, 'NULL')):
+                    self.conn.execute(f"""
+                        CREATE TEMP TRIGGER IF NOT EXISTS operation_writes_{table_name}_{event.lower()}
+                        AFTER {event} ON main."{table_name}"
+                        BEGIN
+                            INSERT OR IGNORE INTO operation_writes (table_name, row_id, before_image)
+                                VALUES ('{table_name}', {ref}.id, {before});
+                            UPDATE operation_writes SET after_image = {after}
+                                WHERE table_name = '{table_name}' AND row_id = {ref}.id;
+                        END
+                    """)
+
+    def stop(self, commit=True):
+        """Commit (or roll back) what the operation left open and remove the triggers; returns the recorded writes"""
+        if commit:
+            self.conn.commit()
+        else:
+            self.conn.rollback()
+        writes = self.conn.execute(
+            "SELECT table_name, row_id, before_image, after_image FROM operation_writes ORDER BY table_name, row_id"
+        ).fetchall()
+        with self.conn:
+            for table_name in self.columns:
+                for event in ('insert', 'update', 'delete'):
+                    self.conn.execute(f"DROP TRIGGER IF EXISTS temp.operation_writes_{table_name}_{event}")
+            self.conn.execute("DROP TABLE IF EXISTS temp.operation_writes")
+        return writes
+
+    def revert(self, writes):
+        """
+        Reset the rows in writes to their images from before the operation.
+
+        A row is only reset while it still matches the operation's after-image;
+        rows another writer changed since are left alone and returned as
+        conflicts. Returns (rows reverted, [(table, row id), ...] conflicts).
+        """
+        reverted = 0
+        conflicts = []
+        with self.conn:
+            for table_name, row_id, before_image, after_image in writes:
+                columns = self.columns[table_name]
+                image = 'json_array(' + ', '.join(f'"{column}"' for column in columns) + ')'
+                row = self.conn.execute(f'SELECT {image} FROM "{table_name}" WHERE id = ?', (row_id,)).fetchone()
+                if (row[0] if row else None) != after_image:
+                    conflicts.append((table_name, row_id))
+                    continue
+                if before_image is None:
+                    self.conn.execute(f'DELETE FROM "{table_name}" WHERE id = ?', (row_id,))
+                else:
+                    column_list = ', '.join(f'"{column}"' for column in columns)
+                    placeholders = ', '.join('?' for _ in columns)
+                    self.conn.execute(f'INSERT OR REPLACE INTO "{table_name}" ({column_list}) VALUES ({placeholders})',
+                                      json.loads(before_image))
+                reverted += 1
+        return reverted, conflicts
+
+def run_reverting_on_error(operation_func, db_path=DEFAULT_DB_PATH):
+    """
+    Run operation_func(); if it raises, undo exactly the rows it wrote and re-raise.
+
+    Tracks the writes made through this thread's database connection
+    (database.get_connection(db_path)), which the operation must use. Other
+    writers' changes stay as they are, also to rows the operation touched
+    after them: such conflicting rows are logged and not reverted. The revert
+    goes through normal SQL, so it is itself recorded in the change log and
+    journal.
+    """
+    journal = MutationJournal(db_path)
+    journal.capture()
+
+    tracker = OperationWrites(get_connection(db_path))
+    tracker.start()
+    try:
+        result = operation_func()
+    except Exception:
+        writes = tracker.stop(commit=False)
+        reverted, conflicts = tracker.revert(writes)
+        if conflicts:
+            logger.warning(f"Not reverted, changed by another writer since: "
+                           f"{', '.join(f'{table}#{row_id}' for table, row_id in conflicts)}")
+        logger.info(f"Reverted {reverted} of {len(writes)} rows written by the failed operation")
+        journal.capture()
+        raise
+    tracker.stop(commit=True)
+    journal.capture()
+    return result
+
+def main():
+    """Main function for command-line usage"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if len(sys.argv) < 2:
+        print(__doc__.split('Usage:')[1])
+        return 1
+
+    command = sys.argv[1].lower()
+
+    if command == 'capture':
+        db_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_DB_PATH
+        rows = MutationJournal(db_path).capture()
+        print(f"Journaled {rows} rows")
+    elif command == 'status':
+        db_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_DB_PATH
+        journal = MutationJournal(db_path)
+        entries = list(journal.entries())
+        if entries:
+            print(f"{len(entries)} entries from {entries[0]['ts']} to {entries[-1]['ts']}, "
+                  f"change sequence {entries[0]['from_seq']} → {entries[-1]['to_seq']}")
+        else:
+            print("Journal is empty")
+    elif command == 'recover':
+        if len(sys.argv) < 3:
+            print("Usage: python mutation_journal.py recover <timestamp> [target_path]")
+            return 1
+        target_time = datetime.fromisoformat(sys.argv[2])
+        output_path = sys.argv[3] if len(sys.argv) > 3 else f"nfl_pickem_recovered_{target_time.strftime('%Y%m%d_%H%M%S')}.db"
+        summary = recover_to_point_in_time(target_time, output_path)
+        print(f"Recovered to {output_path}: snapshot {summary['snapshot_id']} + "
+              f"{summary['journal_entries']} journal entries ({summary['rows_applied']} rows)")
+    else:
+        print("Unknown command. Use: capture, status, or recover")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""
+Pick Planner Module for NFL PickEm App
+
+Plans a user's picks for all remaining weeks so the expected number of correct
+picks is as high as possible while respecting the usage rules: a team may be
+picked at most 2x as winner and at most 1x as loser (the implied opponent).
+
+Every team plays at most once per week, so a pick is fully described by its
+week and the team it sets up as loser. Under the loser limit alone the best
+plan is therefore a min-cost assignment (a min-cost flow with unit capacities)
+of weeks to loser slots, solved with the Hungarian method. The winner limit is
+added through Lagrangian penalties on over-used winners; each round's
+assignment is made valid and improved pick by pick, and the best valid plan is
+kept together with the Lagrangian upper bound. Results are memoized on the
+usage state, the open schedule and the odds, so repeated calls are answered
+from memory; a full 17-week season takes under 100 ms uncached.
+"""
+
+import logging
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+from season_analytics import MAX_LOSER_USAGE, MAX_WINNER_USAGE
+
+logger = logging.getLogger(__name__)
+
+def remaining_capacity(snapshot, user_id):
+    """Winner and loser picks left per team id, from the usage and elimination tables"""
+    team_ids = snapshot['team']['id'].tolist()
+    winner_left = {team_id: MAX_WINNER_USAGE for team_id in team_ids}
+    loser_left = {team_id: MAX_LOSER_USAGE for team_id in team_ids}
+
+    winner_usage = snapshot['team_winner_usage']
+    for team_id, usage_count in zip(winner_usage['team_id'][winner_usage['user_id'] == user_id].tolist(),
+                                    winner_usage['usage_count'][winner_usage['user_id'] == user_id].tolist()):
+        if team_id in winner_left:
+            winner_left[team_id] -= max(usage_count, 0)
+
+    loser_usage = snapshot['team_loser_usage']
+    for team_id in loser_usage['team_id'][loser_usage['user_id'] == user_id].tolist():
+        if team_id in loser_left:
+            loser_left[team_id] -= 1
+
+    eliminated = snapshot['eliminated_team']
+    mine = eliminated['user_id'] == user_id
+    for team_id, elimination_type in zip(eliminated['team_id'][mine].tolist(), eliminated['elimination_type'][mine].tolist()):
+        if elimination_type == 'winner' and team_id in winner_left:
+            winner_left[team_id] = 0
+        elif elimination_type == 'loser' and team_id in loser_left:
+            loser_left[team_id] = 0
+
+    return ({team_id: max(left, 0) for team_id, left in winner_left.items()},
+            {team_id: max(left, 0) for team_id, left in loser_left.items()})
+
+def has_kicked_off(start_time, now):
+    """True if a snapshot start time (naive US Eastern, as Match.is_game_started reads it) is not after now"""
+    try:
+        return datetime.fromisoformat(str(start_time)) <= now
+    except ValueError:
+        return False
+
+def kicked_off(matches, now=None):
+    """Per match row: True once the game started; POST /api/picks refuses it from then on, final or not"""
+    import pytz
+
+    now = now or datetime.now(pytz.timezone('US/Eastern')).replace(tzinfo=None)
+    return np.array([has_kicked_off(start_time, now) for start_time in matches['start_time']], dtype=bool)
+
+def open_week_options(snapshot, home_probabilities, user_id):
+    """Per open week without a pick of this user: (week, ((match_id, winner, loser, probability), ...))"""
+    matches = snapshot['match']
+    picks = snapshot['pick']
+    picked_rows = snapshot.rows_for('match', picks['match_id'][picks['user_id'] == user_id])
+    picked_weeks = set(matches['week'][picked_rows[picked_rows >= 0]].tolist())
+
+    open_rows = np.flatnonzero((matches['is_completed'] != 1) & ~kicked_off(matches))
+    options_by_week = {}
+    for row in open_rows.tolist():
+        week = int(matches['week'][row])
+        if week in picked_weeks:
+            continue
+        match_id = int(matches['id'][row])
+        home_id, away_id = int(matches['home_team_id'][row]), int(matches['away_team_id'][row])
+        home_p = float(home_probabilities[row])
+        options_by_week.setdefault(week, []).extend([
+            (match_id, home_id, away_id, home_p),
+            (match_id, away_id, home_id, 1.0 - home_p),
+        ])
+
+    return tuple((week, tuple(options_by_week[week])) for week in sorted(options_by_week))
+
+FORBIDDEN = 1e6  # Assignment cost of options that are not allowed
+LAGRANGE_ITERATIONS = 25
+
+def _assign(cost):
+    """Minimum-cost assignment of every row to a distinct column (rows <= columns); returns column per row"""
+    cost = cost.tolist()  # Plain lists: the matrices are small and the loop is scalar
+    rows, columns = len(cost), len(cost[0])
+    inf = float('inf')
+    u = [0.0] * (rows + 1)
+    v = [0.0] * (columns + 1)
+    owner = [0] * (columns + 1)  # Row (1-based) assigned to each column, 0 = free
+    way = [0] * (columns + 1)
+
+    # Shortest augmenting paths with potentials (Hungarian method), one row at a time
+    for row in range(1, rows + 1):
+        owner[0] = row
+        column = 0
+        min_reduced = [inf] * (columns + 1)
+        used = [False] * (columns + 1)
+        while True:
+            used[column] = True
+            current_row = owner[column]
+            row_cost = cost[current_row - 1]
+            row_potential = u[current_row]
+            delta = inf
+            next_column = 0
+            for j in range(1, columns + 1):
+                if not used[j]:
+                    reduced = row_cost[j - 1] - row_potential - v[j]
+                    if reduced < min_reduced[j]:
+                        min_reduced[j] = reduced
+                        way[j] = column
+                    if min_reduced[j] < delta:
+                        delta = min_reduced[j]
+                        next_column = j
+            for j in range(columns + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_reduced[j] -= delta
+            column = next_column
+            if owner[column] == 0:
+                break
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    assignment = [-1] * rows
+    for column in range(1, columns + 1):
+        if owner[column]:
+            assignment[owner[column] - 1] = column - 1
+    return assignment
+
+def _best_under_loser_limits(weeks, loser_left, penalty):
+    """Best plan respecting the loser limits only, with option values reduced by the winner penalties"""
+    slots = [team_id for team_id, left in loser_left.items() for _ in range(left)]
+    cost = np.full((len(weeks), len(slots) + len(weeks)), FORBIDDEN)
+    cost[:, len(slots):] = 0.0  # One "no pick" column per week
+    choice = {}
+    for week_index, (_, options) in enumerate(weeks):
+        # Every team plays at most once per week, so the loser identifies the option
+        by_loser = {option[2]: option for option in options}
+        for slot, team_id in enumerate(slots):
+            option = by_loser.get(team_id)
+            if option is not None:
+                cost[week_index, slot] = penalty.get(option[1], 0.0) - option[3]
+                choice[week_index, slot] = option
+
+    assignment = _assign(cost) if len(weeks) else []
+    return [(weeks[week_index][0], choice[week_index, slot])
+            for week_index, slot in enumerate(assignment) if (week_index, slot) in choice]
+
+def _usage(plan):
+    """Winner and loser counts of a plan"""
+    winner_used, loser_used = {}, {}
+    for _, option in plan:
+        winner_used[option[1]] = winner_used.get(option[1], 0) + 1
+        loser_used[option[2]] = loser_used.get(option[2], 0) + 1
+    return winner_used, loser_used
+
+def _repair(weeks, plan, winner_left, loser_left):
+    """Turn a relaxed plan into a valid one and improve it pick by pick"""
+    # Keep the strongest picks that fit the limits
+    kept = {}
+    winner_used, loser_used = {}, {}
+    for week, option in sorted(plan, key=lambda pick: pick[1][3], reverse=True):
+        if winner_used.get(option[1], 0) < winner_left.get(option[1], 0) and \
+                loser_used.get(option[2], 0) < loser_left.get(option[2], 0):
+            kept[week] = option
+            winner_used[option[1]] = winner_used.get(option[1], 0) + 1
+            loser_used[option[2]] = loser_used.get(option[2], 0) + 1
+
+    # Replace single picks while that raises the expected wins (also fills empty weeks)
+    improved = True
+    while improved:
+        improved = False
+        for week, options in weeks:
+            current = kept.get(week)
+            current_value = current[3] if current else 0.0
+            for option in sorted(options, key=lambda option: option[3], reverse=True):
+                if option[3] <= current_value + 1e-12:
+                    break
+                freed_winner = 1 if current and current[1] == option[1] else 0
+                freed_loser = 1 if current and current[2] == option[2] else 0
+                if winner_used.get(option[1], 0) - freed_winner < winner_left.get(option[1], 0) and \
+                        loser_used.get(option[2], 0) - freed_loser < loser_left.get(option[2], 0):
+                    if current:
+                        winner_used[current[1]] -= 1
+                        loser_used[current[2]] -= 1
+                    kept[week] = option
+                    winner_used[option[1]] = winner_used.get(option[1], 0) + 1
+                    loser_used[option[2]] = loser_used.get(option[2], 0) + 1
+                    improved = True
+                    break
+
+    return tuple(sorted(kept.items()))
+
+@lru_cache(maxsize=256)
+def solve_plan(weeks, winner_left, loser_left):
+    """
+    Best plan for the given open weeks and remaining capacities.
+
+    All arguments are tuples so the result can be memoized. Returns
+    (((week, option), ...), upper_bound): the plan and a bound on the best
+    achievable expected wins, so callers can report how close the plan is.
+    """
+    winner_capacity = dict(winner_left)
+    loser_capacity = dict(loser_left)
+    weeks = [(week, tuple(option for option in options if winner_capacity.get(option[1], 0) > 0
+                          and loser_capacity.get(option[2], 0) > 0))
+             for week, options in weeks]
+
+    best_plan, best_value, best_bound = (), 0.0, float('inf')
+    penalty = {}
+    step_scale = 1.0
+    for _ in range(LAGRANGE_ITERATIONS):
+        relaxed = _best_under_loser_limits(weeks, loser_capacity, penalty)
+
+        # Upper bound: relaxed value plus the penalties charged for the allowed winner uses
+        bound = sum(option[3] - penalty.get(option[1], 0.0) for _, option in relaxed) + \
+            sum(weight * winner_capacity[team_id] for team_id, weight in penalty.items())
+        best_bound = min(best_bound, bound)
+
+        candidate = _repair(weeks, relaxed, winner_capacity, loser_capacity)
+        value = sum(option[3] for _, option in candidate)
+        if value > best_value + 1e-12:
+            best_plan, best_value = candidate, value
+
+        winner_used, _ = _usage(relaxed)
+        if best_bound - best_value < 1e-9 or \
+                all(count <= winner_capacity[team_id] for team_id, count in winner_used.items()):
+            break  # Proven optimal
+
+        # Projected subgradient step on the winner penalties
+        gradient = {team_id: winner_used.get(team_id, 0) - winner_capacity[team_id]
+                    for team_id in set(winner_used) | set(penalty)}
+        norm = sum(g * g for team_id, g in gradient.items() if g > 0 or penalty.get(team_id, 0.0) > 0)
+        step = step_scale * (bound - best_value) / max(norm, 1e-12)
+        penalty = {team_id: max(0.0, penalty.get(team_id, 0.0) + step * g) for team_id, g in gradient.items()}
+        penalty = {team_id: weight for team_id, weight in penalty.items() if weight > 0}
+        step_scale *= 0.9
+
+    return best_plan, max(best_bound, best_value) if best_bound != float('inf') else best_value
+
+def plan_remaining_picks(snapshot, home_probabilities, user_id):
+    """Planned picks, expected wins and leftover winner picks for one user"""
+    winner_left, loser_left = remaining_capacity(snapshot, user_id)
+    weeks = open_week_options(snapshot, home_probabilities, user_id)
+    plan, upper_bound = solve_plan(weeks, tuple(sorted(winner_left.items())), tuple(sorted(loser_left.items())))
+
+    team_names = dict(zip(snapshot['team']['id'].tolist(), snapshot['team']['name'].tolist()))
+    planned_winners = {}
+    for _, option in plan:
+        planned_winners[option[1]] = planned_winners.get(option[1], 0) + 1
+
+    return {
+        'user_id': user_id,
+        'plan': [
+            {
+                'week': week,
+                'match_id': match_id,
+                'winner': {'id': winner, 'name': team_names.get(winner)},
+                'loser': {'id': loser, 'name': team_names.get(loser)},
+                'win_probability': round(probability, 4),
+            }
+            for week, (match_id, winner, loser, probability) in plan
+        ],
+        'expected_wins': round(sum(option[3] for _, option in plan), 3),
+        'expected_wins_upper_bound': round(upper_bound, 3),
+        'weeks_without_pick': [week for week, _ in weeks if week not in {planned[0] for planned in plan}],
+        'winner_picks_left_after_plan': {
+            team_names.get(team_id, str(team_id)): left - planned_winners.get(team_id, 0)
+            for team_id, left in winner_left.items()
+            if left - planned_winners.get(team_id, 0) > 0
+        },
+        'timestamp': datetime.now().isoformat(),
+    }
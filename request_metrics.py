@@ -0,0 +1,226 @@
+"""
+NFL PickEm Request Metrics
+Per-endpoint wall time, SQL statements, rows fetched and JSON serialization
+time, kept in rolling in-memory histograms and served at /api/metrics in the
+Prometheus text format.
+
+SQL statements are counted through the engine's before/after_cursor_execute
+events, fetched rows through the ORM load event (one per row materialized
+into a model object). Histograms cover the last ROLLING_WINDOW_SECONDS and
+live in the serving process, so every gunicorn worker reports its own share.
+
+Clients can send "X-Debug-Queries: 1" to get the statements of that request
+back in the X-Debug-Queries response header. This is answered in debug mode
+only: the SQL is no business of anonymous clients in production. Set the
+DEBUG_QUERIES_HEADER config flag (create_app({'DEBUG_QUERIES_HEADER': True}))
+or the DEBUG_QUERIES_HEADER=1 environment variable to turn it on elsewhere,
+or to False/0 to turn it off in debug mode too.
+"""
+
+import os
+import re
+import time
+import threading
+from collections import namedtuple
+
+from flask import Blueprint, Response, current_app, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+
+ROLLING_WINDOW_SECONDS = 600
+ROLLING_SLOTS = 10
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000)
+
+DEBUG_QUERIES_HEADER = 'X-Debug-Queries'
+DEBUG_QUERIES_ENV = 'DEBUG_QUERIES_HEADER'
+DEBUG_QUERIES_MAX_LENGTH = 16384  # Keep the header below common proxy limits
+
+Metric = namedtuple('Metric', 'name help buckets')
+
+HISTOGRAMS = (
+    Metric('nfl_pickem_request_duration_seconds', 'Request wall time', DURATION_BUCKETS),
+    Metric('nfl_pickem_request_sql_statements', 'SQL statements executed per request', STATEMENT_BUCKETS),
+    Metric('nfl_pickem_request_sql_seconds', 'Time spent executing SQL per request', DURATION_BUCKETS),
+    Metric('nfl_pickem_request_rows_fetched', 'ORM rows fetched per request', ROW_BUCKETS),
+    Metric('nfl_pickem_request_serialization_seconds', 'JSON serialization time per request', DURATION_BUCKETS),
+)
+
+class RollingHistogram:
+    """Bucketed observations of the last window_seconds, kept in a ring of time slots"""
+
+    def __init__(self, buckets, window_seconds=ROLLING_WINDOW_SECONDS, slots=ROLLING_SLOTS):
+        self.buckets = tuple(buckets)
+        self.slot_seconds = window_seconds / slots
+        self._slots = [[None, [0] * len(self.buckets), 0.0, 0] for _ in range(slots)]  # epoch, counts, sum, count
+
+    def _slot(self, epoch):
+        slot = self._slots[epoch % len(self._slots)]
+        if slot[0] != epoch:
+            slot[0], slot[1], slot[2], slot[3] = epoch, [0] * len(self.buckets), 0.0, 0
+        return slot
+
+    def observe(self, value, now=None):
+        slot = self._slot(int((now or time.time()) // self.slot_seconds))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                slot[1][index] += 1
+                break
+        slot[2] += value
+        slot[3] += 1
+
+    def snapshot(self, now=None):
+        """(cumulative counts per bucket, sum, count) over the window"""
+        current = int((now or time.time()) // self.slot_seconds)
+        counts, total, count = [0] * len(self.buckets), 0.0, 0
+        for epoch, slot_counts, slot_sum, slot_count in self._slots:
+            if epoch is not None and current - epoch < len(self._slots):
+                counts = [a + b for a, b in zip(counts, slot_counts)]
+                total += slot_sum
+                count += slot_count
+        cumulative, running = [], 0
+        for bucket_count in counts:
+            running += bucket_count
+            cumulative.append(running)
+        return cumulative, total, count
+
+class RequestMetrics:
+    """Rolling histograms per endpoint plus request counters since process start"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (metric name, endpoint) -> RollingHistogram
+        self._requests = {}    # (endpoint, status) -> count
+
+    def record(self, endpoint, status, values):
+        """values: metric name -> observation of one request"""
+        with self._lock:
+            for metric in HISTOGRAMS:
+                key = (metric.name, endpoint)
+                if key not in self._histograms:
+                    self._histograms[key] = RollingHistogram(metric.buckets)
+                self._histograms[key].observe(values[metric.name])
+            self._requests[endpoint, status] = self._requests.get((endpoint, status), 0) + 1
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = [
+            '# HELP nfl_pickem_requests_total Requests served since process start',
+            '# TYPE nfl_pickem_requests_total counter',
+        ]
+        with self._lock:
+            for (endpoint, status), count in sorted(self._requests.items()):
+                lines.append(f'nfl_pickem_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+
+            for metric in HISTOGRAMS:
+                lines.append(f'# HELP {metric.name} {metric.help} (last {ROLLING_WINDOW_SECONDS}s)')
+                lines.append(f'# TYPE {metric.name} histogram')
+                for (name, endpoint), histogram in sorted(self._histograms.items()):
+                    if name != metric.name:
+                        continue
+                    cumulative, total, count = histogram.snapshot()
+                    for bound, bucket_count in zip(metric.buckets, cumulative):
+                        lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {bucket_count}')
+                    lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="+Inf"}} {count}')
+                    lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {total:.6f}')
+                    lines.append(f'{name}_count{{endpoint="{endpoint}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+class RequestStats:
+    """What one request spent its time on"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = []
+        self.sql_seconds = 0.0
+        self.rows_fetched = 0
+        self.serialization_seconds = 0.0
+
+def current_stats():
+    """Stats of the request being served (None outside requests)"""
+    return g.get('request_stats') if has_request_context() else None
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Default JSON provider that adds its encoding time to the request stats"""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            stats = current_stats()
+            if stats is not None:
+                stats.serialization_seconds += time.perf_counter() - started
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    stats = current_stats()
+    if stats is not None:
+        stats.statements.append(statement)
+        stats.sql_seconds += time.perf_counter() - started
+
+def _count_loaded_row(target, context):
+    stats = current_stats()
+    if stats is not None:
+        stats.rows_fetched += 1
+
+def debug_queries_enabled():
+    """X-Debug-Queries is answered in debug mode unless DEBUG_QUERIES_HEADER says otherwise"""
+    return current_app.config.get('DEBUG_QUERIES_HEADER', current_app.debug)
+
+def _start_request():
+    g.request_stats = RequestStats()
+
+def _finish_request(response):
+    stats = g.pop('request_stats', None)
+    if stats is None or request.endpoint == 'metrics.metrics':
+        return response
+
+    endpoint = request.endpoint or 'unmatched'
+    duration = time.perf_counter() - stats.started
+    current_app.extensions['request_metrics'].record(endpoint, response.status_code, {
+        'nfl_pickem_request_duration_seconds': duration,
+        'nfl_pickem_request_sql_statements': len(stats.statements),
+        'nfl_pickem_request_sql_seconds': stats.sql_seconds,
+        'nfl_pickem_request_rows_fetched': stats.rows_fetched,
+        'nfl_pickem_request_serialization_seconds': stats.serialization_seconds,
+    })
+
+    if request.headers.get(DEBUG_QUERIES_HEADER) and debug_queries_enabled():
+        statements = '; '.join(re.sub(r'\s+', ' ', statement).strip() for statement in stats.statements)
+        response.headers[DEBUG_QUERIES_HEADER] = statements[:DEBUG_QUERIES_MAX_LENGTH]
+        response.headers['X-Debug-Query-Count'] = str(len(stats.statements))
+        response.headers['X-Debug-Query-Time-Ms'] = f'{stats.sql_seconds * 1000:.1f}'
+    return response
+
+# Create blueprint for the metrics endpoint
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Request metrics in the Prometheus text format"""
+    return Response(current_app.extensions['request_metrics'].render(),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Helper function to register the blueprint
+def register_request_metrics(app, engine, model_base):
+    """Instrument requests of the Flask app and register the metrics endpoint"""
+    app.extensions['request_metrics'] = RequestMetrics()
+    if DEBUG_QUERIES_ENV in os.environ:
+        app.config.setdefault('DEBUG_QUERIES_HEADER', os.environ[DEBUG_QUERIES_ENV].lower() in ('1', 'true', 'yes'))
+    app.json = TimedJSONProvider(app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    if not event.contains(model_base, 'load', _count_loaded_row):
+        event.listen(model_base, 'load', _count_loaded_row, propagate=True)
+
+    app.register_blueprint(metrics_bp)
@@ -0,0 +1,163 @@
+"""
+Schedule Ingestion Module for NFL PickEm App
+
+Pulls the regular season schedule from the score source and upserts it with
+schedule_loader: new games are inserted and kickoff times of existing games
+are corrected. Moved kickoffs are reported as 'flexed' (moved within the
+game week, e.g. into Sunday Night Football) or 'rescheduled' (moved further,
+e.g. a postponement), so the caller can refresh anything that caches them.
+
+Schedule providers return ESPN scoreboard payloads per week:
+    EspnScheduleProvider     live ESPN scoreboard API (default)
+    FixtureScheduleProvider  local week_<n>.json files in the same format,
+                             used when SCHEDULE_FIXTURE_DIR is set
+
+Games are stored once per season and shared by all leagues.
+
+Usage:
+    python schedule_ingestion.py [db_path] [first_week] [last_week] [season]
+"""
+
+import os
+import sys
+import json
+import logging
+from datetime import datetime
+
+from leagues import read_latest_season, resolve_season
+from schedule_loader import DEFAULT_DB_PATH, DATETIME_FORMAT, apply_schedule
+
+logger = logging.getLogger(__name__)
+
+REGULAR_SEASON_WEEKS = 18
+FIXTURE_DIR_ENV = 'SCHEDULE_FIXTURE_DIR'
+
+# Kickoffs moved by at most this many days stay in their game week (flex scheduling)
+FLEX_WINDOW_DAYS = 3
+
+# ESPN states of games that will not be played at their listed kickoff
+SKIPPED_STATUSES = {'STATUS_CANCELED'}
+
+class EspnScheduleProvider:
+    """Scoreboard payloads from the ESPN API"""
+
+    def __init__(self, base_url="https://site.api.espn.com/apis/site/v2/sports/football/nfl", timeout=30):
+        self.base_url = base_url
+        self.timeout = timeout
+
+    def scoreboard(self, week, year):
+        """Scoreboard payload of one regular season week (None if it could not be fetched)"""
+        import requests
+
+        try:
+            response = requests.get(f"{self.base_url}/scoreboard",
+                                    params={'seasontype': 2, 'week': week, 'year': year}, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"Failed to fetch ESPN schedule for Week {week}: {e}")
+            return None
+
+class FixtureScheduleProvider:
+    """Scoreboard payloads from local week_<n>.json files (ESPN format)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def scoreboard(self, week, year=None):
+        """Scoreboard payload of one week (None if there is no fixture for it)"""
+        path = os.path.join(self.directory, f"week_{week}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+def get_schedule_provider():
+    """FixtureScheduleProvider if SCHEDULE_FIXTURE_DIR points to a directory, otherwise ESPN"""
+    directory = os.environ.get(FIXTURE_DIR_ENV)
+    if directory and os.path.isdir(directory):
+        return FixtureScheduleProvider(directory)
+    return EspnScheduleProvider()
+
+def parse_schedule_events(payload, week):
+    """Schedule loader rows (week, home, away, kickoff) from a scoreboard payload"""
+    games = []
+    for event in payload.get('events', []):
+        status = event.get('status', {}).get('type', {}).get('name')
+        if status in SKIPPED_STATUSES or not event.get('date'):
+            continue
+
+        competitions = event.get('competitions') or [{}]
+        teams = {competitor.get('homeAway'): competitor.get('team', {}).get('displayName')
+                 for competitor in competitions[0].get('competitors', [])}
+        if not teams.get('home') or not teams.get('away'):
+            continue
+
+        games.append({
+            'week': event.get('week', {}).get('number', week),
+            'home': teams['home'],
+            'away': teams['away'],
+            'kickoff': event['date'],  # UTC, converted to US Eastern by the loader
+        })
+    return games
+
+def classify_kickoff_change(old_start_time, new_start_time):
+    """'flexed' if the game stays in its game week, otherwise 'rescheduled'"""
+    moved = abs(datetime.strptime(new_start_time, DATETIME_FORMAT) - datetime.strptime(old_start_time, DATETIME_FORMAT))
+    return 'flexed' if moved.days < FLEX_WINDOW_DAYS else 'rescheduled'
+
+def ingest_schedule(db_path=DEFAULT_DB_PATH, provider=None, weeks=None, year=None):
+    """
+    Fetch the schedule for the given weeks of a season (default: the current
+    one) and upsert it in one transaction.
+
+    Weeks the provider has no payload for are left untouched. Returns the
+    loader statistics plus the fetched weeks; each moved kickoff in
+    'rescheduled' carries its 'change' ('flexed' or 'rescheduled').
+    """
+    provider = provider or get_schedule_provider()
+    weeks = weeks or range(1, REGULAR_SEASON_WEEKS + 1)
+    year = year or resolve_season(lambda: read_latest_season(db_path))
+
+    games, fetched_weeks = [], []
+    for week in weeks:
+        payload = provider.scoreboard(week, year)
+        if payload is None:
+            continue
+        fetched_weeks.append(week)
+        games.extend(parse_schedule_events(payload, week))
+
+    if not games:
+        logger.warning("Schedule ingestion: no games received")
+        return {'added': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'dry_run': False, 'season': year,
+                'rescheduled': [], 'weeks': fetched_weeks}
+
+    stats = apply_schedule(db_path, games, season=year)
+    for change in stats['rescheduled']:
+        change['change'] = classify_kickoff_change(change['old_start_time'], change['new_start_time'])
+        logger.info(f"Week {change['week']} match {change['match_id']} {change['change']}: "
+                    f"{change['old_start_time']} -> {change['new_start_time']}")
+
+    stats['weeks'] = fetched_weeks
+    return stats
+
+def main():
+    """Main function for command-line usage"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DB_PATH
+    first_week = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    last_week = int(sys.argv[3]) if len(sys.argv) > 3 else REGULAR_SEASON_WEEKS
+    season = int(sys.argv[4]) if len(sys.argv) > 4 else None
+
+    stats = ingest_schedule(db_path, weeks=range(first_week, last_week + 1), year=season)
+    print(f"Season {stats['season']}, weeks fetched: {stats['weeks']}")
+    print(f"Added {stats['added']}, updated {stats['updated']}, unchanged {stats['unchanged']}, "
+          f"skipped {stats['skipped']}")
+    for change in stats['rescheduled']:
+        print(f"  Week {change['week']} match {change['match_id']} {change['change']}: "
+              f"{change['old_start_time']} -> {change['new_start_time']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
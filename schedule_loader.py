@@ -0,0 +1,307 @@
+"""
+Schedule Loader Module for NFL PickEm App
+
+Bulk import of a season schedule from a CSV or JSON file. Team names are
+resolved through one name -> id dict, every distinct kickoff is parsed once,
+and the file is diffed against the existing match rows of the season (keyed
+by week, home and away team) into inserts, updates and unchanged games. All changes are
+written with executemany in a single transaction, so re-importing the same
+file is a no-op and a full 272-game season loads well under a second. The
+queries use SQLAlchemy Core on the pooled engine (database.py), so a schedule
+imports the same way into SQLite or PostgreSQL.
+
+Schedule rows use the columns week, away, home, date (YYYY-MM-DD) and time
+(HH:MM, US Eastern like the rest of the app). A kickoff column with an ISO
+datetime may be used instead of date/time. Optional result columns:
+home_score, away_score, winner (team name) and completed.
+
+Usage:
+    python schedule_loader.py import <schedule.csv|schedule.json> [db_path] [season]
+    python schedule_loader.py check <schedule.csv|schedule.json> [db_path] [season]
+"""
+
+import sys
+import csv
+import json
+import logging
+from datetime import datetime
+
+from sqlalchemy import bindparam, func, insert, select, update
+
+from database import get_database_path, get_engine_for, prepare_database
+from leagues import DEFAULT_SEASON
+from models import Match, Team
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = get_database_path()
+DEFAULT_SCHEDULE_PATH = 'nfl_2025_schedule.csv'
+DEFAULT_KICKOFF_TIME = '13:00'
+
+# Same text format SQLAlchemy writes for DateTime columns, so ORM and loader rows compare equal
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+EASTERN = 'US/Eastern'
+
+# Match columns the loader may change on existing rows
+RESULT_COLUMNS = ['is_completed', 'winner_team_id', 'home_score', 'away_score', 'status']
+
+match_table = Match.__table__
+team_table = Team.__table__
+
+def read_schedule_file(path):
+    """Read schedule rows from a CSV or JSON file (a list of games or {"games": [...]})"""
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return data['games'] if isinstance(data, dict) else data
+
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+def _parse_int(value):
+    return None if _blank(value) else int(float(value))
+
+def _parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y', 'final')
+    return bool(value)
+
+class KickoffParser:
+    """Parses each distinct kickoff once and renders it in the stored DATETIME format"""
+
+    def __init__(self):
+        self._cache = {}
+
+    def __call__(self, game):
+        kickoff = game.get('kickoff')
+        if _blank(kickoff):
+            if _blank(game.get('date')):
+                return None  # No kickoff given: existing matches keep theirs
+            kickoff = (game['date'], game.get('time') or DEFAULT_KICKOFF_TIME)
+        elif not isinstance(kickoff, str):
+            kickoff = str(kickoff)
+
+        if kickoff not in self._cache:
+            self._cache[kickoff] = self._parse(kickoff)
+        return self._cache[kickoff]
+
+    @staticmethod
+    def _parse(kickoff):
+        if isinstance(kickoff, tuple):
+            start_time = datetime.strptime(f"{str(kickoff[0]).strip()} {str(kickoff[1]).strip()}", '%Y-%m-%d %H:%M')
+        else:
+            start_time = datetime.fromisoformat(kickoff.strip().replace('Z', '+00:00'))
+            if start_time.tzinfo is not None:
+                import pytz
+
+                # Stored kickoffs are naive US Eastern times
+                start_time = start_time.astimezone(pytz.timezone(EASTERN)).replace(tzinfo=None)
+        return start_time.strftime(DATETIME_FORMAT)
+
+def _normalize_stored_datetime(value):
+    """Stored DATETIME in the loader's text format (older rows may lack microseconds)"""
+    if isinstance(value, datetime):
+        return value.strftime(DATETIME_FORMAT)
+    try:
+        return datetime.fromisoformat(value).strftime(DATETIME_FORMAT)
+    except (TypeError, ValueError):
+        return value
+
+def _result_fields(game, home_id, away_id, team_ids):
+    """Result columns given by a schedule row (empty if the row carries no result)"""
+    home_score = _parse_int(game.get('home_score'))
+    away_score = _parse_int(game.get('away_score'))
+    winner_name = game.get('winner')
+    completed = game.get('completed')
+
+    if home_score is None and away_score is None and _blank(winner_name) and _blank(completed):
+        return {}
+
+    is_completed = _parse_bool(completed) if not _blank(completed) else \
+        (home_score is not None and away_score is not None)
+
+    winner_id = None
+    if not _blank(winner_name):
+        winner_id = team_ids.get(str(winner_name).strip())
+    elif is_completed and home_score is not None and away_score is not None and home_score != away_score:
+        winner_id = home_id if home_score > away_score else away_id
+
+    return {
+        'is_completed': 1 if is_completed else 0,
+        'winner_team_id': winner_id,
+        'home_score': home_score,
+        'away_score': away_score,
+        'status': 'completed' if is_completed else 'scheduled',
+    }
+
+def plan_schedule_changes(conn, games, season=DEFAULT_SEASON):
+    """
+    Diff schedule rows against the matches of a season.
+
+    Returns a dict with the rows to insert and update, the number of unchanged
+    games, the rows that were skipped (unknown team or invalid kickoff) and
+    the existing matches whose kickoff moved.
+    """
+    team_ids = {name: team_id for team_id, name in conn.execute(select(team_table.c.id, team_table.c.name))}
+    result_columns = [match_table.c[column] for column in RESULT_COLUMNS]
+    existing = {
+        (week, home_id, away_id): (match_id, _normalize_stored_datetime(start_time),
+                                   dict(zip(RESULT_COLUMNS, results)))
+        for match_id, week, home_id, away_id, start_time, *results in conn.execute(
+            select(match_table.c.id, match_table.c.week, match_table.c.home_team_id, match_table.c.away_team_id,
+                   match_table.c.start_time, *result_columns)
+            .where(match_table.c.season == season)
+            .with_for_update())
+    }
+
+    kickoff_for = KickoffParser()
+    now = datetime.utcnow().strftime(DATETIME_FORMAT)
+    inserts, updates, skipped, rescheduled = [], [], [], []
+    unchanged = 0
+    seen = set()
+
+    for game in games:
+        home_id = team_ids.get(str(game.get('home', '')).strip())
+        away_id = team_ids.get(str(game.get('away', '')).strip())
+        if home_id is None or away_id is None:
+            skipped.append((game, 'unknown team'))
+            continue
+
+        try:
+            week = int(game['week'])
+            start_time = kickoff_for(game)
+        except (KeyError, TypeError, ValueError) as e:
+            skipped.append((game, f'invalid week or kickoff: {e}'))
+            continue
+
+        key = (week, home_id, away_id)
+        if key in seen:
+            skipped.append((game, 'duplicate game'))
+            continue
+        seen.add(key)
+
+        results = _result_fields(game, home_id, away_id, team_ids)
+        current = existing.get(key)
+        if current is None:
+            if start_time is None:
+                skipped.append((game, 'new game without kickoff'))
+                continue
+            values = {'is_completed': 0, 'winner_team_id': None, 'home_score': None,
+                      'away_score': None, 'status': 'scheduled'}
+            values.update(results)
+            inserts.append(dict(values, season=season, week=week, home_team_id=home_id, away_team_id=away_id,
+                                start_time=start_time, updated_at=now))
+            continue
+
+        match_id, current_start, current_results = current
+        start_time = start_time or current_start
+        if current_start == start_time and all(current_results[column] == value for column, value in results.items()):
+            unchanged += 1
+            continue
+
+        if current_start != start_time:
+            rescheduled.append({'match_id': match_id, 'week': week, 'home_team_id': home_id,
+                                'away_team_id': away_id, 'old_start_time': current_start,
+                                'new_start_time': start_time})
+
+        # Columns the file does not mention keep their stored values
+        values = dict(current_results)
+        values.update(results)
+        updates.append(dict(values, start_time=start_time, updated_at=now, match_id=match_id))
+
+    return {'inserts': inserts, 'updates': updates, 'unchanged': unchanged, 'skipped': skipped,
+            'rescheduled': rescheduled}
+
+def _stored_row(row):
+    """Planned row with its DATETIME text parsed back for the DateTime columns"""
+    return dict(row, start_time=datetime.strptime(row['start_time'], DATETIME_FORMAT),
+                updated_at=datetime.strptime(row['updated_at'], DATETIME_FORMAT))
+
+def apply_schedule(db_path, games, dry_run=False, season=DEFAULT_SEASON):
+    """
+    Import schedule rows of a season in one transaction; returns the import statistics.
+
+    db_path selects a SQLite file, None the configured database (DATABASE_URL).
+    """
+    engine = get_engine_for(db_path)
+    prepare_database(engine)
+    with engine.connect() as conn:
+        if conn.dialect.name == 'sqlite':
+            # Take the write lock before reading, so the diff cannot go stale before it is applied
+            # (other databases lock the season's rows with SELECT ... FOR UPDATE)
+            conn.exec_driver_sql('BEGIN IMMEDIATE')
+        try:
+            changes = plan_schedule_changes(conn, games, season)
+            if not dry_run and changes['inserts']:
+                conn.execute(insert(match_table), [_stored_row(row) for row in changes['inserts']])
+            if not dry_run and changes['updates']:
+                conn.execute(update(match_table).where(match_table.c.id == bindparam('match_id')),
+                             [_stored_row(row) for row in changes['updates']])
+            if dry_run:
+                conn.rollback()
+            else:
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    for game, reason in changes['skipped']:
+        logger.warning(f"Skipped schedule row ({reason}): {game}")
+
+    stats = {
+        'added': len(changes['inserts']),
+        'updated': len(changes['updates']),
+        'unchanged': changes['unchanged'],
+        'skipped': len(changes['skipped']),
+        'dry_run': dry_run,
+        'season': season,
+        'rescheduled': changes['rescheduled'],
+    }
+    logger.info(f"Schedule import {season}: {stats['added']} added, {stats['updated']} updated "
+                f"({len(stats['rescheduled'])} new kickoffs), {stats['unchanged']} unchanged, "
+                f"{stats['skipped']} skipped")
+    return stats
+
+def import_schedule_file(path=DEFAULT_SCHEDULE_PATH, db_path=DEFAULT_DB_PATH, dry_run=False, season=DEFAULT_SEASON):
+    """Read a CSV/JSON schedule file of a season and import it into db_path"""
+    return apply_schedule(db_path, read_schedule_file(path), dry_run, season)
+
+def print_import_summary(stats, db_path=DEFAULT_DB_PATH):
+    """Print import statistics and the number of matches per week of the season"""
+    prefix = "Would import" if stats['dry_run'] else "Imported"
+    print(f"✅ {prefix}: {stats['added']} added, {stats['updated']} updated, "
+          f"{stats['unchanged']} unchanged, {stats['skipped']} skipped")
+
+    with get_engine_for(db_path).connect() as conn:
+        per_week = conn.execute(
+            select(match_table.c.week, func.count())
+            .where(match_table.c.season == stats['season'])
+            .group_by(match_table.c.week)
+            .order_by(match_table.c.week)).fetchall()
+
+    print(f"   Total matches in season {stats['season']}: {sum(count for _, count in per_week)}")
+    for week, count in per_week:
+        print(f"   Week {week:2d}: {count:2d} matches")
+
+def main():
+    """Main function for command-line usage"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if len(sys.argv) < 3 or sys.argv[1].lower() not in ('import', 'check'):
+        print(__doc__.split('Usage:')[1])
+        return 1
+
+    command = sys.argv[1].lower()
+    schedule_path = sys.argv[2]
+    db_path = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_DB_PATH
+    season = int(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_SEASON
+
+    stats = import_schedule_file(schedule_path, db_path, dry_run=(command == 'check'), season=season)
+    print_import_summary(stats, db_path)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""
+Season Analytics Module for NFL PickEm App
+
+Computes the league statistics from dense NumPy arrays instead of looping over
+picks in Python:
+
+    picks         (users × weeks)  chosen team id per user and week (0 = no pick)
+    opponents     (users × weeks)  the team implicitly picked as loser
+    team_results  (weeks × teams)  1 = won, 0 = lost, -1 = no completed game
+
+Scores, streaks, team records, remaining eligible teams and head-to-head
+comparisons are derived once per data version and (league, season), so the
+/api/stats endpoints only index into precomputed arrays.
+"""
+
+import threading
+import logging
+
+import numpy as np
+
+from leagues import DEFAULT_LEAGUE_ID, read_latest_season, resolve_season
+from season_snapshot import DEFAULT_DB_PATH, get_season_snapshot, read_data_key, snapshot_path_for
+
+logger = logging.getLogger(__name__)
+
+# Pick outcomes in the (users × weeks) outcome matrix
+CORRECT = 1
+WRONG = 0
+PENDING = -1
+NO_PICK = -2
+
+# Usage limits (same rules as the pick validation in app.py)
+MAX_WINNER_USAGE = 2
+MAX_LOSER_USAGE = 1
+
+class SeasonAnalytics:
+    """All season statistics of one snapshot, precomputed as arrays"""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        users = snapshot['user']
+        teams = snapshot['team']
+        matches = snapshot['match']
+        picks = snapshot['pick']
+
+        self.user_ids = users['id']
+        self.usernames = users['username']
+        self.team_ids = teams['id']
+        self.team_names = teams['name']
+        self.weeks = np.arange(1, int(matches['week'].max()) + 1 if len(matches['week']) else 1)
+
+        user_count, week_count, team_count = len(self.user_ids), len(self.weeks), len(self.team_ids)
+        team_column = np.full(int(self.team_ids.max()) + 2 if team_count else 1, -1, dtype=np.int64)
+        team_column[self.team_ids] = np.arange(team_count)
+        self._team_column = team_column
+
+        # (weeks × teams) results of completed matches
+        self.team_results = np.full((week_count, team_count), PENDING, dtype=np.int8)
+        completed = np.flatnonzero(matches['is_completed'] == 1)
+        home_cols = self.team_column(matches['home_team_id'][completed])
+        away_cols = self.team_column(matches['away_team_id'][completed])
+        known_teams = (home_cols >= 0) & (away_cols >= 0)
+        completed, home_cols, away_cols = completed[known_teams], home_cols[known_teams], away_cols[known_teams]
+        week_rows = matches['week'][completed] - 1
+        winner_ids = matches['winner_team_id'][completed]
+        self.team_results[week_rows, home_cols] = (winner_ids == matches['home_team_id'][completed]).astype(np.int8)
+        self.team_results[week_rows, away_cols] = (winner_ids == matches['away_team_id'][completed]).astype(np.int8)
+
+        # A week is decided once every match of that week is completed
+        week_totals = np.bincount(matches['week'], minlength=week_count + 1)[1:]
+        week_completed = np.bincount(matches['week'][completed], minlength=week_count + 1)[1:]
+        self.week_decided = (week_totals > 0) & (week_completed == week_totals)
+
+        # (users × weeks) chosen and implied-loser team ids
+        self.picks = np.zeros((user_count, week_count), dtype=np.int64)
+        self.opponents = np.zeros((user_count, week_count), dtype=np.int64)
+        user_rows = snapshot.rows_for('user', picks['user_id'])
+        match_rows = snapshot.rows_for('match', picks['match_id'])
+        joined = np.flatnonzero((user_rows >= 0) & (match_rows >= 0))
+        user_rows, match_rows = user_rows[joined], match_rows[joined]
+        chosen = picks['chosen_team_id'][joined]
+        home_ids = matches['home_team_id'][match_rows]
+        pick_weeks = matches['week'][match_rows] - 1
+        self.picks[user_rows, pick_weeks] = chosen
+        self.opponents[user_rows, pick_weeks] = np.where(chosen == home_ids, matches['away_team_id'][match_rows], home_ids)
+
+        # (users × weeks) outcomes
+        has_pick = self.picks > 0
+        pick_cols = self.team_column(self.picks)
+        week_index = np.broadcast_to(np.arange(week_count), self.picks.shape)
+        results = np.where(has_pick & (pick_cols >= 0),
+                           self.team_results[week_index, np.maximum(pick_cols, 0)], PENDING)
+        self.outcomes = np.where(has_pick, results, NO_PICK).astype(np.int8)
+
+        correct = self.outcomes == CORRECT
+        self.scores = correct.sum(axis=1)
+        self.wrong = (self.outcomes == WRONG).sum(axis=1)
+        self.pending = (self.outcomes == PENDING).sum(axis=1)
+
+        # Streaks: a wrong pick or a missed decided week ends a run, pending weeks do not
+        breaks = (self.outcomes == WRONG) | ((self.outcomes == NO_PICK) & self.week_decided)
+        correct_so_far = np.cumsum(correct, axis=1)
+        at_last_break = np.maximum.accumulate(np.where(breaks, correct_so_far, 0), axis=1)
+        runs = correct_so_far - at_last_break
+        self.longest_streak = runs.max(axis=1) if week_count else np.zeros(user_count, dtype=np.int64)
+        self.current_streak = runs[:, -1] if week_count else np.zeros(user_count, dtype=np.int64)
+
+        # Competition ranking (1, 1, 3): one plus the number of users with a higher score
+        self.ranks = 1 + (self.scores[None, :] > self.scores[:, None]).sum(axis=1)
+
+        # (users × teams) usage as winner and as loser
+        self.winner_usage = self._count_per_team(self.picks)
+        self.loser_usage = self._count_per_team(self.opponents)
+        self.correct_with_team = self._count_per_team(np.where(correct, self.picks, 0))
+
+        # Eligible as winner: below the winner limit and not eliminated as winner. The loser
+        # limit restricts the opponent of a pick, not the team itself (see season_projections.py)
+        eliminated = snapshot['eliminated_team']
+        self.winner_eliminated = np.zeros((user_count, team_count), dtype=bool)
+        eliminated_rows = snapshot.rows_for('user', eliminated['user_id'])
+        eliminated_cols = self.team_column(eliminated['team_id'])
+        as_winner = (eliminated['elimination_type'] == 'winner') & (eliminated_rows >= 0) & (eliminated_cols >= 0)
+        self.winner_eliminated[eliminated_rows[as_winner], eliminated_cols[as_winner]] = True
+        self.eligible = (self.winner_usage < MAX_WINNER_USAGE) & ~self.winner_eliminated
+
+        # Team records over all completed games
+        self.team_wins = (self.team_results == 1).sum(axis=0)
+        self.team_games = (self.team_results >= 0).sum(axis=0)
+
+        # Head to head over weeks both users have decided picks in: [a, b] = weeks a beat b
+        decided = (self.outcomes == CORRECT) | (self.outcomes == WRONG)
+        wrong = self.outcomes == WRONG
+        self.head_to_head_wins = correct.astype(np.int64) @ wrong.T.astype(np.int64)
+        self.head_to_head_weeks = decided.astype(np.int64) @ decided.T.astype(np.int64)
+
+    def team_column(self, team_ids):
+        """Column positions for team ids (-1 for unknown ids and empty picks)"""
+        team_ids = np.asarray(team_ids)
+        valid = (team_ids > 0) & (team_ids < len(self._team_column))
+        return np.where(valid, self._team_column[np.where(valid, team_ids, 0)], -1)
+
+    def _count_per_team(self, team_id_matrix):
+        """Count team ids per user row into a (users × teams) matrix"""
+        user_count, team_count = len(self.user_ids), len(self.team_ids)
+        cols = self.team_column(team_id_matrix)
+        rows = np.broadcast_to(np.arange(user_count)[:, None], cols.shape)
+        valid = cols >= 0
+        flat = rows[valid] * team_count + cols[valid]
+        return np.bincount(flat, minlength=user_count * team_count).reshape(user_count, team_count)
+
+    def user_row(self, user_id):
+        """Row position of a user id, or None if unknown"""
+        rows = self.snapshot.rows_for('user', [user_id])
+        return int(rows[0]) if rows[0] >= 0 else None
+
+    def leaderboard(self):
+        """Users ordered by score with rank and streaks"""
+        order = np.lexsort((self.user_ids, -self.scores))
+        return [self._user_entry(row) for row in order]
+
+    def _user_entry(self, row):
+        return {
+            'id': int(self.user_ids[row]),
+            'username': str(self.usernames[row]),
+            'score': int(self.scores[row]),
+            'rank': int(self.ranks[row]),
+            'current_streak': int(self.current_streak[row]),
+            'longest_streak': int(self.longest_streak[row]),
+        }
+
+    def user_summary(self, row):
+        """Score, pick record, streaks and week-by-week outcomes of one user"""
+        labels = {CORRECT: 'correct', WRONG: 'wrong', PENDING: 'pending', NO_PICK: None}
+        summary = self._user_entry(row)
+        summary.update({
+            'wrong': int(self.wrong[row]),
+            'pending': int(self.pending[row]),
+            'weeks': [
+                {
+                    'week': int(week),
+                    'team_id': int(team_id) or None,
+                    'opponent_id': int(opponent_id) or None,
+                    'result': labels[int(outcome)],
+                }
+                for week, team_id, opponent_id, outcome
+                in zip(self.weeks, self.picks[row], self.opponents[row], self.outcomes[row])
+                if outcome != NO_PICK
+            ],
+        })
+        return summary
+
+    def eligible_teams(self, row):
+        """Teams the user can still pick as winner, with their remaining usage"""
+        return [
+            {
+                'id': int(self.team_ids[col]),
+                'name': str(self.team_names[col]),
+                'winner_usage': int(self.winner_usage[row, col]),
+                'remaining_winner_picks': int(MAX_WINNER_USAGE - self.winner_usage[row, col]),
+            }
+            for col in np.flatnonzero(self.eligible[row])
+        ]
+
+    def team_stats(self):
+        """Record of every team plus how often the league picked it and how often that paid off"""
+        picked = self.winner_usage.sum(axis=0)
+        picked_correct = self.correct_with_team.sum(axis=0)
+        win_rates = np.divide(self.team_wins, self.team_games, out=np.zeros(len(self.team_ids)),
+                              where=self.team_games > 0)
+        pick_success = np.divide(picked_correct, picked, out=np.zeros(len(self.team_ids)), where=picked > 0)
+        return [
+            {
+                'id': int(self.team_ids[col]),
+                'name': str(self.team_names[col]),
+                'wins': int(self.team_wins[col]),
+                'losses': int(self.team_games[col] - self.team_wins[col]),
+                'win_rate': round(float(win_rates[col]), 3),
+                'times_picked': int(picked[col]),
+                'pick_success_rate': round(float(pick_success[col]), 3),
+            }
+            for col in range(len(self.team_ids))
+        ]
+
+    def head_to_head(self, row_a, row_b):
+        """Week-by-week comparison of two users over the weeks both have decided picks in"""
+        return {
+            'user_a': self._user_entry(row_a),
+            'user_b': self._user_entry(row_b),
+            'weeks_compared': int(self.head_to_head_weeks[row_a, row_b]),
+            'user_a_wins': int(self.head_to_head_wins[row_a, row_b]),
+            'user_b_wins': int(self.head_to_head_wins[row_b, row_a]),
+            'same_pick_weeks': int(((self.picks[row_a] == self.picks[row_b]) & (self.picks[row_a] > 0)).sum()),
+        }
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def get_season_analytics(db_path=DEFAULT_DB_PATH, snapshot_path=None, league_id=DEFAULT_LEAGUE_ID, season=None):
+    """Analytics of one league and season for the current state of db_path, recomputed only when the data changed"""
+    if snapshot_path is None and db_path is not None:
+        snapshot_path = snapshot_path_for(db_path)
+    if season is None:
+        season = resolve_season(lambda: read_latest_season(db_path))
+
+    with _cache_lock:
+        # Same freshness check as the snapshot, but without touching the snapshot file
+        key = read_data_key(db_path)
+        scope = (db_path, league_id, season)
+        cached = _cache.get(scope)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        snapshot = get_season_snapshot(db_path, snapshot_path)
+        key = (snapshot.meta['data_version'], snapshot.meta['source_mtime_ns'])
+        analytics = SeasonAnalytics(snapshot.scoped(league_id, season))
+        _cache[scope] = (key, analytics)
+        logger.info(f"Season analytics computed for league {league_id}, season {season}, data version {key[0]}")
+        return analytics
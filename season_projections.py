@@ -0,0 +1,289 @@
+"""
+Season Projections Module for NFL PickEm App
+
+Monte Carlo simulation of the rest of the season. For every user the
+remaining weeks are filled with a pick plan that respects the usage rules from
+handle_picks (a team at most 2x as winner, at most 1x as loser): each week the
+user takes the eligible side with the best win probability. The outcomes of
+all open games are then sampled thousands of times at once with NumPy, split
+across CPU cores with a process pool (created once per process and reused;
+PROJECTION_WORKERS=1 simulates in-process), and summarized as expected final
+score, chance of finishing first and the final score distribution.
+
+Win probabilities come from an odds source: UniformOdds (default) or CsvOdds,
+which reads a local CSV with the columns match_id,home_win_probability (set
+PROJECTION_ODDS_CSV to use it). Results are cached per data version and
+number of games that kicked off.
+"""
+
+import os
+import csv
+import atexit
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from leagues import DEFAULT_LEAGUE_ID, read_latest_season, resolve_season
+from pick_planner import kicked_off
+from season_analytics import MAX_LOSER_USAGE, MAX_WINNER_USAGE, get_season_analytics
+from season_snapshot import DEFAULT_DB_PATH, read_data_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIMULATIONS = 20000
+MAX_SIMULATIONS = 200000
+SIMULATIONS_PER_TASK = 5000  # Below this a single chunk runs in-process
+ODDS_CSV_ENV = 'PROJECTION_ODDS_CSV'
+WORKERS_ENV = 'PROJECTION_WORKERS'  # Simulation processes per app process (default: CPU count, 1 = in-process)
+
+class UniformOdds:
+    """Every open game is a coin flip (optionally with a home-field edge)"""
+
+    def __init__(self, home_win_probability=0.5):
+        self.home_win_probability = home_win_probability
+
+    def cache_key(self):
+        return ('uniform', self.home_win_probability)
+
+    def home_win_probabilities(self, matches):
+        """Home win probability per match row"""
+        return np.full(len(matches['id']), self.home_win_probability)
+
+class CsvOdds:
+    """Home win probabilities per match from a local CSV; unlisted games fall back to the default source"""
+
+    def __init__(self, path, default=None):
+        self.path = path
+        self.default = default or UniformOdds()
+
+    def cache_key(self):
+        return ('csv', self.path, os.stat(self.path).st_mtime_ns, self.default.cache_key())
+
+    def home_win_probabilities(self, matches):
+        """Home win probability per match row"""
+        probabilities = self.default.home_win_probabilities(matches)
+        row_by_id = {int(match_id): row for row, match_id in enumerate(matches['id'])}
+
+        with open(self.path, newline='', encoding='utf-8') as f:
+            for line in csv.DictReader(f):
+                row = row_by_id.get(int(line['match_id']))
+                if row is not None:
+                    probabilities[row] = min(max(float(line['home_win_probability']), 0.0), 1.0)
+        return probabilities
+
+def get_odds_source():
+    """CsvOdds if PROJECTION_ODDS_CSV points to a file, otherwise UniformOdds"""
+    path = os.environ.get(ODDS_CSV_ENV)
+    if path and os.path.exists(path):
+        return CsvOdds(path)
+    return UniformOdds()
+
+def plan_remaining_picks(analytics, home_probabilities, seed=None, started=None):
+    """
+    Greedy pick plan for every user and open week.
+
+    Equally likely options are broken at random per user, otherwise everyone
+    would follow the same plan under uniform odds. Picks already made for open
+    games are kept as they are, also once those games kicked off; new picks
+    only go to games that have not started (started: per match row, default
+    now). Returns (match_rows, pick_home) arrays of shape (users × planned
+    weeks); match_rows is -1 where no eligible option is left.
+    """
+    matches = analytics.snapshot['match']
+    open_mask = matches['is_completed'] != 1
+    pickable_mask = open_mask & ~(kicked_off(matches) if started is None else started)
+    open_weeks = np.unique(matches['week'][open_mask])
+    user_count = len(analytics.user_ids)
+
+    match_rows = np.full((user_count, len(open_weeks)), -1, dtype=np.int64)
+    pick_home = np.zeros((user_count, len(open_weeks)), dtype=bool)
+    rng = np.random.default_rng(seed)
+    winner_usage = analytics.winner_usage.copy()
+    loser_usage = analytics.loser_usage.copy()
+
+    pick_match_rows = np.full(analytics.picks.shape, -1, dtype=np.int64)
+    picks = analytics.snapshot['pick']
+    user_rows = analytics.snapshot.rows_for('user', picks['user_id'])
+    rows = analytics.snapshot.rows_for('match', picks['match_id'])
+    joined = (user_rows >= 0) & (rows >= 0)
+    pick_match_rows[user_rows[joined], matches['week'][rows[joined]] - 1] = rows[joined]
+
+    for week_position, week in enumerate(open_weeks):
+        week_rows = np.flatnonzero(pickable_mask & (matches['week'] == week))
+        home_cols = analytics.team_column(matches['home_team_id'][week_rows])
+        away_cols = analytics.team_column(matches['away_team_id'][week_rows])
+        home_p = home_probabilities[week_rows]
+
+        for user_row in range(user_count):
+            existing = pick_match_rows[user_row, week - 1]
+            if existing >= 0:
+                if open_mask[existing]:
+                    match_rows[user_row, week_position] = existing
+                    pick_home[user_row, week_position] = \
+                        analytics.picks[user_row, week - 1] == matches['home_team_id'][existing]
+                continue
+
+            home_ok = (winner_usage[user_row, home_cols] < MAX_WINNER_USAGE) & \
+                      (loser_usage[user_row, away_cols] < MAX_LOSER_USAGE)
+            away_ok = (winner_usage[user_row, away_cols] < MAX_WINNER_USAGE) & \
+                      (loser_usage[user_row, home_cols] < MAX_LOSER_USAGE)
+            options = np.concatenate([np.where(home_ok, home_p, -1.0), np.where(away_ok, 1.0 - home_p, -1.0)])
+            options += rng.uniform(0, 1e-9, len(options))
+            if not len(options) or options.max() < 0:
+                continue
+
+            best = int(options.argmax())
+            is_home = best < len(week_rows)
+            game = best % len(week_rows)
+            winner_col, loser_col = (home_cols[game], away_cols[game]) if is_home else (away_cols[game], home_cols[game])
+            winner_usage[user_row, winner_col] += 1
+            loser_usage[user_row, loser_col] += 1
+            match_rows[user_row, week_position] = week_rows[game]
+            pick_home[user_row, week_position] = is_home
+
+    return match_rows, pick_home
+
+def simulate_chunk(task):
+    """Run one chunk of simulations; returns (win share sums, score histograms)"""
+    seed, simulations, home_probabilities, match_rows, pick_home, current_scores, max_score = task
+    rng = np.random.default_rng(seed)
+
+    # (simulations × matches): did the home team win
+    home_wins = rng.random((simulations, len(home_probabilities))) < home_probabilities
+
+    # (simulations × users × planned weeks) -> points per user
+    planned = match_rows >= 0
+    outcomes = home_wins[:, np.maximum(match_rows, 0)] == pick_home
+    final_scores = current_scores + (outcomes & planned).sum(axis=2)
+
+    # Ties for first place share the win
+    leaders = final_scores == final_scores.max(axis=1, keepdims=True)
+    win_shares = (leaders / leaders.sum(axis=1, keepdims=True)).sum(axis=0)
+
+    user_count = len(current_scores)
+    offsets = np.arange(user_count) * (max_score + 1)
+    histogram = np.bincount((final_scores + offsets).ravel(), minlength=user_count * (max_score + 1))
+    return win_shares, histogram.reshape(user_count, max_score + 1)
+
+def _pool_context():
+    """Forkserver: workers fork from a clean single-threaded server, not from the threaded web worker
+    (whose other threads hold SQLite connections and logging locks). Elsewhere the simulation stays in-process."""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+        return context
+    return None
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_simulation_pool():
+    """Process pool of this process, created on first use and reused (None if simulations run in-process)"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            return _pool
+        workers = int(os.environ.get(WORKERS_ENV, os.cpu_count() or 1))
+        context = _pool_context()
+        if workers <= 1 or context is None:
+            return None
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        _pool_pid = os.getpid()
+        atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        logger.info(f"Simulation pool started with {workers} processes")
+        return _pool
+
+def _discard_pool(pool):
+    """Drop a broken pool so the next run starts a new one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def run_simulations(analytics, home_probabilities, simulations=DEFAULT_SIMULATIONS, seed=None, started=None):
+    """Simulate the rest of the season; returns one projection dict per user"""
+    match_rows, pick_home = plan_remaining_picks(analytics, home_probabilities, seed, started)
+    current_scores = analytics.scores.astype(np.int64)
+    max_score = int(current_scores.max(initial=0)) + match_rows.shape[1]
+
+    chunk_count = max(1, -(-simulations // SIMULATIONS_PER_TASK))
+    sizes = [simulations // chunk_count + (1 if i < simulations % chunk_count else 0) for i in range(chunk_count)]
+    seeds = np.random.SeedSequence(seed).spawn(chunk_count)
+    tasks = [(child, size, home_probabilities, match_rows, pick_home, current_scores, max_score)
+             for child, size in zip(seeds, sizes)]
+
+    pool = get_simulation_pool() if chunk_count > 1 else None
+    results = None
+    if pool is not None:
+        try:
+            results = list(pool.map(simulate_chunk, tasks))
+        except BrokenProcessPool as e:
+            logger.error(f"Simulation pool failed, simulating in-process: {e}")
+            _discard_pool(pool)
+    if results is None:
+        results = [simulate_chunk(task) for task in tasks]
+
+    win_shares = sum(result[0] for result in results)
+    histograms = sum(result[1] for result in results)
+    scores = np.arange(max_score + 1)
+    cumulative = np.cumsum(histograms, axis=1) / simulations
+
+    projections = []
+    for row in range(len(analytics.user_ids)):
+        projections.append({
+            'id': int(analytics.user_ids[row]),
+            'username': str(analytics.usernames[row]),
+            'current_score': int(current_scores[row]),
+            'planned_picks': int((match_rows[row] >= 0).sum()),
+            'expected_final_score': round(float((histograms[row] * scores).sum() / simulations), 2),
+            'probability_first': round(float(win_shares[row] / simulations), 4),
+            'final_score_p10': int(np.searchsorted(cumulative[row], 0.1)),
+            'final_score_median': int(np.searchsorted(cumulative[row], 0.5)),
+            'final_score_p90': int(np.searchsorted(cumulative[row], 0.9)),
+        })
+    projections.sort(key=lambda x: (-x['probability_first'], -x['expected_final_score']))
+    return projections
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def get_projections(db_path=DEFAULT_DB_PATH, simulations=DEFAULT_SIMULATIONS, odds_source=None,
+                    league_id=DEFAULT_LEAGUE_ID, season=None):
+    """Projections of one league and season for the current data version (simulated once, then served from memory)"""
+    odds_source = odds_source or get_odds_source()
+    simulations = max(1, min(int(simulations), MAX_SIMULATIONS))
+    if season is None:
+        season = resolve_season(lambda: read_latest_season(db_path))
+
+    with _cache_lock:
+        data_key = read_data_key(db_path)
+        analytics = get_season_analytics(db_path, league_id=league_id, season=season)
+        # A kickoff closes games to new picks without any write, so it invalidates the projection too
+        started = kicked_off(analytics.snapshot['match'])
+        key = data_key + (odds_source.cache_key(), simulations, int(started.sum()))
+        scope = (db_path, league_id, season)
+        cached = _cache.get(scope)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        home_probabilities = odds_source.home_win_probabilities(analytics.snapshot['match'])
+        # Fixed seed: the same data always yields the same projection
+        projections = run_simulations(analytics, home_probabilities, simulations, seed=key[0], started=started)
+
+        result = {
+            'simulations': simulations,
+            'league_id': league_id,
+            'season': season,
+            'data_version': analytics.snapshot.meta['data_version'],
+            'odds_source': odds_source.cache_key()[0],
+            'projections': projections,
+        }
+        _cache[scope] = (key, result)
+        logger.info(f"Season projections simulated: {simulations} runs for data version {key[0]}")
+        return result
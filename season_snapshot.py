@@ -0,0 +1,323 @@
+"""
+Season Snapshot Module for NFL PickEm App
+
+Columnar snapshot of the league data for the export and analysis tools. Each
+table is read with one bulk query and every column is stored as a NumPy array
+in a single uncompressed .npz file, so loading it takes milliseconds and needs
+neither the Flask app context nor the ORM.
+
+Integer and boolean columns use NULL_INT (-1) for NULL, text and datetime
+columns an empty string. Password hashes are never written to the snapshot.
+A snapshot covers every league and season; scoped() narrows it to one.
+
+On a server database (db_path None, see database.py) there is no file to
+compare against: the snapshot is read through the engine and kept in memory
+for SERVER_SNAPSHOT_SECONDS by the callers.
+
+Usage:
+    python season_snapshot.py build [db_path] [snapshot_path]
+    python season_snapshot.py info [snapshot_path]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+from backup_store import read_data_version
+from database import get_connection, get_database_path, get_file_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = get_database_path()
+SNAPSHOT_FILENAME = 'season_snapshot.npz'
+
+SNAPSHOT_TABLES = [
+    'user',
+    'team',
+    'match',
+    'pick',
+    'eliminated_team',
+    'team_winner_usage',
+    'team_loser_usage',
+]
+
+EXCLUDED_COLUMNS = {
+    'user': {'password_hash'},
+}
+
+NULL_INT = -1
+META_KEY = '__meta__'
+SERVER_SNAPSHOT_SECONDS = 10
+
+def snapshot_path_for(db_path):
+    """Snapshot file of a database: season_snapshot.npz next to it, so databases never share one"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), SNAPSHOT_FILENAME)
+
+SNAPSHOT_PATH = snapshot_path_for(DEFAULT_DB_PATH)
+
+def _column_dtype(declared_type):
+    """Map a declared SQLite column type to the NumPy dtype used in the snapshot"""
+    declared_type = (declared_type or '').upper()
+    if declared_type.startswith('BOOLEAN'):
+        return np.int8
+    if 'INT' in declared_type:
+        return np.int64
+    return None  # Text, VARCHAR and DATETIME are stored as unicode arrays
+
+def _format_datetime(value):
+    """Render a stored DATETIME the way str(datetime) does (drops the .000000 SQLAlchemy writes)"""
+    try:
+        return str(datetime.fromisoformat(value))
+    except (TypeError, ValueError):
+        return str(value)
+
+def _to_array(values, dtype, declared_type=''):
+    """Convert one column of query results into an array, replacing NULLs"""
+    if dtype is None and declared_type.upper().startswith('DATETIME'):
+        return np.array(['' if value is None else _format_datetime(value) for value in values], dtype=str)
+    if dtype is None:
+        return np.array(['' if value is None else str(value) for value in values], dtype=str)
+    return np.fromiter((NULL_INT if value is None else value for value in values), dtype=dtype, count=len(values))
+
+def read_tables(db_path=DEFAULT_DB_PATH):
+    """Read all snapshot tables with one query each; returns {table: {column: array}}"""
+    conn = get_connection(db_path)
+    conn.execute("BEGIN")  # One read transaction: all tables from the same commit
+    try:
+        tables = {}
+        for table_name in SNAPSHOT_TABLES:
+            table_info = conn.execute(f'PRAGMA table_info("{table_name}")').fetchall()
+            if not table_info:
+                continue
+
+            excluded = EXCLUDED_COLUMNS.get(table_name, set())
+            columns = [(name, declared_type or '') for _, name, declared_type, *_ in table_info
+                       if name not in excluded]
+            column_list = ', '.join(f'"{name}"' for name, _ in columns)
+            rows = conn.execute(f'SELECT {column_list} FROM "{table_name}" ORDER BY id').fetchall()
+
+            values_by_column = list(zip(*rows)) if rows else [()] * len(columns)
+            tables[table_name] = {
+                name: _to_array(values, _column_dtype(declared_type), declared_type)
+                for (name, declared_type), values in zip(columns, values_by_column)
+            }
+        return tables
+    finally:
+        conn.rollback()
+
+def read_server_tables(engine):
+    """read_tables() for a server database, through SQLAlchemy Core with the declared model columns"""
+    from sqlalchemy import select
+    from models import db
+
+    tables = {}
+    with engine.connect() as conn:
+        for table_name in SNAPSHOT_TABLES:
+            table = db.metadata.tables[table_name]
+            excluded = EXCLUDED_COLUMNS.get(table_name, set())
+            columns = [column for column in table.columns if column.name not in excluded]
+            rows = conn.execute(select(*columns).order_by(table.c.id)).fetchall()
+
+            values_by_column = list(zip(*rows)) if rows else [()] * len(columns)
+            tables[table_name] = {
+                column.name: _to_array(values, _column_dtype(str(column.type)), str(column.type))
+                for column, values in zip(columns, values_by_column)
+            }
+    return tables
+
+def read_data_key(db_path):
+    """(change log sequence, file mtime including the WAL) of db_path; (0, current time slot) for a server database"""
+    if db_path is None:
+        return (0, int(time.time() // SERVER_SNAPSHOT_SECONDS))
+    return (read_data_version(db_path), get_file_version(db_path))
+
+def write_season_snapshot(db_path=DEFAULT_DB_PATH, snapshot_path=None):
+    """Build a fresh snapshot of db_path and write it atomically to snapshot_path (default: next to db_path)"""
+    snapshot_path = snapshot_path or snapshot_path_for(db_path)
+    # Versions first: a commit during the read makes the snapshot look stale, never current
+    data_version, source_mtime_ns = read_data_key(db_path)
+    tables = read_tables(db_path)
+
+    meta = {
+        'created_at': datetime.now().isoformat(),
+        'source': os.path.abspath(db_path),
+        'data_version': data_version,
+        'source_mtime_ns': source_mtime_ns,
+        'tables': {table_name: list(columns) for table_name, columns in tables.items()},
+    }
+    arrays = {META_KEY: np.array(json.dumps(meta))}
+    for table_name, columns in tables.items():
+        for column_name, values in columns.items():
+            arrays[f"{table_name}.{column_name}"] = values
+
+    snapshot_dir = os.path.dirname(os.path.abspath(snapshot_path))
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    # Unique temporary file: workers rebuilding at the same time never write into each other's file
+    fd, temp_path = tempfile.mkstemp(suffix='.partial.npz', dir=snapshot_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temp_path, snapshot_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    logger.info(f"Season snapshot written: {snapshot_path} (data version {meta['data_version']})")
+    return SeasonSnapshot(tables, meta)
+
+class SeasonSnapshot:
+    """Columnar view of one snapshot with vectorized lookups between tables"""
+
+    def __init__(self, tables, meta):
+        self.tables = tables
+        self.meta = meta
+        self._id_index = {}
+
+    def __getitem__(self, table_name):
+        return self.tables[table_name]
+
+    def row_count(self, table_name):
+        """Number of rows in a table (0 if it is not part of the snapshot)"""
+        columns = self.tables.get(table_name)
+        return len(columns['id']) if columns else 0
+
+    def id_index(self, table_name):
+        """Dense array mapping an id to its row position (-1 for unknown ids)"""
+        if table_name not in self._id_index:
+            ids = self.tables[table_name]['id']
+            index = np.full(int(ids.max()) + 2 if len(ids) else 1, -1, dtype=np.int64)
+            index[ids] = np.arange(len(ids))
+            self._id_index[table_name] = index
+        return self._id_index[table_name]
+
+    def rows_for(self, table_name, ids):
+        """Row positions for an array of ids; NULL_INT and unknown ids map to -1"""
+        index = self.id_index(table_name)
+        ids = np.asarray(ids)
+        valid = (ids >= 0) & (ids < len(index))
+        return np.where(valid, index[np.where(valid, ids, 0)], -1)
+
+    def scoped(self, league_id, season):
+        """View of one league and season: its users, the season's matches and the league's picks, usage and eliminations"""
+        tables = {}
+        for table_name, columns in self.tables.items():
+            keep = np.ones(len(columns['id']), dtype=bool)
+            # Snapshots of databases from before leagues and seasons have neither column
+            if 'league_id' in columns:
+                keep &= columns['league_id'] == league_id
+            if 'season' in columns:
+                keep &= columns['season'] == season
+            tables[table_name] = {name: values[keep] for name, values in columns.items()}
+        return SeasonSnapshot(tables, dict(self.meta, league_id=league_id, season=season))
+
+    def lookup(self, table_name, column_name, ids, default=''):
+        """Gather a column for an array of ids, e.g. team names for match.home_team_id"""
+        rows = self.rows_for(table_name, ids)
+        values = self.tables[table_name][column_name]
+        if not len(values):
+            return np.full(len(rows), default)
+        gathered = values[np.where(rows >= 0, rows, 0)]
+        return np.where(rows >= 0, gathered, default)
+
+    def pick_results(self):
+        """Per pick: 1 = correct, 0 = wrong, -1 = match not completed yet"""
+        picks = self.tables['pick']
+        matches = self.tables['match']
+        if not self.row_count('match'):
+            return np.full(len(picks['id']), -1, dtype=np.int8)
+        match_rows = self.rows_for('match', picks['match_id'])
+        known = match_rows >= 0
+        safe_rows = np.where(known, match_rows, 0)
+
+        completed = known & (matches['is_completed'][safe_rows] == 1)
+        correct = matches['winner_team_id'][safe_rows] == picks['chosen_team_id']
+        return np.where(completed, correct.astype(np.int8), np.int8(-1))
+
+    def user_scores(self):
+        """Correct picks per user, aligned with self['user']['id']"""
+        picks = self.tables['pick']
+        user_rows = self.rows_for('user', picks['user_id'])
+        correct = (self.pick_results() == 1) & (user_rows >= 0)
+        return np.bincount(user_rows[correct], minlength=self.row_count('user'))
+
+def load_season_snapshot(snapshot_path=SNAPSHOT_PATH):
+    """Load a snapshot file written by write_season_snapshot()"""
+    with np.load(snapshot_path, allow_pickle=False) as data:
+        meta = json.loads(str(data[META_KEY]))
+        tables = {
+            table_name: {column_name: data[f"{table_name}.{column_name}"] for column_name in columns}
+            for table_name, columns in meta['tables'].items()
+        }
+    return SeasonSnapshot(tables, meta)
+
+def is_snapshot_current(snapshot_path=SNAPSHOT_PATH, db_path=DEFAULT_DB_PATH):
+    """True if the snapshot exists, was taken of db_path and the database has not changed since"""
+    if not os.path.exists(snapshot_path):
+        return False
+    if not os.path.exists(db_path):
+        return True
+
+    with np.load(snapshot_path, allow_pickle=False) as data:
+        meta = json.loads(str(data[META_KEY]))
+
+    if meta.get('source') != os.path.abspath(db_path):
+        return False
+    # The change log sequence catches every write; the mtime covers databases without a change log
+    return (meta['data_version'], meta['source_mtime_ns']) == read_data_key(db_path)
+
+def get_season_snapshot(db_path=DEFAULT_DB_PATH, snapshot_path=None):
+    """Load the snapshot of db_path (default file: next to it), rebuilding it first if the database changed"""
+    if db_path is None:
+        from database import get_engine
+
+        tables = read_server_tables(get_engine())
+        data_version, slot = read_data_key(None)
+        return SeasonSnapshot(tables, {
+            'created_at': datetime.now().isoformat(),
+            'source': None,
+            'data_version': data_version,
+            'source_mtime_ns': slot,
+            'tables': {table_name: list(columns) for table_name, columns in tables.items()},
+        })
+    snapshot_path = snapshot_path or snapshot_path_for(db_path)
+    if is_snapshot_current(snapshot_path, db_path):
+        return load_season_snapshot(snapshot_path)
+    return write_season_snapshot(db_path, snapshot_path)
+
+def main():
+    """Main function for command-line usage"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if len(sys.argv) < 2:
+        print(__doc__.split('Usage:')[1])
+        return 1
+
+    command = sys.argv[1].lower()
+
+    if command == 'build':
+        db_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_DB_PATH
+        snapshot_path = sys.argv[3] if len(sys.argv) > 3 else snapshot_path_for(db_path)
+        snapshot = write_season_snapshot(db_path, snapshot_path)
+        print(f"Snapshot written to {snapshot_path}")
+    elif command == 'info':
+        snapshot_path = sys.argv[2] if len(sys.argv) > 2 else SNAPSHOT_PATH
+        snapshot = load_season_snapshot(snapshot_path)
+        print(f"Created {snapshot.meta['created_at']} from {snapshot.meta['source']} "
+              f"(data version {snapshot.meta['data_version']})")
+    else:
+        print("Unknown command. Use: build or info")
+        return 1
+
+    for table_name in snapshot.tables:
+        print(f"  {table_name}: {snapshot.row_count(table_name)} rows")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
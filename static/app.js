@@ -5,6 +5,48 @@ const API_BASE = '';
 let currentUser = null;
 let currentWeek = 2; // Default to week 2
 
+// Compact encoding of the match and pick lists (teams sent once, see api_encoding.py)
+const COMPACT_MIMETYPE = 'application/vnd.nflpickem.compact+json';
+const COMPACT_REQUEST = { headers: { 'Accept': `${COMPACT_MIMETYPE}, application/json;q=0.5` } };
+
+// Match fields the week view renders (?fields= keeps the rest off the wire)
+const WEEK_MATCH_FIELDS = 'id,home_team,away_team,start_time_vienna,is_completed,is_game_started,winner_team';
+
+// Turn a compact response back into the plain JSON shape (plain responses pass through)
+function decodeCompact(data) {
+    if (!data || data.$compact !== 1) {
+        return data;
+    }
+    
+    // Rows become objects first; references are resolved once every table exists
+    const tables = {};
+    Object.entries(data.$tables).forEach(([name, table]) => {
+        tables[name] = table.rows.map(row => {
+            const record = {};
+            table.columns.forEach((column, i) => { record[column] = row[i]; });
+            return record;
+        });
+    });
+    Object.entries(data.$tables).forEach(([name, table]) => {
+        Object.entries(table.refs || {}).forEach(([column, target]) => {
+            tables[name].forEach(record => {
+                if (record[column] !== null) {
+                    record[column] = tables[target][record[column]];
+                }
+            });
+        });
+    });
+    
+    const decoded = {};
+    Object.entries(data).forEach(([key, value]) => {
+        if (key === '$compact' || key === '$tables') {
+            return;
+        }
+        decoded[key] = value && value.$table ? value.rows.map(i => tables[value.$table][i]) : value;
+    });
+    return decoded;
+}
+
 // Initialize the app
 document.addEventListener('DOMContentLoaded', function() {
     initializeApp();
@@ -414,13 +456,11 @@ async function loadPicksData(week = null) {
         }
         
         // Load weeks for selector
-        const weeksResponse = await fetch(`${API_BASE}/api/matches`);
+        const weeksResponse = await fetch(`${API_BASE}/api/weeks`);
         
         if (weeksResponse.ok) {
             const weeksData = await weeksResponse.json();
-            
-            // Get unique weeks
-            const weeks = [...new Set(weeksData.matches.map(match => match.week))].sort((a, b) => a - b);
+            const weeks = weeksData.weeks.map(summary => summary.week);
             
             // Populate week selector
             const weekSelect = document.getElementById('week-select');
@@ -458,7 +498,7 @@ async function loadMatchesForWeek(week) {
         showLoading();
         
         // Get matches for the week
-        const matchesResponse = await fetch(`${API_BASE}/api/matches?week=${week}`);
+        const matchesResponse = await fetch(`${API_BASE}/api/matches?week=${week}&fields=${WEEK_MATCH_FIELDS}`, COMPACT_REQUEST);
         
         if (!matchesResponse.ok) {
             document.getElementById('matches-container').innerHTML = 'Fehler beim Laden der Matches';
@@ -466,10 +506,10 @@ async function loadMatchesForWeek(week) {
             return;
         }
         
-        const matchesData = await matchesResponse.json();
+        const matchesData = decodeCompact(await matchesResponse.json());
         
         // Get user's picks for the week
-        const picksResponse = await fetch(`${API_BASE}/api/picks?user_id=${currentUser.id}&week=${week}`);
+        const picksResponse = await fetch(`${API_BASE}/api/picks?user_id=${currentUser.id}&week=${week}&fields=match,chosen_team`, COMPACT_REQUEST);
         
         if (!picksResponse.ok) {
             document.getElementById('matches-container').innerHTML = 'Fehler beim Laden der Picks';
@@ -477,7 +517,7 @@ async function loadMatchesForWeek(week) {
             return;
         }
         
-        const picksData = await picksResponse.json();
+        const picksData = decodeCompact(await picksResponse.json());
         
         // NEW RULE: Check if user already has a pick for this week (only one pick per week allowed)
         const hasWeekPick = picksData.picks.length > 0;
@@ -1081,34 +1121,29 @@ async function loadAllPicksData() {
         const usersData = await usersResponse.json();
         const users = usersData.leaderboard;
         
-        // Get all matches
-        const matchesResponse = await fetch(`${API_BASE}/api/matches`);
+        // Get the week summaries
+        const weeksResponse = await fetch(`${API_BASE}/api/weeks`);
         
-        if (!matchesResponse.ok) {
+        if (!weeksResponse.ok) {
             document.getElementById('all-picks-container').innerHTML = 'Fehler beim Laden der Matches';
             hideLoading();
             return;
         }
         
-        const matchesData = await matchesResponse.json();
-        
-        // Group matches by week
-        const matchesByWeek = {};
-        matchesData.matches.forEach(match => {
-            if (!matchesByWeek[match.week]) {
-                matchesByWeek[match.week] = [];
-            }
-            matchesByWeek[match.week].push(match);
+        const weeksData = await weeksResponse.json();
+        const weekCompletion = {};
+        weeksData.weeks.forEach(summary => {
+            weekCompletion[summary.week] = summary.is_completed;
         });
         
         // Get picks for all users
         const allPicks = {};
         
         for (const user of users) {
-            const picksResponse = await fetch(`${API_BASE}/api/picks?user_id=${user.id}`);
+            const picksResponse = await fetch(`${API_BASE}/api/picks?user_id=${user.id}&fields=match,chosen_team,is_correct`, COMPACT_REQUEST);
             
             if (picksResponse.ok) {
-                const picksData = await picksResponse.json();
+                const picksData = decodeCompact(await picksResponse.json());
                 allPicks[user.id] = picksData.picks;
             }
         }
@@ -1121,7 +1156,7 @@ async function loadAllPicksData() {
         const currentWeek = 2; // Current active week
         
         // Sort weeks: current week first, then ascending order
-        const weeks = Object.keys(matchesByWeek).sort((a, b) => {
+        const weeks = Object.keys(weekCompletion).sort((a, b) => {
             const weekA = parseInt(a);
             const weekB = parseInt(b);
             
@@ -1136,7 +1171,7 @@ async function loadAllPicksData() {
         for (const week of weeks) {
             const weekNum = parseInt(week);
             const isCurrentWeek = weekNum === currentWeek;
-            const weekCompleted = matchesByWeek[week].every(match => match.is_completed);
+            const weekCompleted = weekCompletion[week];
             
             // Only show past weeks and current week (skip future weeks)
             if (weekNum > currentWeek) {
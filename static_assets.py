@@ -0,0 +1,212 @@
+"""
+Static Asset Pipeline for NFL PickEm App
+
+The build step copies every file in static/ to static/dist/ under a
+fingerprinted name (styles.css -> styles.3f9a0c1b2d4e.css), bundles the
+stylesheets and scripts index.html loads into one file each, writes .gz
+(and .br, if the optional brotli package is installed) variants of the
+text assets and rewrites index.html to the new names. A fingerprinted file
+never changes, so /static/dist/ is served with "Cache-Control: immutable"
+and a year's max-age; repeat visits only revalidate index.html.
+
+Team logo URLs (/static/logos/...) are mapped to their fingerprinted names
+through the manifest by asset_url(). The manifest is read once per process:
+build before starting the server (app_launcher.py production does). Without
+a build, the app serves static/ as before.
+
+Usage:
+    python static_assets.py build [static_dir]
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import hashlib
+import logging
+import mimetypes
+
+from flask import Blueprint, request, send_from_directory
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(APP_DIR, 'static')
+DIST_DIRNAME = 'dist'
+MANIFEST_FILENAME = 'manifest.json'
+INDEX_FILENAME = 'index.html'
+STATIC_URL_PREFIX = '/static/'
+DIST_URL_PREFIX = f'/static/{DIST_DIRNAME}/'
+
+HASH_LENGTH = 12
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.html', '.json', '.svg', '.txt')
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'  # index.html: always revalidated (ETag), so new builds show up at once
+
+STYLESHEET_TAG = re.compile(r'[ \t]*<link rel="stylesheet" href="/static/([^"]+)">\n?')
+SCRIPT_TAG = re.compile(r'[ \t]*<script src="/static/([^"]+)"></script>\n?')
+STATIC_REFERENCE = re.compile(r'(["\'])/static/([^"\']+)\1')
+
+static_assets_bp = Blueprint('static_assets', __name__)
+
+# Build
+
+def fingerprint(relative_path, data):
+    """name.ext -> name.<content hash>.ext"""
+    root, extension = os.path.splitext(relative_path)
+    return f"{root}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{extension}"
+
+def _write(path, data):
+    """Write atomically; readers never see a half-written file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.partial"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+def write_variants(path, data):
+    """Write data to path plus its .gz (and .br) variants for text assets"""
+    _write(path, data)
+    if not path.endswith(COMPRESSIBLE_EXTENSIONS):
+        return
+    _write(f"{path}.gz", gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0))
+    try:
+        import brotli  # Optional dependency
+    except ImportError:
+        return
+    _write(f"{path}.br", brotli.compress(data, quality=BROTLI_QUALITY))
+
+def list_sources(static_dir):
+    """Relative paths of the files to fingerprint (everything but dist/ and index.html)"""
+    sources = []
+    for directory, subdirectories, filenames in os.walk(static_dir):
+        if directory == static_dir:
+            subdirectories[:] = [name for name in subdirectories if name != DIST_DIRNAME]
+        for filename in filenames:
+            relative_path = os.path.relpath(os.path.join(directory, filename), static_dir).replace(os.sep, '/')
+            if relative_path != INDEX_FILENAME and not filename.endswith(('.gz', '.br', '.partial')):
+                sources.append(relative_path)
+    return sorted(sources)
+
+def _bundle(html, tag, separator, extension, static_dir, manifest, dist_dir):
+    """Replace the local tags matched by tag with one tag for a bundle of their files"""
+    paths = [match.group(1) for match in tag.finditer(html) if match.group(1) in manifest]
+    if len(paths) < 2:
+        return html
+    contents = []
+    for path in paths:
+        with open(os.path.join(static_dir, path), 'rb') as f:
+            contents.append(f.read().rstrip(b'\n'))
+    data = separator.join(contents) + b'\n'
+    bundle_path = fingerprint(f"bundle{extension}", data)
+    write_variants(os.path.join(dist_dir, bundle_path), data)
+    manifest[f"bundle{extension}"] = bundle_path
+
+    replaced = []
+    def replace(match):
+        if match.group(1) not in paths:
+            return match.group(0)
+        if replaced:
+            return ''
+        replaced.append(match.group(1))
+        return match.group(0).replace(f"/static/{match.group(1)}", f"/static/bundle{extension}")
+    return tag.sub(replace, html)
+
+def build_static(static_dir=STATIC_DIR):
+    """Fingerprint, bundle and precompress static_dir into static_dir/dist; returns the manifest"""
+    dist_dir = os.path.join(static_dir, DIST_DIRNAME)
+    manifest = {}
+    for relative_path in list_sources(static_dir):
+        with open(os.path.join(static_dir, relative_path), 'rb') as f:
+            data = f.read()
+        manifest[relative_path] = fingerprint(relative_path, data)
+        # Content-addressed names: files of earlier builds stay valid for pages that still reference them
+        write_variants(os.path.join(dist_dir, manifest[relative_path]), data)
+
+    with open(os.path.join(static_dir, INDEX_FILENAME), encoding='utf-8') as f:
+        html = f.read()
+    html = _bundle(html, STYLESHEET_TAG, b'\n', '.css', static_dir, manifest, dist_dir)
+    html = _bundle(html, SCRIPT_TAG, b'\n;\n', '.js', static_dir, manifest, dist_dir)
+    html = STATIC_REFERENCE.sub(
+        lambda match: f"{match.group(1)}{DIST_URL_PREFIX}{manifest[match.group(2)]}{match.group(1)}"
+        if match.group(2) in manifest else match.group(0), html)
+
+    write_variants(os.path.join(dist_dir, INDEX_FILENAME), html.encode('utf-8'))
+    _write(os.path.join(dist_dir, MANIFEST_FILENAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    logger.info(f"Built {len(manifest)} static assets into {dist_dir}")
+    return manifest
+
+# Serving
+
+_manifest = None
+
+def get_manifest():
+    """Source path -> fingerprinted path of the last build ({} without one), read once per process"""
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(os.path.join(STATIC_DIR, DIST_DIRNAME, MANIFEST_FILENAME), encoding='utf-8') as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError):
+            _manifest = {}
+    return _manifest
+
+def asset_url(url):
+    """Fingerprinted URL of a /static/ URL if it was built, else url unchanged"""
+    if url and url.startswith(STATIC_URL_PREFIX):
+        built = get_manifest().get(url[len(STATIC_URL_PREFIX):])
+        if built:
+            return DIST_URL_PREFIX + built
+    return url
+
+def send_precompressed(directory, filename, cache_control):
+    """Send filename from directory, as its .br or .gz variant if the client accepts it and the build has one"""
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    accepted = request.accept_encodings
+    for encoding, extension in (('br', '.br'), ('gzip', '.gz')):
+        if accepted[encoding] and os.path.isfile(os.path.join(directory, filename + extension)):
+            response = send_from_directory(directory, filename + extension, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            del response.headers['Content-Disposition']  # Named after the .gz/.br file
+            break
+    else:
+        response = send_from_directory(directory, filename, mimetype=mimetype)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+@static_assets_bp.route(f'{DIST_URL_PREFIX}<path:filename>')
+def serve_asset(filename):
+    cache_control = REVALIDATE_CACHE_CONTROL if filename in (INDEX_FILENAME, MANIFEST_FILENAME) else IMMUTABLE_CACHE_CONTROL
+    return send_precompressed(os.path.join(STATIC_DIR, DIST_DIRNAME), filename, cache_control)
+
+def send_index():
+    """index.html of the last build, else the source file"""
+    dist_dir = os.path.join(STATIC_DIR, DIST_DIRNAME)
+    if os.path.isfile(os.path.join(dist_dir, INDEX_FILENAME)):
+        return send_precompressed(dist_dir, INDEX_FILENAME, REVALIDATE_CACHE_CONTROL)
+    return send_from_directory(STATIC_DIR, INDEX_FILENAME)
+
+def register_static_assets(app):
+    """Register the route for built assets"""
+    app.register_blueprint(static_assets_bp)
+    return static_assets_bp
+
+def main():
+    """Main function for command-line usage"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if len(sys.argv) < 2 or sys.argv[1].lower() != 'build':
+        print(__doc__.split('Usage:')[1])
+        return 1
+
+    static_dir = sys.argv[2] if len(sys.argv) > 2 else STATIC_DIR
+    manifest = build_static(static_dir)
+    print(f"Built {len(manifest)} assets into {os.path.join(static_dir, DIST_DIRNAME)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
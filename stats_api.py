@@ -0,0 +1,136 @@
+"""
+NFL PickEm Stats API
+Season statistics served from the precomputed arrays in season_analytics
+"""
+
+import os
+from datetime import datetime
+from flask import Blueprint, current_app, jsonify, request, session
+
+from leagues import get_request_scope, read_latest_season
+from season_analytics import get_season_analytics
+from season_projections import DEFAULT_SIMULATIONS, get_odds_source, get_projections
+from pick_planner import plan_remaining_picks
+
+# Create blueprint for the stats endpoints
+stats_bp = Blueprint('stats', __name__)
+
+def get_scope():
+    """(league_id, season) of the current request"""
+    return get_request_scope(lambda: read_latest_season(current_app.config['STATS_DB_PATH']))
+
+def get_analytics():
+    """Analytics of the requested league and season of the database the app is running on"""
+    league_id, season = get_scope()
+    return get_season_analytics(current_app.config['STATS_DB_PATH'], league_id=league_id, season=season)
+
+def find_user_row(analytics, arg_name='user_id'):
+    """Resolve a user id query argument to its analytics row (None if missing or unknown)"""
+    user_id = request.args.get(arg_name, type=int)
+    if not user_id:
+        return None
+    return analytics.user_row(user_id)
+
+def may_set_simulations(analytics):
+    """?simulations= is honored in debug mode and for admins only; every run costs server CPU time"""
+    if current_app.debug:
+        return True
+    row = analytics.user_row(session['user_id']) if session.get('user_id') else None
+    return row is not None and bool(analytics.snapshot['user']['is_admin'][row])
+
+@stats_bp.route('/api/stats/leaderboard', methods=['GET'])
+def stats_leaderboard():
+    """Scores, ranks and streaks of all users of the league"""
+    try:
+        analytics = get_analytics()
+        return jsonify({
+            'leaderboard': analytics.leaderboard(),
+            'data_version': analytics.snapshot.meta['data_version'],
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({'error': f'Leaderboard stats failed: {str(e)}'}), 500
+
+@stats_bp.route('/api/stats/user', methods=['GET'])
+def stats_user():
+    """Pick record, streaks and week-by-week outcomes of one user"""
+    try:
+        analytics = get_analytics()
+        row = find_user_row(analytics)
+        if row is None:
+            return jsonify({'error': 'Valid user ID required'}), 400
+
+        return jsonify({'user': analytics.user_summary(row)})
+    except Exception as e:
+        return jsonify({'error': f'User stats failed: {str(e)}'}), 500
+
+@stats_bp.route('/api/stats/eligible-teams', methods=['GET'])
+def stats_eligible_teams():
+    """Teams a user can still pick as winner for the rest of the season"""
+    try:
+        analytics = get_analytics()
+        row = find_user_row(analytics)
+        if row is None:
+            return jsonify({'error': 'Valid user ID required'}), 400
+
+        teams = analytics.eligible_teams(row)
+        return jsonify({'eligible_teams': teams, 'count': len(teams)})
+    except Exception as e:
+        return jsonify({'error': f'Eligible teams failed: {str(e)}'}), 500
+
+@stats_bp.route('/api/stats/teams', methods=['GET'])
+def stats_teams():
+    """Win rate of every team and how well picking it worked for the league"""
+    try:
+        return jsonify({'teams': get_analytics().team_stats()})
+    except Exception as e:
+        return jsonify({'error': f'Team stats failed: {str(e)}'}), 500
+
+@stats_bp.route('/api/stats/head-to-head', methods=['GET'])
+def stats_head_to_head():
+    """Compare two users over the weeks both have decided picks in"""
+    try:
+        analytics = get_analytics()
+        row_a = find_user_row(analytics, 'user_a')
+        row_b = find_user_row(analytics, 'user_b')
+        if row_a is None or row_b is None:
+            return jsonify({'error': 'Valid user_a and user_b required'}), 400
+
+        return jsonify(analytics.head_to_head(row_a, row_b))
+    except Exception as e:
+        return jsonify({'error': f'Head-to-head failed: {str(e)}'}), 500
+
+@stats_bp.route('/api/stats/projections', methods=['GET'])
+def stats_projections():
+    """Monte Carlo projection of final scores and the chance to finish first"""
+    try:
+        league_id, season = get_scope()
+        simulations = DEFAULT_SIMULATIONS
+        if 'simulations' in request.args and may_set_simulations(get_analytics()):
+            simulations = request.args.get('simulations', DEFAULT_SIMULATIONS, type=int)
+        result = get_projections(current_app.config['STATS_DB_PATH'], simulations,
+                                 league_id=league_id, season=season)
+        return jsonify(dict(result, timestamp=datetime.now().isoformat()))
+    except Exception as e:
+        return jsonify({'error': f'Projections failed: {str(e)}'}), 500
+
+@stats_bp.route('/api/picks/plan', methods=['GET'])
+def picks_plan():
+    """Best pick per remaining week under the winner 2x / loser 1x limits"""
+    try:
+        analytics = get_analytics()
+        user_id = request.args.get('user_id', type=int)
+        if not user_id or analytics.user_row(user_id) is None:
+            return jsonify({'error': 'Valid user ID required'}), 400
+
+        matches = analytics.snapshot['match']
+        home_probabilities = get_odds_source().home_win_probabilities(matches)
+        return jsonify(plan_remaining_picks(analytics.snapshot, home_probabilities, user_id))
+    except Exception as e:
+        return jsonify({'error': f'Pick plan failed: {str(e)}'}), 500
+
+# Helper function to register the blueprint
+def register_stats_api(app, db_path):
+    """Register the stats API with the Flask app"""
+    app.config['STATS_DB_PATH'] = os.path.abspath(db_path) if db_path else None  # None: server database
+    app.register_blueprint(stats_bp)
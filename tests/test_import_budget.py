@@ -0,0 +1,28 @@
+"""
+Import time budget of the app modules (see benchmark_imports.py)
+
+Usage:
+    python -m pytest tests/test_import_budget.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_imports import LAZY_MODULES, check_import_budgets, measure_import
+
+@pytest.fixture(scope='module')
+def results():
+    return check_import_budgets(runs=3)
+
+def test_modules_within_import_budget(results):
+    over = {module: f"{own:.1f} ms over baseline (budget {budget} ms), imports {lazy_imported}"
+            for module, (total, own, budget, lazy_imported, ok) in results.items() if not ok}
+    assert not over, over
+
+def test_models_does_not_import_lazy_modules():
+    _, _, lazy_imported = measure_import('models', runs=1)
+    assert lazy_imported == [], f"models imports {lazy_imported}; {LAZY_MODULES} must be imported where they are used"
@@ -0,0 +1,204 @@
+"""
+Validator Run History for NFL PickEm App
+
+Structured records of game validator passes: phase timings (fetch, parse,
+match, apply, eliminations, backup, optimize), counts, errors and how long
+after kickoff each result landed. Records are kept in a ring-buffer table of the
+last RUN_HISTORY_SIZE runs.
+
+The table lives in its own SQLite file next to the app database
+(validator_runs.db), or in instance/ on a server database. Writing a run
+record into the app database would bump its mtime every pass and
+invalidate the caches keyed on it (season snapshot, analytics, projections).
+
+Usage:
+    python validator_runs.py [db_path] [limit]
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+from database import get_data_dir, get_database_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = get_database_path()
+RUN_HISTORY_FILENAME = 'validator_runs.db'
+RUN_HISTORY_SIZE = 500
+
+PHASES = ['fetch', 'parse', 'match', 'apply', 'eliminations', 'backup', 'optimize']
+
+RUN_HISTORY_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS validator_run (
+        slot INTEGER PRIMARY KEY,
+        seq INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        week INTEGER,
+        started_at TEXT NOT NULL,
+        duration_ms REAL NOT NULL,
+        success INTEGER NOT NULL,
+        record TEXT NOT NULL
+    )
+"""
+
+def get_run_history_path(db_path):
+    """Run history database that belongs to an app database (db_path None: the server database)"""
+    return os.path.join(get_data_dir(db_path), RUN_HISTORY_FILENAME)
+
+class ValidatorRun:
+    """Timings, counts and errors of one validator pass"""
+
+    def __init__(self, kind, week=None):
+        self.kind = kind
+        self.week = week
+        self.season = None
+        self.started_at = datetime.now()
+        self.success = True
+        self.phases_ms = {}
+        self.counts = {}
+        self.errors = []
+        self.results = []  # Stored results with the minutes between kickoff and storing them
+        self._started = time.perf_counter()
+        self._duration_ms = None
+
+    @contextmanager
+    def phase(self, name):
+        """Add the time spent in the with-block to a phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases_ms[name] = self.phases_ms.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+    def count(self, name, amount=1):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def error(self, message):
+        """Record an error; the run counts as failed"""
+        self.errors.append(message)
+        self.success = False
+
+    def result_landed(self, match_id, kickoff):
+        """Record a stored result with its delay after kickoff (naive US Eastern datetime)"""
+        import pytz
+
+        now = datetime.now(pytz.timezone('US/Eastern')).replace(tzinfo=None)
+        self.results.append({'match_id': match_id, 'minutes_after_kickoff': round((now - kickoff).total_seconds() / 60, 1)})
+
+    def finish(self, success=None):
+        if success is not None:
+            self.success = self.success and success
+        self._duration_ms = (time.perf_counter() - self._started) * 1000
+        return self
+
+    def to_dict(self):
+        duration_ms = self._duration_ms if self._duration_ms is not None else (time.perf_counter() - self._started) * 1000
+        return {
+            'kind': self.kind,
+            'week': self.week,
+            'season': self.season,
+            'started_at': self.started_at.isoformat(),
+            'duration_ms': round(duration_ms, 1),
+            'success': self.success,
+            'phases_ms': {name: round(self.phases_ms[name], 1) for name in PHASES + sorted(set(self.phases_ms) - set(PHASES))
+                          if name in self.phases_ms},
+            'counts': self.counts,
+            'errors': self.errors,
+            'results': self.results,
+        }
+
+class ValidatorRunStore:
+    """Ring buffer of the last RUN_HISTORY_SIZE run records"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, size=RUN_HISTORY_SIZE):
+        self.path = get_run_history_path(db_path)
+        self.size = size
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute(RUN_HISTORY_SCHEMA)
+        return conn
+
+    def add(self, run):
+        """Store a finished run, overwriting the oldest record once the buffer is full; returns its seq"""
+        record = run.to_dict()
+        conn = self._connect()
+        try:
+            with conn:
+                seq = conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM validator_run").fetchone()[0]
+                conn.execute("""
+                    INSERT OR REPLACE INTO validator_run (slot, seq, kind, week, started_at, duration_ms, success, record)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (seq % self.size, seq, record['kind'], record['week'], record['started_at'],
+                      record['duration_ms'], 1 if record['success'] else 0, json.dumps(record)))
+        finally:
+            conn.close()
+        return seq
+
+    def recent(self, limit=50, kind=None):
+        """Newest run records first, optionally of one kind"""
+        if not os.path.exists(self.path):
+            return []
+        conn = self._connect()
+        try:
+            query = "SELECT seq, record FROM validator_run"
+            params = []
+            if kind:
+                query += " WHERE kind = ?"
+                params.append(kind)
+            query += " ORDER BY seq DESC LIMIT ?"
+            params.append(limit)
+            return [dict(json.loads(record), seq=seq) for seq, record in conn.execute(query, params)]
+        finally:
+            conn.close()
+
+    def summary(self):
+        """Last run, last successful run and average duration per kind over the buffer"""
+        if not os.path.exists(self.path):
+            return {'last_run': None, 'last_success': None, 'runs': 0, 'avg_duration_ms': {}}
+        conn = self._connect()
+        try:
+            last_run = conn.execute("SELECT seq, record FROM validator_run ORDER BY seq DESC LIMIT 1").fetchone()
+            last_success = conn.execute(
+                "SELECT seq, record FROM validator_run WHERE success = 1 ORDER BY seq DESC LIMIT 1").fetchone()
+            averages = conn.execute("SELECT kind, AVG(duration_ms), COUNT(*) FROM validator_run GROUP BY kind").fetchall()
+        finally:
+            conn.close()
+
+        def load(row):
+            return dict(json.loads(row[1]), seq=row[0]) if row else None
+
+        return {
+            'last_run': load(last_run),
+            'last_success': load(last_success),
+            'runs': sum(count for _, _, count in averages),
+            'avg_duration_ms': {kind: round(average, 1) for kind, average, _ in averages},
+        }
+
+def main():
+    """Main function for command-line usage"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DB_PATH
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    for record in reversed(ValidatorRunStore(db_path).recent(limit)):
+        phases = ', '.join(f"{name} {ms:.0f}ms" for name, ms in record['phases_ms'].items())
+        week = f" {record['week']}" if record['week'] is not None else ''
+        if record.get('season'):
+            week += f" of {record['season']}"
+        status = 'ok' if record['success'] else 'FAILED'
+        print(f"#{record['seq']} {record['started_at']} {record['kind']}{week}: {status} in "
+              f"{record['duration_ms']:.0f}ms ({phases}) {record['counts']}")
+        for error in record['errors']:
+            print(f"    error: {error}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
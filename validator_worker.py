@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+NFL PickEm Validator Worker
+
+Entry point that runs the game validator as its own process, next to the web
+server instead of inside it. Only the worker holding the leader lock
+(instance/validator.lock) polls ESPN and writes results; further workers wait
+as standbys and take over when the leader exits. The web app never talks to
+the validator directly: results reach it through the database.
+
+Usage:
+    python validator_worker.py run [db_path]
+    python validator_worker.py status [db_path]
+"""
+
+import sys
+import signal
+import logging
+
+from database import get_engine, get_sqlite_path
+from game_validator import get_leader_lock_path, run_validation_service
+from leader_lock import read_leader
+
+logger = logging.getLogger(__name__)
+
+def get_validator_leader(db_path=None):
+    """Info about the validator currently polling for db_path, or None if none is running"""
+    return read_leader(get_leader_lock_path(db_path or get_sqlite_path(get_engine())))
+
+def main():
+    """Main function for command-line usage"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    command = sys.argv[1].lower() if len(sys.argv) > 1 else 'run'
+    db_path = sys.argv[2] if len(sys.argv) > 2 else None
+
+    if command == 'run':
+        # SIGTERM (systemd, launcher) ends the process normally so the lock is released right away
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        run_validation_service(db_path)
+    elif command == 'status':
+        leader = get_validator_leader(db_path)
+        if leader is None:
+            print("No validator is running")
+            return 1
+        print(f"Validator leader: pid {leader.get('pid')} on {leader.get('host')} "
+              f"since {leader.get('acquired_at')}")
+    else:
+        print("Unknown command. Use: run or status")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())